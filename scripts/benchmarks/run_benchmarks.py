@@ -0,0 +1,386 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+import psutil
+
+# ─── CONFIG ───
+BASE_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BASE_DIR.parent
+SCRAPERS_DIR = SCRIPTS_DIR / "scrapers_1000"
+FIXTURE_DIR = BASE_DIR / "fixtures"              # companies.csv + one HAR per scraper and company
+COMPANIES_PATH = FIXTURE_DIR / "companies.csv"
+RESULTS_DIR = BASE_DIR / "results"
+COMPANY_URLS_PATH = SCRIPTS_DIR / "csvs" / "cleaned" / "company_urls.csv"
+
+sys.path.append(str(SCRAPERS_DIR))
+from mock_site import MockConfig, MockSite
+from retry_policy import CircuitBreaker
+
+# name → (script, extra args). Every run works through the whole fixture company list.
+SCRAPERS = {
+    "bursa_url_finder": ("bursa_url_finder.py", ["--no-index"]),
+    "profile_scraper": ("profile_scraper.py", []),
+    "statement_scraper": ("statement_scraper.py", []),
+    "income_statement": ("income_statement.py", []),
+    "balance_sheet": ("balance_sheet.py", []),
+    "cash_flow": ("cash_flow.py", []),
+    "market_capscrape": ("market_capscrape.py", []),
+}
+
+# Journal phases (run_journal.journal_phase) folded into the phases reported here. Anything
+# not listed is extraction; for profile_scraper and statement_scraper that includes the tab
+# click in front of each section.
+PHASE_GROUPS = {
+    "launch": "launch",                 # Browser context + page (bursa_url_finder: a whole browser)
+    "navigate": "goto",
+    "open_statements": "navigation",
+    "search": "navigation",
+    "serialize": "serialization",
+}
+PHASES = ("launch", "goto", "navigation", "extraction", "serialization")
+PERCENTILES = (50, 95, 99)
+
+SAMPLE_INTERVAL = 0.25     # Seconds between RSS / process-count samples
+RUN_TIMEOUT = 1800         # Per scraper, seconds
+
+# Keeps the copied tree small; outputs and inputs are recreated per run
+COPY_IGNORE = shutil.ignore_patterns(
+    "__pycache__", "*.csv", "outputs", "debug_html", "screenshots", "fixtures", "benchmarks", "*.har")
+
+
+# ─── STATS ───
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def phase_stats(entries: list) -> dict:
+    samples = {phase: [] for phase in PHASES}
+    for entry in entries:
+        grouped = {}
+        for name, seconds in (entry.get("phases") or {}).items():
+            phase = PHASE_GROUPS.get(name, "extraction")
+            grouped[phase] = grouped.get(phase, 0.0) + seconds
+        for phase, seconds in grouped.items():
+            samples[phase].append(seconds)
+    return {
+        phase: {"n": len(values), **{f"p{p}": round(percentile(values, p), 3) for p in PERCENTILES}}
+        for phase, values in samples.items() if values
+    }
+
+def outcome_counts(entries: list) -> dict:
+    counts = {}
+    for entry in entries:
+        counts[entry["outcome"]] = counts.get(entry["outcome"], 0) + 1
+    return counts
+
+
+# ─── PROCESS SAMPLER ───
+# Polls the scraper's process tree: peak RSS of the whole tree (Python + every browser
+# process) and the most Chromium processes alive at once.
+class ProcessSampler:
+    def __init__(self, pid: int, interval: float = SAMPLE_INTERVAL):
+        self.root = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_chromium = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+
+    @staticmethod
+    def _is_chromium(proc) -> bool:
+        name = proc.name().lower()
+        return "chrom" in name or "headless_shell" in name
+
+    def sample(self):
+        rss, chromium = 0, 0
+        try:
+            procs = [self.root] + self.root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return
+        for proc in procs:
+            try:
+                rss += proc.memory_info().rss
+                chromium += self._is_chromium(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_chromium = max(self.peak_chromium, chromium)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+# ─── WORKSPACE ───
+# Each scraper runs in a throwaway copy of scripts/, so its outputs, resume checks and
+# combined CSVs never touch the real tree and every run starts from nothing.
+def make_workspace(root: Path, companies: list, scraper: str) -> Path:
+    workspace = root / scraper
+    shutil.copytree(SCRIPTS_DIR, workspace, ignore=COPY_IGNORE)
+    if scraper == "bursa_url_finder":
+        write_csv(workspace / "list_bursa_ids" / "bursa_company_list.csv",
+                  ["company_id"], [{"company_id": c["company_id"]} for c in companies])
+    else:
+        write_csv(workspace / "csvs" / "cleaned" / "company_urls.csv", ["company_id", "new_url"], companies)
+    return workspace
+
+def write_csv(path: Path, fields: list, rows: list):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def read_companies(path: Path = COMPANIES_PATH) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row for row in csv.DictReader(f) if row.get("company_id") and row.get("new_url")]
+
+def scraper_env(workspace: Path, base_url: str, extra: dict) -> dict:
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("JOB_STORE", "STATEMENT_REFRESH", "RUN_JOURNAL_RESUME", "BURSA_HAR", "BURSA_HAR_MODE")}
+    env.update({
+        "BURSA_BASE_URL": base_url,
+        "BURSA_WWW_BASE_URL": base_url,
+        "RUN_JOURNAL": str(workspace / "run_journal.jsonl"),
+        "BURSA_RATE_STATE": str(workspace / "rate_limiter.json"),
+        "BURSA_RPS": "1000",            # The mock is local; measure the scraper, not the throttle
+        "BURSA_SNAPSHOTS": "0",
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(extra)
+    return env
+
+def read_entries(journal: Path) -> list:
+    if not journal.exists():
+        return []
+    with open(journal, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ─── RUN ───
+def run_scraper(name: str, companies: list, base_url: str, root: Path, extra_env: dict, verbose: bool) -> dict:
+    script, args = SCRAPERS[name]
+    workspace = make_workspace(root, companies, name)
+    env = scraper_env(workspace, base_url, extra_env)
+    log_path = root / f"{name}.log"
+
+    CircuitBreaker.from_env(urlparse(base_url).hostname).reset()  # Breaker state is per host and outlives runs
+    print(f"⏱️ {name}: {len(companies)} companies")
+    started = time.monotonic()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(
+            [sys.executable, str(workspace / "scrapers_1000" / script), *args],
+            cwd=workspace, env=env, stdout=None if verbose else log, stderr=subprocess.STDOUT,
+        )
+        with ProcessSampler(proc.pid) as sampler:
+            try:
+                returncode = proc.wait(timeout=RUN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                returncode = proc.wait()
+    wall = time.monotonic() - started
+
+    entries = [e for e in read_entries(workspace / "run_journal.jsonl") if e.get("scraper") == name]
+    result = {
+        "returncode": returncode,
+        "companies": len(companies),
+        "attempts": len(entries),
+        "wall_s": round(wall, 2),
+        "companies_per_min": round(len(companies) / wall * 60, 2) if wall else 0.0,
+        "outcomes": outcome_counts(entries),
+        "phases": phase_stats(entries),
+        "peak_rss_mb": round(sampler.peak_rss / 2**20, 1),
+        "peak_chromium_processes": sampler.peak_chromium,
+    }
+    status = "✅" if returncode == 0 else f"❌ exit {returncode} (log: {log_path})"
+    print(f"   {status} {result['companies_per_min']} companies/min, peak RSS {result['peak_rss_mb']} MB, "
+          f"{result['peak_chromium_processes']} Chromium processes")
+    return result
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=SCRIPTS_DIR, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return ""
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+def run(args) -> Path:
+    companies = read_companies()
+    har_paths = sorted(FIXTURE_DIR.glob("*.har"))
+    if not companies or not har_paths:
+        raise SystemExit(f"❌ No fixtures in {FIXTURE_DIR}; record some first (see usage below)")
+
+    extra_env = dict(pair.split("=", 1) for pair in args.env)
+    config = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    report = {
+        **git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {"companies": len(companies), "har_files": len(har_paths), "latency_ms": args.latency_ms,
+                   "jitter_ms": args.jitter_ms, "seed": args.seed, "env": extra_env},
+        "scrapers": {},
+    }
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="bursa_bench_") as tmp, MockSite(har_paths, config) as site:
+        for name in args.scraper or SCRAPERS:
+            report["scrapers"][name] = run_scraper(name, companies, site.base_url, Path(tmp), extra_env, args.verbose)
+            if args.keep_logs:
+                shutil.copy(Path(tmp) / f"{name}.log", RESULTS_DIR / f"{name}.log")
+        report["mock"] = dict(site.stats)
+        print(site.summary())
+
+    commit = (report["commit"] or "nogit")[:10] + ("-dirty" if report["dirty"] else "")
+    out = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}_{commit}.json"
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"📝 Results: {out}")
+    return out
+
+
+# ─── RECORD ───
+# One HAR per scraper and company, recorded against the live site with only that company in
+# the input CSV (a HAR is written when its browser context closes, so one context per file).
+def record(args):
+    if not COMPANY_URLS_PATH.exists():
+        raise SystemExit(f"❌ {COMPANY_URLS_PATH} not found; run bursa_url_finder.py first")
+    with open(COMPANY_URLS_PATH, newline="", encoding="utf-8") as f:
+        known = {row["company_id"]: row for row in csv.DictReader(f) if row.get("new_url")}
+    missing = [cid for cid in args.company_id if cid not in known]
+    if missing:
+        raise SystemExit(f"❌ No new_url for {', '.join(missing)} in {COMPANY_URLS_PATH}")
+
+    companies = [known[cid] for cid in args.company_id]
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    write_csv(COMPANIES_PATH, ["company_id", "new_url"], companies)
+
+    with tempfile.TemporaryDirectory(prefix="bursa_bench_record_") as tmp:
+        for name in args.scraper or SCRAPERS:
+            script, extra = SCRAPERS[name]
+            for company in companies:
+                cid = company["company_id"]
+                workspace = make_workspace(Path(tmp) / cid, [company], name)
+                env = {k: v for k, v in os.environ.items() if k not in ("JOB_STORE", "STATEMENT_REFRESH")}
+                env.update({"BURSA_HAR": str(FIXTURE_DIR / f"{name}_{cid}.har"), "BURSA_HAR_MODE": "record",
+                            "RUN_JOURNAL": str(workspace / "run_journal.jsonl"), "BURSA_SNAPSHOTS": "0"})
+                print(f"🎙️ Recording {name} for {cid}")
+                subprocess.run([sys.executable, str(workspace / "scrapers_1000" / script), *extra],
+                               cwd=workspace, env=env, check=False)
+    print(f"📁 Fixtures in {FIXTURE_DIR}")
+
+
+# ─── COMPARE ───
+# (metric path, True if higher is better)
+COMPARED = [("companies_per_min", True), ("peak_rss_mb", False), ("peak_chromium_processes", False)]
+
+def compare(args) -> int:
+    old = json.loads(Path(args.old).read_text(encoding="utf-8"))
+    new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+    print(f"📊 {(old.get('commit') or '?')[:10]} → {(new.get('commit') or '?')[:10]} "
+          f"(regression threshold {args.threshold:.0%})")
+
+    regressions = []
+    for name in sorted(set(old["scrapers"]) & set(new["scrapers"])):
+        before, after = old["scrapers"][name], new["scrapers"][name]
+        rows = [(metric, before.get(metric), after.get(metric), higher_better)
+                for metric, higher_better in COMPARED]
+        for phase in PHASES:
+            for p in PERCENTILES:
+                key = f"p{p}"
+                rows.append((f"{phase}.{key}", before["phases"].get(phase, {}).get(key),
+                             after["phases"].get(phase, {}).get(key), False))
+
+        print(f"\n{name}")
+        for metric, a, b, higher_better in rows:
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            worse = change < -args.threshold if higher_better else change > args.threshold
+            # Sub-10 ms phases are noise; don't fail a build on them
+            if worse and "." in metric and max(a, b) < 0.01:
+                worse = False
+            flag = "  ⚠️ regression" if worse else ""
+            print(f"   {metric:<26} {a:>10} → {b:<10} {change:+7.1%}{flag}")
+            if worse:
+                regressions.append(f"{name}.{metric}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+# ─── CLI ───
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against recorded fixtures served by mock_site.py.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the scrapers against the fixtures and write a JSON report")
+    run_parser.add_argument("--scraper", action="append", choices=list(SCRAPERS), help="Repeatable; default all")
+    run_parser.add_argument("--latency-ms", type=float, default=50, help="Mock latency per response")
+    run_parser.add_argument("--jitter-ms", type=float, default=0, help="Mock jitter; keep 0 for comparable runs")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                            help="Extra env for the scrapers, e.g. SCRAPER_MAX_CONCURRENCY=4")
+    run_parser.add_argument("--output", help=f"Report path (default: {RESULTS_DIR}/<time>_<commit>.json)")
+    run_parser.add_argument("--keep-logs", action="store_true", help="Copy each scraper's output next to the report")
+    run_parser.add_argument("--verbose", action="store_true", help="Show scraper output instead of logging it")
+
+    record_parser = sub.add_parser("record", help="Record fixtures from the live site")
+    record_parser.add_argument("--company-id", action="append", required=True, help="Repeatable")
+    record_parser.add_argument("--scraper", action="append", choices=list(SCRAPERS), help="Repeatable; default all")
+
+    compare_parser = sub.add_parser("compare", help="Compare two reports; exits 1 on a regression")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative change that counts as a regression (default 0.10)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "record":
+        record(args)
+    else:
+        sys.exit(compare(args))
+
+"""
+Usage:
+    # Once, against the live site (needs csvs/cleaned/company_urls.csv)
+    python3 benchmarks/run_benchmarks.py record --company-id 1155 --company-id 5819 --company-id 7113
+
+    # Every run uses the same fixtures, mock latency and seed
+    python3 benchmarks/run_benchmarks.py run
+    python3 benchmarks/run_benchmarks.py run --scraper statement_scraper --env SCRAPER_MAX_CONCURRENCY=8
+
+    # Accept or reject a change on the numbers
+    git stash && python3 benchmarks/run_benchmarks.py run --output /tmp/before.json && git stash pop
+    python3 benchmarks/run_benchmarks.py run --output /tmp/after.json
+    python3 benchmarks/run_benchmarks.py compare /tmp/before.json /tmp/after.json
+"""
@@ -17,17 +17,26 @@ scripts = [
     "ownership_injection.py",
     "top_10_injection.py",
     "insider_injection.py",
+    "cashflow_injection.py",
+    "income_injection.py",
+    "balance_injection.py",
+    "statement_long_injection.py"  # Skips itself unless the scrapers wrote long statement files
+]
+
+# Statement scripts run a second time with --quarterly for the *_quarterly tables
+quarterly_scripts = [
     "cashflow_injection.py",
     "income_injection.py",
     "balance_injection.py"
-    
 ]
 
+runs = [(script, []) for script in scripts] + [(script, ["--quarterly"]) for script in quarterly_scripts]
+
 # Run each script one by one
-for script in scripts:
+for script, extra_args in runs:
     script_path = scripts_dir / script
-    print(f"\n🚀 Running: {script_path}")
-    cmd = ["python", str(script_path)]
+    print(f"\n🚀 Running: {script_path} {' '.join(extra_args)}")
+    cmd = ["python", str(script_path), *extra_args]
     if REPLACE_MODE:
         cmd.append("--replace")
 
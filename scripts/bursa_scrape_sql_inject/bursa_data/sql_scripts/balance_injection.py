@@ -4,14 +4,28 @@ import re
 import sys
 import warnings
 from pandas.errors import SettingWithCopyWarning
+# Figures arrive float64 from the scrapers; to_float still reads the older comma-text CSVs
+sys.path.append(str(Path(__file__).resolve().parents[3] / "scrapers_1000"))
+from numeric_parsing import to_float
 warnings.simplefilter(action="ignore", category=SettingWithCopyWarning)
 
 REPLACE_MODE = "--replace" in sys.argv
+# --quarterly loads the quarterly statements (same columns, quarter-end fiscal dates) into their
+# own table, keyed on (registration_number, fiscal_date, period_type)
+QUARTERLY_MODE = "--quarterly" in sys.argv
+SOURCE_CSV = "complete_balance_sheets_quarterly.csv" if QUARTERLY_MODE else "complete_balance_sheets.csv"
+TABLE_NAME = "public_complete_balance_sheet_quarterly" if QUARTERLY_MODE else "public_complete_balance_sheet"
+KEY_COLUMNS = ["registration_number", "fiscal_date", "period_type"] if QUARTERLY_MODE else ["registration_number", "fiscal_date"]
 
-print(f"🛠️  Running in {'REPLACE' if REPLACE_MODE else 'APPEND'} mode")
+print(f"🛠️  Running in {'REPLACE' if REPLACE_MODE else 'APPEND'} mode{' (quarterly)' if QUARTERLY_MODE else ''}")
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-csv = pd.read_csv(BASE_DIR / "complete_balance_sheets.csv", keep_default_na=True,na_values=["None", "none", "NaN", "-"],low_memory=False,dtype={"company_id": str})
+if not (BASE_DIR / SOURCE_CSV).exists():
+    # Quarterly files only exist once the scrapers have captured them (STATEMENT_QUARTERLY=0 skips it)
+    print(f"⚠️ {SOURCE_CSV} not found. Nothing to load.")
+    sys.exit(0)
+
+csv = pd.read_csv(BASE_DIR / SOURCE_CSV, keep_default_na=True,na_values=["None", "none", "NaN", "-"],low_memory=False,dtype={"company_id": str})
 csv["company_id"] = csv["company_id"].astype(str)
 
 df = csv
@@ -50,10 +64,10 @@ merged = merged.rename(columns={"Fiscal Date": "Fiscal Date"})
 # Find all _yoy columns
 yoy_cols = [col for col in merged.columns if col.endswith('_yoy')]
 
-# Identify _yoy columns that do NOT contain any '%' values
+# Identify _yoy columns without a single YoY figure
 cols_to_drop = [
     col for col in yoy_cols
-    if not merged[col].astype(str).str.contains('%', na=False).any()
+    if not merged[col].notna().any()
 ]
 
 # Drop them
@@ -150,13 +164,7 @@ for col in column_map.values():
         print(f"❌ Missing column: {col}")
         df[col] = 0
     else:
-        # Remove commas before conversion
-        df[col] = (
-            df[col].astype(str)
-            .str.replace(",", "")
-            .pipe(pd.to_numeric, errors="coerce")
-            .fillna(0)
-        )
+        df[col] = to_float(df[col]).fillna(0)
 
 #------------ How much of the dataset is missing and what the columns names after cleaning is---
 
@@ -203,18 +211,9 @@ df["old_registration_number"] = df["old_registration_number"].astype(str)
 
 # This is to ensure if that row_data has that col, it will clean the data points with missing values for calc 
 if "other_long_term_assets_total" in df.columns:
-    df["other_long_term_assets"] = (
-        df["other_long_term_assets_total"]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .pipe(pd.to_numeric, errors="coerce")
-        .fillna(0)
-    )
+    df["other_long_term_assets"] = to_float(df["other_long_term_assets_total"]).fillna(0)
 else:
-    df["other_long_term_assets"] = 0
-
-# Change to numeric to be used for calc as its a string currently
-df["other_long_term_assets"] = pd.to_numeric(df["other_long_term_assets"], errors="coerce").fillna(0)
+    df["other_long_term_assets"] = 0.0
 
 # Final columns to keep — keep only 'total_assets', no recalculation from components
 final_columns = [
@@ -245,14 +244,7 @@ asset_components = [
 for col in asset_components:
     if col not in df.columns:
         df[col] = 0  # fallback if missing
-    df[col] = (
-        df[col]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .str.strip()
-        .pipe(pd.to_numeric, errors="coerce")
-        .fillna(0)
-    )
+    df[col] = to_float(df[col]).fillna(0)
 
 # 1. Compute total_assets from components (fallback only)
 df["computed_total_assets"] = df[asset_components].sum(axis=1)
@@ -260,12 +252,7 @@ df["computed_total_assets"] = df[asset_components].sum(axis=1)
 
 # 2. Clean scraped total_assets
 # in the 15 companies, only 2 had these the rest were computed but accurate to bursa
-df["total_assets"] = (
-    df["total_assets"]
-    .astype(str)
-    .str.replace(",", "", regex=False)
-    .pipe(pd.to_numeric, errors="coerce")
-) 
+df["total_assets"] = to_float(df["total_assets"])
 
 # 3. Only fill in missing scraped total_assets
 df["total_assets"] = df["total_assets"].fillna(df["computed_total_assets"])
@@ -313,7 +300,7 @@ print(f"Columns: {df.columns.tolist()}")
 
 
 ## - second imports 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 import pandas as pd
 from dotenv import load_dotenv
 import os
@@ -336,58 +323,40 @@ engine = create_engine(connection_url)
 df = df.copy()
 
 
-# ------- For appending new registration numbers or new dates
-
 from sqlalchemy import text
 
-# Step 1: Load existing (registration_number, fiscal_date) pairs
-with engine.connect() as conn:
-    existing = conn.execute(text("""
-        SELECT registration_number, fiscal_date 
-        FROM public.public_complete_balance_sheet
-    """)).fetchall()
-    existing_pairs = set((str(r[0]).strip(), str(r[1])) for r in existing)
-
-# Step 2: Filter df for only new pairs
-df["registration_number"] = df["registration_number"].astype(str).str.strip()
-df["fiscal_date"] = df["fiscal_date"].astype(str).str.strip()
-
-df["key"] = list(zip(df["registration_number"], df["fiscal_date"]))
-df = df[~df["key"].isin(existing_pairs)].drop(columns="key")
-
-print(f"🆕 Appending {len(df)} new rows to DB...")
-
-
-
-from sqlalchemy import text
+if QUARTERLY_MODE:
+    df["period_type"] = "quarterly"
 
 if REPLACE_MODE:
     # REPLACE MODE: Replace whole table
     print("🚨 Replacing entire table with new data...")
-    df.to_sql("public_complete_balance_sheet", engine, schema="public", index=False, if_exists="replace")
-    print("✅ Replaced 'public_complete_balance_sheet'.")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="replace")
+    print(f"✅ Replaced '{TABLE_NAME}'.")
 else:
-    # APPEND MODE: Only add new (registration_number, fiscal_date) pairs
-    from sqlalchemy import text
-    with engine.connect() as conn:
-        existing = conn.execute(text("""
-            SELECT registration_number, fiscal_date 
-            FROM public.public_complete_balance_sheet
-        """)).fetchall()
-        existing_pairs = set((str(r[0]).strip(), str(r[1])) for r in existing)
+    # APPEND MODE: Only add new key tuples (registration_number, fiscal_date[, period_type])
+    existing_pairs = set()
+    if inspect(engine).has_table(TABLE_NAME, schema="public"):  # The quarterly tables start out missing
+        with engine.connect() as conn:
+            existing = conn.execute(text(f"""
+                SELECT {", ".join(KEY_COLUMNS)}
+                FROM public.{TABLE_NAME}
+            """)).fetchall()
+            existing_pairs = set(tuple(str(v).strip() for v in r) for r in existing)
 
     df["registration_number"] = df["registration_number"].astype(str).str.strip()
     df["fiscal_date"] = df["fiscal_date"].astype(str).str.strip()
-    df["key"] = list(zip(df["registration_number"], df["fiscal_date"]))
+    df["key"] = list(zip(*(df[col] for col in KEY_COLUMNS)))
     df = df[~df["key"].isin(existing_pairs)].drop(columns="key")
 
     print(f"🆕 Appending {len(df)} new rows to DB...")
-    df.to_sql("public_complete_balance_sheet", engine, schema="public", index=False, if_exists="append")
-    print("✅ Appended to 'public_complete_balance_sheet'.")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="append")
+    print(f"✅ Appended to '{TABLE_NAME}'.")
 
 """
 If balance_injection.py --replace it will only update new entries such as new company or new dates
 balance_injection.py is append mode.
+balance_injection.py --quarterly [--replace] loads complete_balance_sheets_quarterly.csv into public_complete_balance_sheet_quarterly
 May make a update values or columns in future.
 
 Orchestrator will use append only.
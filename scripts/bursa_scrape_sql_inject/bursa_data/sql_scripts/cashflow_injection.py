@@ -4,9 +4,20 @@ import re
 import sys
 
 REPLACE_MODE = "--replace" in sys.argv
+# --quarterly loads the quarterly statements (same columns, quarter-end fiscal dates) into their
+# own table, keyed on (registration_number, fiscal_date, period_type)
+QUARTERLY_MODE = "--quarterly" in sys.argv
+SOURCE_CSV = "complete_cash_flow_statements_quarterly.csv" if QUARTERLY_MODE else "complete_cash_flow_statements.csv"
+TABLE_NAME = "public_complete_cash_flow_quarterly" if QUARTERLY_MODE else "public_complete_cash_flow"
+KEY_COLUMNS = ["registration_number", "fiscal_date", "period_type"] if QUARTERLY_MODE else ["registration_number", "fiscal_date"]
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-csv = pd.read_csv(BASE_DIR / "complete_cash_flow_statements.csv", keep_default_na=True,na_values=["None", "none", "NaN", "-"],low_memory=False,dtype={"company_id": str})
+if not (BASE_DIR / SOURCE_CSV).exists():
+    # Quarterly files only exist once the scrapers have captured them (STATEMENT_QUARTERLY=0 skips it)
+    print(f"⚠️ {SOURCE_CSV} not found. Nothing to load.")
+    sys.exit(0)
+
+csv = pd.read_csv(BASE_DIR / SOURCE_CSV, keep_default_na=True,na_values=["None", "none", "NaN", "-"],low_memory=False,dtype={"company_id": str})
 csv["company_id"] = csv["company_id"].astype(str)
 
 df = csv
@@ -45,10 +56,10 @@ merged = merged.rename(columns={"Fiscal Date": "Fiscal Date"})
 # Find all _yoy columns
 yoy_cols = [col for col in merged.columns if col.endswith('_yoy')]
 
-# Identify _yoy columns that do NOT contain any '%' values
+# Identify _yoy columns without a single YoY figure
 cols_to_drop = [
     col for col in yoy_cols
-    if not merged[col].astype(str).str.contains('%', na=False).any()
+    if not merged[col].notna().any()
 ]
 
 # Drop them
@@ -165,7 +176,7 @@ df = df[~df["registration_number"].isin([None, "", "nan", "NaN", "None"])]
 
 # -- SQL APPEND
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 import pandas as pd
 from dotenv import load_dotenv
 import os
@@ -191,31 +202,37 @@ df = df.copy()
 
 from sqlalchemy import text
 
+if QUARTERLY_MODE:
+    df["period_type"] = "quarterly"
+
 if REPLACE_MODE:
     # REPLACE MODE: Replace whole table
     print("🚨 Replacing entire table with new data...")
-    df.to_sql("public_complete_cash_flow", engine, schema="public", index=False, if_exists="replace")
-    print("✅ Replaced 'public_complete_cash_flow'.")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="replace")
+    print(f"✅ Replaced '{TABLE_NAME}'.")
 else:
-    # APPEND MODE: Only add new (registration_number, fiscal_date) pairs
-    with engine.connect() as conn:
-        existing = conn.execute(text("""
-            SELECT registration_number, fiscal_date 
-            FROM public.public_complete_cash_flow
-        """)).fetchall()
-        existing_pairs = set((str(r[0]).strip(), str(r[1])) for r in existing)
+    # APPEND MODE: Only add new key tuples (registration_number, fiscal_date[, period_type])
+    existing_pairs = set()
+    if inspect(engine).has_table(TABLE_NAME, schema="public"):  # The quarterly tables start out missing
+        with engine.connect() as conn:
+            existing = conn.execute(text(f"""
+                SELECT {", ".join(KEY_COLUMNS)}
+                FROM public.{TABLE_NAME}
+            """)).fetchall()
+            existing_pairs = set(tuple(str(v).strip() for v in r) for r in existing)
 
     df["registration_number"] = df["registration_number"].astype(str).str.strip()
     df["fiscal_date"] = df["fiscal_date"].astype(str).str.strip()
-    df["key"] = list(zip(df["registration_number"], df["fiscal_date"]))
+    df["key"] = list(zip(*(df[col] for col in KEY_COLUMNS)))
     df = df[~df["key"].isin(existing_pairs)].drop(columns="key")
 
     print(f"🆕 Appending {len(df)} new rows to DB...")
-    df.to_sql("public_complete_cash_flow", engine, schema="public", index=False, if_exists="append")
-    print("✅ Appended to 'public_complete_cash_flow'.")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="append")
+    print(f"✅ Appended to '{TABLE_NAME}'.")
 
 
     """_summary_
     cashflow_injection.py -> appends
     cashflow_injection.py --replace ->replaces
+    cashflow_injection.py --quarterly -> public_complete_cash_flow_quarterly (with or without --replace)
     """
\ No newline at end of file
@@ -2,12 +2,26 @@ from pathlib import Path
 import pandas as pd
 import re
 import sys
+# Figures arrive float64 from the scrapers; to_float still reads the older comma-text CSVs
+sys.path.append(str(Path(__file__).resolve().parents[3] / "scrapers_1000"))
+from numeric_parsing import to_float
 
 
 REPLACE_MODE = "--replace" in sys.argv
+# --quarterly loads the quarterly statements (same columns, quarter-end fiscal dates) into their
+# own table, keyed on (registration_number, fiscal_date, period_type)
+QUARTERLY_MODE = "--quarterly" in sys.argv
+SOURCE_CSV = "complete_income_statements_quarterly.csv" if QUARTERLY_MODE else "complete_income_statements.csv"
+TABLE_NAME = "public_complete_income_quarterly" if QUARTERLY_MODE else "public_complete_income"
+KEY_COLUMNS = ["registration_number", "fiscal_date", "period_type"] if QUARTERLY_MODE else ["registration_number", "fiscal_date"]
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-csv = pd.read_csv(BASE_DIR / "complete_income_statements.csv", keep_default_na=True,na_values=["None", "none", "NaN", "-"],low_memory=False,dtype={"company_id": str})
+if not (BASE_DIR / SOURCE_CSV).exists():
+    # Quarterly files only exist once the scrapers have captured them (STATEMENT_QUARTERLY=0 skips it)
+    print(f"⚠️ {SOURCE_CSV} not found. Nothing to load.")
+    sys.exit(0)
+
+csv = pd.read_csv(BASE_DIR / SOURCE_CSV, keep_default_na=True,na_values=["None", "none", "NaN", "-"],low_memory=False,dtype={"company_id": str})
 csv["company_id"] = csv["company_id"].astype(str)
 
 df = csv
@@ -49,10 +63,10 @@ merged = merged.rename(columns={"Fiscal Date": "Fiscal Date"})
 # Find all _yoy columns
 yoy_cols = [col for col in merged.columns if col.endswith('_yoy')]
 
-# Identify _yoy columns that do NOT contain any '%' values
+# Identify _yoy columns without a single YoY figure
 cols_to_drop = [
     col for col in yoy_cols
-    if not merged[col].astype(str).str.contains('%', na=False).any()
+    if not merged[col].notna().any()
 ]
 
 # Drop them
@@ -138,18 +152,10 @@ desired_columns = [
     "basic_eps_including_extraordinary_items"
 ]
 
-# Clean bank_total_revenue (remove commas, convert to float)
-df["bank_total_revenue"] = (
-    df["bank_total_revenue"]
-    .astype(str)
-    .str.replace(",", "", regex=False)
-    .str.strip()
-    .pipe(pd.to_numeric, errors="coerce")
-    .fillna(0)
-)
+df["bank_total_revenue"] = to_float(df["bank_total_revenue"]).fillna(0)
 
 # Replace revenue only if it's NaN or 0
-df["revenue"] = df["revenue"].fillna(0)
+df["revenue"] = to_float(df["revenue"]).fillna(0)
 df["revenue"] = df.apply(
     lambda row: row["bank_total_revenue"] if row["revenue"] == 0 and row["bank_total_revenue"] > 0 else row["revenue"],
     axis=1
@@ -172,54 +178,56 @@ df["fiscal_date"] = df["fiscal_date"].dt.strftime("%d %b %Y")
 df = df[[col for col in desired_columns if col in df.columns]]
 df = df.dropna(subset=["registration_number"])
 
-## ALL THE BANKS don't use revenue in their financials statements
-company_1155_manual_revenue = {
-    "31 Dec 2024": 27907,
-    "31 Dec 2023": 25650,
-    "31 Dec 2022": 23702,
-    "31 Dec 2021": 22249,
-    "31 Dec 2020": 19670
-}
-
-for date, value in company_1155_manual_revenue.items():
-    mask = (df["company_id"] == "1155") & (df["fiscal_date"] == date)
-    df.loc[mask, "revenue"] = float(value)
-#---- manual additions
-cimb_manual_revenue = {
-    "31 Dec 2024": 22301.154,
-    "31 Dec 2023": 21014.482,
-    "31 Dec 2022": 19837.516,
-    "31 Dec 2021": 19512.940,
-    "31 Dec 2020": 17189.003
-}
-
-for date, value in cimb_manual_revenue.items():
-    mask = (df["company_id"] == "1023") & (df["fiscal_date"] == date)
-    df.loc[mask, "revenue"] = float(value)
+# Full-year figures: a Q4 quarter ends on the same date, so the quarterly table is left alone
+if not QUARTERLY_MODE:
+    ## ALL THE BANKS don't use revenue in their financials statements
+    company_1155_manual_revenue = {
+        "31 Dec 2024": 27907,
+        "31 Dec 2023": 25650,
+        "31 Dec 2022": 23702,
+        "31 Dec 2021": 22249,
+        "31 Dec 2020": 19670
+    }
+
+    for date, value in company_1155_manual_revenue.items():
+        mask = (df["company_id"] == "1155") & (df["fiscal_date"] == date)
+        df.loc[mask, "revenue"] = float(value)
+    #---- manual additions
+    cimb_manual_revenue = {
+        "31 Dec 2024": 22301.154,
+        "31 Dec 2023": 21014.482,
+        "31 Dec 2022": 19837.516,
+        "31 Dec 2021": 19512.940,
+        "31 Dec 2020": 17189.003
+    }
+
+    for date, value in cimb_manual_revenue.items():
+        mask = (df["company_id"] == "1023") & (df["fiscal_date"] == date)
+        df.loc[mask, "revenue"] = float(value)
     
-hlb_manual_revenue = {
-    "30 Jun 2024": 5884,
-    "30 Jun 2023": 5570,
-    "30 Jun 2022": 5417,
-    "30 Jun 2021": 4803,
-    "30 Jun 2020": 4399
-}
-
-for date, value in hlb_manual_revenue.items():
-    mask = (df["company_id"] == "5819") & (df["fiscal_date"] == date)
-    df.loc[mask, "revenue"] = float(value)
+    hlb_manual_revenue = {
+        "30 Jun 2024": 5884,
+        "30 Jun 2023": 5570,
+        "30 Jun 2022": 5417,
+        "30 Jun 2021": 4803,
+        "30 Jun 2020": 4399
+    }
+
+    for date, value in hlb_manual_revenue.items():
+        mask = (df["company_id"] == "5819") & (df["fiscal_date"] == date)
+        df.loc[mask, "revenue"] = float(value)
     
 
-public_bank_manual_revenue = {
-    "31 Dec 2024": 14040,
-    "31 Dec 2023": 12949,
-    "31 Dec 2022": 13065,
-    "31 Dec 2021": 11305,
-    "31 Dec 2020": 10045
-}
-for date, value in public_bank_manual_revenue.items():
-    mask = (df["company_id"] == "1295") & (df["fiscal_date"] == date)
-    df.loc[mask, "revenue"] = float(value)
+    public_bank_manual_revenue = {
+        "31 Dec 2024": 14040,
+        "31 Dec 2023": 12949,
+        "31 Dec 2022": 13065,
+        "31 Dec 2021": 11305,
+        "31 Dec 2020": 10045
+    }
+    for date, value in public_bank_manual_revenue.items():
+        mask = (df["company_id"] == "1295") & (df["fiscal_date"] == date)
+        df.loc[mask, "revenue"] = float(value)
 
 
 # # Optional: normalize fiscal_date if needed
@@ -237,11 +245,6 @@ for date, value in public_bank_manual_revenue.items():
 
 
 #---------
-# Clean commas before conversion
-df["revenue"] = df["revenue"].astype(str).str.replace(",", "").str.strip()
-df["revenue"] = pd.to_numeric(df["revenue"], errors="coerce")
-
-
 # Ensure registration_number is str
 df["registration_number"] = df["registration_number"].astype(str).str.strip()
 df = df[~df["registration_number"].isin([None, "", "nan", "NaN", "None"])]
@@ -268,7 +271,7 @@ df["fiscal_date"] = pd.to_datetime(df["fiscal_date"], errors="coerce")
 # Sort by fiscal_date descending (most recent first), then by company_id
 df = df.sort_values(["company_id", "fiscal_date"], ascending=[True, False])
 df["fiscal_date"] = pd.to_datetime(df["fiscal_date"], errors="coerce").dt.strftime("%d %b %Y")
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 import pandas as pd
 from dotenv import load_dotenv
 import os
@@ -296,32 +299,38 @@ df["old_registration_number"] = df["old_registration_number"].astype(str)
 
 from sqlalchemy import text
 
+if QUARTERLY_MODE:
+    df["period_type"] = "quarterly"
+
 if REPLACE_MODE:
     # REPLACE MODE: Replace whole table
     print("🚨 Replacing entire table with new data...")
-    df.to_sql("public_complete_income", engine, schema="public", index=False, if_exists="replace")
-    print("✅ Replaced 'public_complete_income'.")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="replace")
+    print(f"✅ Replaced '{TABLE_NAME}'.")
 else:
-    # APPEND MODE: Only add new (registration_number, fiscal_date) pairs
-    with engine.connect() as conn:
-        existing = conn.execute(text("""
-            SELECT registration_number, fiscal_date 
-            FROM public.public_complete_income
-        """)).fetchall()
-        existing_pairs = set((str(r[0]).strip(), str(r[1])) for r in existing)
+    # APPEND MODE: Only add new key tuples (registration_number, fiscal_date[, period_type])
+    existing_pairs = set()
+    if inspect(engine).has_table(TABLE_NAME, schema="public"):  # The quarterly tables start out missing
+        with engine.connect() as conn:
+            existing = conn.execute(text(f"""
+                SELECT {", ".join(KEY_COLUMNS)}
+                FROM public.{TABLE_NAME}
+            """)).fetchall()
+            existing_pairs = set(tuple(str(v).strip() for v in r) for r in existing)
 
     df["registration_number"] = df["registration_number"].astype(str).str.strip()
     df["fiscal_date"] = df["fiscal_date"].astype(str).str.strip()
-    df["key"] = list(zip(df["registration_number"], df["fiscal_date"]))
+    df["key"] = list(zip(*(df[col] for col in KEY_COLUMNS)))
     df = df[~df["key"].isin(existing_pairs)].drop(columns="key")
 
     print(f"🆕 Appending {len(df)} new rows to DB...")
-    df.to_sql("public_complete_income", engine, schema="public", index=False, if_exists="append")
-    print("✅ Appended to 'public_complete_income'.")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="append")
+    print(f"✅ Appended to '{TABLE_NAME}'.")
 
 """
 If income_injection.py  it will only update new entries such as new company or new dates
 income_injection.py --replace
+income_injection.py --quarterly [--replace] loads complete_income_statements_quarterly.csv into public_complete_income_quarterly
 May make a update for just values or columns in future.
 
 Orchestrator will default
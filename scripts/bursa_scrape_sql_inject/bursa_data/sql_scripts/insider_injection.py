@@ -33,7 +33,6 @@ bad_ids = csv[~csv["company_id"].str.fullmatch(r"\d{4}")]
 
 
 
-csv["company_id"].nunique()
 
 
 df = csv
@@ -41,10 +40,8 @@ df = csv
 
 merged = df
 
-len(merged.columns)
 
 
-merged
 
 
 bursa_registration = pd.read_csv(BASE_DIR / "matched_companies_from_ssm.csv",dtype={"company_id": str,"companyNo": str})
@@ -65,10 +62,8 @@ company_id["company_id"] = company_id["company_id"].str.strip().str.zfill(4)
 
 
 merge = pd.merge(bursa_registration,company_id,on="company_name",how="inner")
-merge
 
 
-len(merge["company_id"].drop_duplicates())
 
 
 merge_copy = merge.copy()
@@ -83,13 +78,10 @@ merge = merge.rename(columns={
 })
 
 
-merge
 
 
-merged
 
 
-merged["company_id"].nunique()
 
 
 merge["company_id"] = merge["company_id"].str.strip()
@@ -101,28 +93,22 @@ merged["company_id"] = merged["company_id"].astype(str)
 final_merge = merge.merge(merged, on="company_id", how="inner")
 
 
-final_merge['company_id'].nunique()
 
 
-merge
 
 
-(final_merge.isnull().mean() * 100).sort_values(ascending=False).to_frame("missing_%").style.background_gradient(cmap='Reds')
 
 
 df=final_merge
 
 
-df
 
 
 # ── Your DataFrame ──
 df = df.copy()
 df.columns = df.columns.str.replace("-", " ").str.strip().str.strip().str.lower().str.replace(" ", "_").str.replace("-", "_")
-df
 
 
-df.columns
 
 
 import re
@@ -138,10 +124,8 @@ df.columns = (
 )
 
 
-df
 
 
-df.columns.tolist()
 
 
 # Check for duplicate column names
@@ -167,7 +151,6 @@ summary_df = pd.DataFrame({
 df = df.dropna(subset=["registration_number"])
 
 
-df['registration_number'].nunique()
 
 
 from sqlalchemy import create_engine
@@ -199,7 +182,6 @@ df["old_registration_number"] = df["old_registration_number"].astype(str)
 df.to_sql("public_complete_individual_shareholder", engine, schema="public", index=False, if_exists="replace")
 
 print("✅ Uploaded to 'public_complete_individual_shareholder' with normalized column names.")
-print(df.head())
 print('Congrats it works')
 
 
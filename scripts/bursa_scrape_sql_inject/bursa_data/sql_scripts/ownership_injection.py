@@ -34,21 +34,12 @@ csv["company_id"] = csv["company_id"].astype(str)
 # Find malformed IDs that are not 4-digit strings
 bad_ids = csv[~csv["company_id"].str.fullmatch(r"\d{4}")]
 
-# %%
-csv["company_id"].nunique()
-
 # %%
 df = csv
 
 # %%
 merged = df
 
-# %%
-len(merged.columns)
-
-# %%
-merged
-
 # %%
 bursa_registration = pd.read_csv(BASE_DIR / "matched_companies_from_ssm.csv",dtype={"company_id": str,"companyNo": str})
 bursa_registration["companyNo"] = (
@@ -57,7 +48,6 @@ bursa_registration["companyNo"] = (
     .str.replace(r"\.0$", "", regex=True)
     .str.strip()
 )
-bursa_registration.head()
 
 
 
@@ -68,10 +58,6 @@ company_id["company_id"] = company_id["company_id"].str.strip().str.zfill(4)
 
 # %%
 merge = pd.merge(bursa_registration,company_id,on="company_name",how="inner")
-merge
-
-# %%
-len(merge["company_id"].drop_duplicates())
 
 # %%
 merge_copy = merge.copy()
@@ -86,15 +72,6 @@ merge = merge.rename(columns={
 })
 # merge.to_csv("bursa_company_registra.csv", index=False)
 
-# %%
-merge
-
-# %%
-merged
-
-# %%
-merged["company_id"].nunique()
-
 # %%
 merge["company_id"] = merge["company_id"].str.strip()
 merged["company_id"] = merged["company_id"].str.strip()
@@ -104,29 +81,13 @@ merge["company_id"] = merge["company_id"].astype(str)
 merged["company_id"] = merged["company_id"].astype(str)
 final_merge = merge.merge(merged, on="company_id", how="inner")
 
-# %%
-final_merge['company_id'].nunique()
-
-# %%
-merge
-
-# %%
-(final_merge.isnull().mean() * 100).sort_values(ascending=False).to_frame("missing_%").style.background_gradient(cmap='Reds')
-
 # %%
 df=final_merge
 
-# %%
-df
-
 # %%
 # ── Your DataFrame ──
 df = df.copy()
 df.columns = df.columns.str.replace("-", " ").str.strip().str.strip().str.lower().str.replace(" ", "_").str.replace("-", "_")
-df
-
-# %%
-df.columns
 
 # %%
 import re
@@ -141,12 +102,6 @@ df.columns = (
     .str.replace(r"_+", "_", regex=True)       # Collapse multiple underscores to one
 )
 
-# %%
-df
-
-# %%
-df.columns.tolist()
-
 # %%
 # Check for duplicate column names
 duplicates = df.columns[df.columns.duplicated()]
@@ -165,17 +120,10 @@ summary_df = pd.DataFrame({
 
 # Save to CSV
 # summary_df.to_csv("/insider_null_ratio_summary.csv", index=False)
-summary_df.head()
-
-# %%
-len(df["registration_number"].drop_duplicates())
 
 # %%
 df = df.dropna(subset=["registration_number"])
 
-# %%
-df['registration_number'].nunique()
-
 # %%
 from sqlalchemy import create_engine
 import pandas as pd
@@ -206,7 +154,6 @@ df["old_registration_number"] = df["old_registration_number"].astype(str)
 df.to_sql("public_complete_ownership_type", engine, schema="public", index=False, if_exists="replace")
 
 print("✅ Uploaded to 'public_complete_ownership_type' with normalized column names.")
-print(df.head())
 print('Congrats it works')
 # %%
 
@@ -0,0 +1,123 @@
+from pathlib import Path
+import pandas as pd
+import sys
+
+REPLACE_MODE = "--replace" in sys.argv
+# Long statement files (STATEMENT_FORMAT=long|both) → one table for all three statements, annual
+# and quarterly, keyed on (registration_number, statement, period_type, fiscal_date, metric_code).
+# A company reporting a metric nobody else has is one more row, not a new column.
+TABLE_NAME = "public_statement_values"
+DICTIONARY_TABLE_NAME = "public_statement_metrics"
+KEY_COLUMNS = ["registration_number", "statement", "period_type", "fiscal_date", "metric_code"]
+SOURCES = {
+    ("income", "annual"): "complete_income_statements_long.csv",
+    ("balance", "annual"): "complete_balance_sheets_long.csv",
+    ("cashflow", "annual"): "complete_cash_flow_statements_long.csv",
+    ("income", "quarterly"): "complete_income_statements_quarterly_long.csv",
+    ("balance", "quarterly"): "complete_balance_sheets_quarterly_long.csv",
+    ("cashflow", "quarterly"): "complete_cash_flow_statements_quarterly_long.csv",
+}
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+frames = []
+for (statement, period_type), filename in SOURCES.items():
+    path = BASE_DIR / filename
+    if not path.exists():
+        continue
+    part = pd.read_csv(path, dtype={"company_id": str, "metric_code": str})
+    part.insert(1, "statement", statement)
+    part.insert(2, "period_type", period_type)
+    frames.append(part)
+
+if not frames:
+    print("⚠️ No long statement files found (run the statement scrapers with STATEMENT_FORMAT=long or both). Nothing to load.")
+    sys.exit(0)
+
+df = pd.concat(frames, ignore_index=True)
+df["company_id"] = df["company_id"].astype(str).str.strip().str.zfill(4)
+
+
+# ---------
+
+
+bursa_registration = pd.read_csv(BASE_DIR / "matched_companies_from_ssm.csv",dtype={"company_id": str,"companyNo": str})
+bursa_registration["companyNo"] = (
+    bursa_registration["companyNo"]
+    .astype(str)
+    .str.replace(r"\.0$", "", regex=True)
+    .str.strip()
+)
+
+# Matching company_ids of the public listed companies on bursa.
+company_id = pd.read_csv(BASE_DIR.parent.parent / "list_bursa_ids" / "bursa_company_list.csv",dtype={"company_id": str})
+company_id["company_id"] = company_id["company_id"].str.strip().str.zfill(4)
+
+merge = pd.merge(bursa_registration,company_id,on="company_name",how="inner")
+merge = merge.rename(columns={"companyNo": "registration_number"})
+merge["company_id"] = merge["company_id"].astype(str).str.strip()
+
+df = merge[["company_id", "registration_number"]].merge(df, on="company_id", how="inner")
+
+# Ensure registration_number is str
+df["registration_number"] = df["registration_number"].astype(str).str.strip()
+df = df[~df["registration_number"].isin([None, "", "nan", "NaN", "None"])]
+
+metrics = pd.read_csv(BASE_DIR / "statement_metric_dictionary.csv", dtype=str)
+
+
+
+# -- SQL APPEND
+
+from sqlalchemy import create_engine, inspect
+from dotenv import load_dotenv
+import os
+
+# ── Load environment variables ──
+load_dotenv()
+
+# ── Read DB credentials ──
+user = os.getenv("PG_USER")
+password = os.getenv("PG_PASSWORD")
+host = os.getenv("PG_HOST")
+port = os.getenv("PG_PORT")
+database = os.getenv("PG_DATABASE")
+
+# ── Create connection string ──
+connection_url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{database}"
+engine = create_engine(connection_url)
+
+from sqlalchemy import text
+
+# The metric dictionary is small and only ever grows; it is rewritten on every run
+metrics.to_sql(DICTIONARY_TABLE_NAME, engine, schema="public", index=False, if_exists="replace")
+print(f"📖 Wrote {len(metrics)} metrics to '{DICTIONARY_TABLE_NAME}'.")
+
+if REPLACE_MODE:
+    # REPLACE MODE: Replace whole table
+    print("🚨 Replacing entire table with new data...")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="replace")
+    print(f"✅ Replaced '{TABLE_NAME}'.")
+else:
+    # APPEND MODE: Only add new key tuples
+    existing_keys = set()
+    if inspect(engine).has_table(TABLE_NAME, schema="public"):
+        with engine.connect() as conn:
+            existing = conn.execute(text(f"""
+                SELECT {", ".join(KEY_COLUMNS)}
+                FROM public.{TABLE_NAME}
+            """)).fetchall()
+            existing_keys = set(tuple(str(v).strip() for v in r) for r in existing)
+
+    df["key"] = list(zip(*(df[col].astype(str).str.strip() for col in KEY_COLUMNS)))
+    df = df[~df["key"].isin(existing_keys)].drop(columns="key")
+
+    print(f"🆕 Appending {len(df)} new rows to DB...")
+    df.to_sql(TABLE_NAME, engine, schema="public", index=False, if_exists="append")
+    print(f"✅ Appended to '{TABLE_NAME}'.")
+
+
+    """_summary_
+    statement_long_injection.py -> appends
+    statement_long_injection.py --replace -> replaces
+    """
@@ -42,21 +42,12 @@ bad_ids = csv[~csv["company_id"].str.fullmatch(r"\d{4}")]
 print("Bad company_ids:")
 print(bad_ids["company_id"])
 
-# %%
-csv["company_id"].nunique()
-
 # %%
 df = csv
 
 # %%
 merged = df
 
-# %%
-len(merged.columns)
-
-# %%
-merged
-
 # %%
 bursa_registration = pd.read_csv(BASE_DIR / "matched_companies_from_ssm.csv",dtype={"company_id": str,"companyNo": str})
 bursa_registration["companyNo"] = (
@@ -65,7 +56,6 @@ bursa_registration["companyNo"] = (
     .str.replace(r"\.0$", "", regex=True)
     .str.strip()
 )
-bursa_registration.head()
 
 
 
@@ -76,10 +66,6 @@ company_id["company_id"] = company_id["company_id"].str.strip().str.zfill(4)
 
 # %%
 merge = pd.merge(bursa_registration,company_id,on="company_name",how="inner")
-merge
-
-# %%
-len(merge["company_id"].drop_duplicates())
 
 # %%
 merge_copy = merge.copy()
@@ -94,15 +80,6 @@ merge = merge.rename(columns={
 })
 # merge.to_csv("bursa_company_registra.csv", index=False)
 
-# %%
-merge
-
-# %%
-merged
-
-# %%
-merged["company_id"].nunique()
-
 # %%
 merge["company_id"] = merge["company_id"].str.strip()
 merged["company_id"] = merged["company_id"].str.strip()
@@ -112,29 +89,13 @@ merge["company_id"] = merge["company_id"].astype(str)
 merged["company_id"] = merged["company_id"].astype(str)
 final_merge = merge.merge(merged, on="company_id", how="inner")
 
-# %%
-final_merge['company_id'].nunique()
-
-# %%
-merge
-
-# %%
-(final_merge.isnull().mean() * 100).sort_values(ascending=False).to_frame("missing_%").style.background_gradient(cmap='Reds')
-
 # %%
 df=final_merge
 
-# %%
-df
-
 # %%
 # ── Your DataFrame ──
 df = df.copy()
 df.columns = df.columns.str.replace("-", " ").str.strip().str.strip().str.lower().str.replace(" ", "_").str.replace("-", "_")
-df
-
-# %%
-df.columns
 
 # %%
 import re
@@ -149,12 +110,6 @@ df.columns = (
     .str.replace(r"_+", "_", regex=True)       # Collapse multiple underscores to one
 )
 
-# %%
-df
-
-# %%
-df.columns.tolist()
-
 # %%
 # Check for duplicate column names
 duplicates = df.columns[df.columns.duplicated()]
@@ -173,17 +128,10 @@ summary_df = pd.DataFrame({
 
 # Save to CSV
 # summary_df.to_csv("/insider_null_ratio_summary.csv", index=False)
-summary_df.head()
-
-# %%
-len(df["registration_number"].drop_duplicates())
 
 # %%
 df = df.dropna(subset=["registration_number"])
 
-# %%
-df['registration_number'].nunique()
-
 # %%
 from sqlalchemy import create_engine
 import pandas as pd
@@ -214,7 +162,6 @@ df["old_registration_number"] = df["old_registration_number"].astype(str)
 df.to_sql("public_complete_top_10_investors", engine, schema="public", index=False, if_exists="replace")
 
 print("✅ Uploaded to 'public_complete_top_10_investors' with normalized column names.")
-print(df.head())
 print('Congrats it works')
 # %%
 
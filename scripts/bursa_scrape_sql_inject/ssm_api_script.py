@@ -1,7 +1,9 @@
 import pandas as pd
 import requests
+import sys
 import time
 from pathlib import Path
+from urllib.parse import urlparse
 from tqdm import tqdm
 
 # ─── PATH CONFIG ───
@@ -10,12 +12,28 @@ INPUT_CSV = BASE_DIR / 'list_bursa_ids' / 'bursa_company_list.csv'
 OUTPUT_CSV = BASE_DIR / 'bursa_scrape_sql_inject' / 'bursa_data' / 'matched_companies_from_ssm.csv'
 API_URL = "https://staging-ssm.onecredit.my/api/search"
 
+# Same retry/breaker policy as the scrapers
+sys.path.append(str(BASE_DIR / "scrapers_1000"))
+from retry_policy import HostUnavailable, breaker_for, retry_call
+from tracing import span
+from log_config import get_logger
+
+log = get_logger("ssm_api_script")
+SSM_BREAKER = breaker_for(urlparse(API_URL).hostname)
+
 # ─── SSM Query Function ───
 from rapidfuzz import fuzz
 
+@span("ssm.request")
+def fetch_candidates(name):
+    response = requests.get(API_URL, params={"query": name}, timeout=10)
+    if response.status_code >= 500 or response.status_code == 429:
+        raise HostUnavailable(f"HTTP {response.status_code} from SSM")
+    return response
+
 def query_company(name):
     try:
-        response = requests.get(API_URL, params={"query": name}, timeout=10)
+        response = retry_call(lambda: fetch_candidates(name), breaker=SSM_BREAKER, name=f"SSM '{name}'")
         if response.status_code == 200:
             data = response.json()
             if isinstance(data, list) and data:
@@ -39,7 +57,7 @@ def query_company(name):
                     }
 
     except Exception as e:
-        print(f"⚠️ Error for '{name}': {e}")
+        log.warning("⚠️ Error for '%s': %s", name, e)
 
     # Return empty result if no match
     return {
@@ -59,19 +77,20 @@ def main():
     if OUTPUT_CSV.exists():
         existing = pd.read_csv(OUTPUT_CSV)
         already_matched = set(existing["company_name"].dropna().unique())
-        print(f"🔁 Skipping {len(already_matched)} previously matched companies")
+        log.info("🔁 Skipping %s previously matched companies", len(already_matched))
     else:
         existing = pd.DataFrame()
         already_matched = set()
 
     # Only query new companies
     to_query = [name for name in company_names if name not in already_matched]
-    print(f"📦 Querying {len(to_query)} new companies...")
+    log.info("📦 Querying %s new companies...", len(to_query))
 
     new_results = []
     for name in tqdm(to_query, desc="🔍 Matching companies"):
         new_results.append(query_company(name))
         time.sleep(1.0)
+    log.info("%s", SSM_BREAKER.summary())
 
 
 # ### Manual Input of more companies - From CTOS -> need to put more big companies
@@ -102,7 +121,7 @@ def main():
     # Save final result
     OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
     final_df.to_csv(OUTPUT_CSV, index=False)
-    print(f"\n✅ Done. Total saved to {OUTPUT_CSV.name}: {len(final_df)} companies")
+    log.info("✅ Done. Total saved to %s: %s companies", OUTPUT_CSV.name, len(final_df))
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
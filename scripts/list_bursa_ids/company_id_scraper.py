@@ -1,9 +1,16 @@
 import asyncio
+import sys
 import pandas as pd
 from pathlib import Path
 from playwright.async_api import async_playwright
 import argparse # cli flag
 
+# Shared scraper helpers live next to the other Playwright scrapers
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scrapers_1000"))
+from request_router import policy_for
+from retry_policy import goto
+from waits import WAIT_STATS, row_signature, wait_for_rows_change
+
 # ── Paths ──
 BASE_DIR = Path(__file__).resolve().parent  # Set base directory to current script's folder
 OUTPUT_DIR = BASE_DIR  # Output will be saved in the same folder
@@ -20,9 +27,18 @@ MARKET_URLS = {
 MARKET_OUTPUTS = {fname: OUTPUT_DIR / fname for fname in MARKET_URLS.keys()}
 COMBINED_OUTPUT = OUTPUT_DIR / "bursa_company_list.csv"  # Final combined CSV
 
+# Reads every (name, href) pair of the DataTable in one evaluate call instead of
+# query_selector + inner_text + get_attribute per row
+TABLE_ANCHORS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map(row => {
+    const a = row.querySelector("td a");
+    return a ? { name: a.innerText, href: a.getAttribute("href") } : null;
+}).filter(Boolean)
+"""
+
 # ── Scrape Function ──
 async def scrape_market(page, url: str) -> list[dict]:
-    await page.goto(url)  # Navigate to Bursa market page
+    await goto(page, url, timeout=30000)  # Navigate to Bursa market page (retried, paused while the site is down)
 
     # Wait and get the embedded iframe containing the data table
     frame = None
@@ -39,40 +55,54 @@ async def scrape_market(page, url: str) -> list[dict]:
         raise Exception(f"❌ Could not find data iframe for {url}")
 
     # Select "All" entries from dropdown to load full table
+    row_selector = "table#DataTables_Table_0 tbody tr"
     await frame.wait_for_selector('select[name="DataTables_Table_0_length"]')
+    before = await row_signature(frame, row_selector)
     await frame.select_option('select[name="DataTables_Table_0_length"]', value='-1')
-    await frame.wait_for_timeout(2000)  # Wait for table to fully load
+    # Wait for the table to redraw with every row (times out harmlessly if the market fits on one page)
+    await wait_for_rows_change(frame, row_selector, before, timeout=15000, name="market_table")
 
     # Extract all company rows from the table
-    rows = await frame.query_selector_all("table#DataTables_Table_0 tbody tr")
-    print(f"🔍 Found {len(rows)} rows in {url}")
+    anchors = await frame.evaluate(TABLE_ANCHORS_JS, row_selector)
+    print(f"🔍 Found {len(anchors)} rows in {url}")
 
     data = []
-    for row in rows:
-        try:
-            anchor = await row.query_selector("td a")  # Get company link
-            name = await anchor.inner_text()  # Extract name
-            href = await anchor.get_attribute("href")  # Extract href
-
-            # Parse company_id from stock_code URL
-            if href and "stock_code=" in href:
-                company_id = href.split("stock_code=")[-1]
-                data.append({"company_name": name.strip(), "company_id": company_id.strip()})
-        except Exception as e:
-            print(f"⚠️ Row parsing failed: {e}")
-            continue
+    for anchor in anchors:
+        href = anchor["href"]
+        # Parse company_id from stock_code URL
+        if href and "stock_code=" in href:
+            company_id = href.split("stock_code=")[-1]
+            data.append({"company_name": anchor["name"].strip(), "company_id": company_id.strip()})
     return data
 
+# Fast mode: one page per market, all three loading at once
+async def scrape_markets_parallel(context) -> dict:
+    pages = [await context.new_page() for _ in MARKET_URLS]
+    results = await asyncio.gather(*(scrape_market(page, url) for page, url in zip(pages, MARKET_URLS.values())))
+    for page in pages:
+        await page.close()
+    return dict(zip(MARKET_URLS, results))
+
 # ── Main Async Entry ──
-async def main(update_mode=False, full_mode=False, dry_run=False):
+async def main(update_mode=False, full_mode=False, dry_run=False, fast=False):
     all_dataframes = []
 
     async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=False, slow_mo=200)  # Launch browser with slow motion for debug
-        page = await browser.new_page()
+        if fast:
+            browser = await pw.chromium.launch(headless=True)
+        else:
+            browser = await pw.chromium.launch(headless=False, slow_mo=200)  # Launch browser with slow motion for debug
+        context = await browser.new_context()
+        routing = policy_for("company_id_scraper")
+        await routing.install(context)  # Skip images, fonts, media and trackers
+
+        if fast:
+            market_data = await scrape_markets_parallel(context)
+        else:
+            page = await context.new_page()
+            market_data = {filename: await scrape_market(page, url) for filename, url in MARKET_URLS.items()}  # Scrape each market page
 
-        for filename, url in MARKET_URLS.items():
-            data = await scrape_market(page, url)  # Scrape each market page
+        for filename, data in market_data.items():
             df = pd.DataFrame(data).drop_duplicates(subset="company_id")  # Remove duplicates
             output_path = MARKET_OUTPUTS[filename]
             df.to_csv(output_path, index=False)  # Save per-market CSV
@@ -111,6 +141,8 @@ async def main(update_mode=False, full_mode=False, dry_run=False):
                 new_df.to_csv(COMBINED_OUTPUT, index=False)
             print(f"\n🧾 Combined and saved {len(new_df)} companies to {COMBINED_OUTPUT.name}")
 
+        print(routing.summary())
+        print(WAIT_STATS.summary())
         await browser.close()
 
 # ── Run ──
@@ -120,6 +152,7 @@ if __name__ == "__main__":
     # When passed (--update), it sets update_mode=True.
    
     parser.add_argument("--dry-run", action="store_true", help="Run without writing any files")
+    parser.add_argument("--fast", action="store_true", help="Headless, all three markets loaded in parallel")
     
     
     # add_mutually_exclusive_group prevents both of them being used at the same time
@@ -128,7 +161,7 @@ if __name__ == "__main__":
     mode_group.add_argument("--full", action="store_true", help="Overwrite everything (default if no flag is passed)")
     args = parser.parse_args()
 
-    asyncio.run(main(update_mode=args.update, full_mode=args.full, dry_run=args.dry_run))
+    asyncio.run(main(update_mode=args.update, full_mode=args.full, dry_run=args.dry_run, fast=args.fast))
 
 
     """
@@ -144,5 +177,6 @@ if __name__ == "__main__":
     python company_id_scraper.py --update --full    -> ❌ Invalid (argparse prevents it)
     python company_id_scraper.py --dry-run          -> Simulate full scrape, no files written
     python company_id_scraper.py --update --dry-run -> Simulate update mode, print what would be added, no writes
+    python company_id_scraper.py --fast             -> Headless, markets scraped in parallel (combine with any of the above)
 
     """
\ No newline at end of file
@@ -7,10 +7,24 @@ import warnings
 import pandas as pd
 warnings.filterwarnings("ignore")
 import sys
+import os
 # ─────────────────────────────────────────────
 # CONFIG
 # ─────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BASE_DIR / "scrapers_1000"))
+from rate_limiter import HostRateLimiter, ENV_RATE, ENV_BURST
+from concurrency import ENV_FLOOR, ENV_CEILING
+from work_queue import ENV_WORKERS
+from job_store import ENV_BACKEND as ENV_JOB_STORE, BACKENDS as JOB_STORE_BACKENDS
+from run_journal import ENV_RESUME
+from refresh_schedule import ENV_REFRESH
+from site_config import ENV_BASE_URL
+from retry_policy import BURSA_HOSTNAME, ENV_DEADLINE, ENV_ERROR_RATE, CircuitBreaker
+from tracing import child_env, span
+from browser_pool import ENV_MAX_RSS as ENV_BROWSER_MAX_RSS, ENV_MAX_PAGES as ENV_BROWSER_MAX_PAGES
+from log_config import ENV_LEVEL as ENV_LOG_LEVEL, ENV_FORMAT as ENV_LOG_FORMAT
+from long_format import ENV_FORMAT as ENV_STATEMENT_FORMAT, FORMATS as STATEMENT_FORMATS
 
 SCRIPT_STEPS = [
     ("company_id_scraper.py", BASE_DIR / "list_bursa_ids" / "company_id_scraper.py"),
@@ -21,17 +35,26 @@ SCRIPT_STEPS = [
 ]
 
 PARALLEL_SCRIPTS = [
+    # Income, balance sheet and cash flow in one page visit per company
+    ("statement_scraper.py", BASE_DIR / "scrapers_1000" / "statement_scraper.py"),
+    ("market_capscrape.py", BASE_DIR / "scrapers_1000" / "market_capscrape.py"),
+    ("profile_scraper.py", BASE_DIR / "scrapers_1000" / "profile_scraper.py"),
+]
+
+# Single-statement scrapers, still runnable on their own via --only
+STANDALONE_SCRIPTS = [
     ("balance_sheet.py", BASE_DIR / "scrapers_1000" / "balance_sheet.py"),
     ("cash_flow.py", BASE_DIR / "scrapers_1000" / "cash_flow.py"),
     ("income_statement.py", BASE_DIR / "scrapers_1000" / "income_statement.py"),
-    ("market_capscrape.py", BASE_DIR / "scrapers_1000" / "market_capscrape.py"),
-    ("profile_scraper.py", BASE_DIR / "scrapers_1000" / "profile_scraper.py"),
 ]
 
 COMBINE_TARGETS = {
     "balance_sheet_expanded": "complete_balance_sheets.csv",
     "cash_flow_expanded": "complete_cash_flow_statements.csv",
     "income_statement_expanded": "complete_income_statements.csv",
+    "balance_sheet_quarterly": "complete_balance_sheets_quarterly.csv",
+    "cash_flow_quarterly": "complete_cash_flow_statements_quarterly.csv",
+    "income_statement_quarterly": "complete_income_statements_quarterly.csv",
     "marketcap_volume": "market_info_sample.csv",
     "profile_details": {
         "profile": "combined_profile.csv",
@@ -47,8 +70,11 @@ COMBINE_TARGETS = {
 # ─────────────────────────────────────────────
 async def run_script(name, path):
     print(f"\U0001F680 Starting {name}")
-    process = await asyncio.create_subprocess_exec("python", str(path), stdout=None, stderr=None)
-    await process.wait()
+    # Each step's span is handed to the child (TRACEPARENT) so the scraper's spans nest under it
+    with span("orchestrator.step", step=name) as step:
+        process = await asyncio.create_subprocess_exec("python", str(path), stdout=None, stderr=None, env=child_env())
+        await process.wait()
+        step.set_attribute("exit_code", process.returncode)
     if process.returncode == 0:
         print(f"✅ {name} completed")
     else:
@@ -63,6 +89,7 @@ async def run_parallel_group():
 # ─────────────────────────────────────────────
 # MANUAL COMBINE FUNCTION
 # ─────────────────────────────────────────────
+@span("orchestrator.combine")
 def run_manual_combiner():
     print("\n🧩 Running manual CSV combine...")
 
@@ -114,17 +141,73 @@ def run_manual_combiner():
 # ─────────────────────────────────────────────
 # MAIN LOGIC
 # ─────────────────────────────────────────────
+@span("orchestrator.run")
 def main():
     parser = argparse.ArgumentParser(description="Run selected Bursa pipeline scripts.")
     parser.add_argument("--only", help="Run only a specific script by name (e.g., profile_scraper.py)")
     parser.add_argument("--replace", action="store_true", help="Replace data instead of appending")
+    parser.add_argument("--rps", type=float, help="Requests/second budget to bursamalaysia.com shared by all scrapers")
+    parser.add_argument("--burst", type=int, help="Burst size for the shared rate limiter")
+    parser.add_argument("--min-concurrency", type=int, help="Floor for each scraper's adaptive concurrency")
+    parser.add_argument("--max-concurrency", type=int, help="Ceiling for each scraper's adaptive concurrency")
+    parser.add_argument("--workers", type=int, help="Worker processes per scraper (statement, market cap, profile)")
+    parser.add_argument("--job-store", choices=JOB_STORE_BACKENDS, help="Track scrape jobs in a durable table (postgres lets several machines share a run)")
+    parser.add_argument("--breaker-error-rate", type=float, help="Share of failed requests to Bursa (over the last 2 min) that pauses every scraper")
+    parser.add_argument("--company-deadline", type=int, help="Seconds each company may spend on retries before it is given up")
+    parser.add_argument("--browser-max-rss", type=int, help="MB a pooled browser (with its renderers) may use before it is recycled")
+    parser.add_argument("--browser-max-pages", type=int, help="Companies a pooled browser serves before it is recycled")
+    parser.add_argument("--base-url", help="Send Bursa traffic here instead of the live site (e.g. the mock_site.py fixture server)")
+    parser.add_argument("--resume", action="store_true", help="Scrapers skip companies their run journal already settled (success or no data)")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Scraper log level; DEBUG adds per-company DataFrame previews")
+    parser.add_argument("--log-json", action="store_true", help="Scrapers log one JSON object per line (with company_id / section when known)")
+    parser.add_argument("--full-scan", action="store_true", help="Statement scraper checks every company for missing CSVs instead of following the fiscal-calendar refresh schedule")
+    parser.add_argument("--statement-format", choices=STATEMENT_FORMATS, help="Combined statement CSVs: wide (default), long rows of (company_id, fiscal_date, metric_code, value, yoy_pct), or both")
     args = parser.parse_args()
     REPLACE_MODE = args.replace
+    if args.resume and not args.full_scan:
+        # The incremental statement refresh already skips what was scraped (see statement_scraper.py)
+        parser.error("--resume needs --full-scan; the incremental statement refresh has nothing to resume")
+
+    # Child scrapers inherit these and share one token bucket file
+    if args.rps:
+        os.environ[ENV_RATE] = str(args.rps)
+    if args.burst:
+        os.environ[ENV_BURST] = str(args.burst)
+    if args.min_concurrency:
+        os.environ[ENV_FLOOR] = str(args.min_concurrency)
+    if args.max_concurrency:
+        os.environ[ENV_CEILING] = str(args.max_concurrency)
+    if args.workers:
+        os.environ[ENV_WORKERS] = str(args.workers)
+    if args.job_store:
+        os.environ[ENV_JOB_STORE] = args.job_store
+    if args.breaker_error_rate:
+        os.environ[ENV_ERROR_RATE] = str(args.breaker_error_rate)
+    if args.company_deadline:
+        os.environ[ENV_DEADLINE] = str(args.company_deadline)
+    if args.resume:
+        os.environ[ENV_RESUME] = "1"
+    if args.base_url:
+        os.environ[ENV_BASE_URL] = args.base_url
+    if args.browser_max_rss:
+        os.environ[ENV_BROWSER_MAX_RSS] = str(args.browser_max_rss)
+    if args.browser_max_pages:
+        os.environ[ENV_BROWSER_MAX_PAGES] = str(args.browser_max_pages)
+    if args.log_level:
+        os.environ[ENV_LOG_LEVEL] = args.log_level
+    if args.log_json:
+        os.environ[ENV_LOG_FORMAT] = "json"
+    if args.statement_format:
+        os.environ[ENV_STATEMENT_FORMAT] = args.statement_format
+    # Incremental by default: only companies with a new fiscal period due get their statements rescraped
+    os.environ[ENV_REFRESH] = "full" if args.full_scan else "incremental"
+    HostRateLimiter.from_env().reset()
+    CircuitBreaker.from_env(BURSA_HOSTNAME).reset()
 
     if args.only:
-        if args.only in [s[0] for s in PARALLEL_SCRIPTS]:
+        if args.only in [s[0] for s in PARALLEL_SCRIPTS + STANDALONE_SCRIPTS]:
             print(f"\n⚡ Running only {args.only} from parallel group...")
-            asyncio.run(run_script(args.only, dict(PARALLEL_SCRIPTS)[args.only]))
+            asyncio.run(run_script(args.only, dict(PARALLEL_SCRIPTS + STANDALONE_SCRIPTS)[args.only]))
         else:
             match = [s for s in SCRIPT_STEPS if s[0] == args.only]
             if match:
@@ -137,7 +220,8 @@ def main():
                     args_to_pass = ["python", str(path)]
                     if REPLACE_MODE:
                         args_to_pass.append("--replace")
-                    subprocess.run(args_to_pass, check=True)
+                    with span("orchestrator.step", step=name):
+                        subprocess.run(args_to_pass, check=True, env=child_env())
         return
 
     bar = tqdm(SCRIPT_STEPS, desc="🔁 Running Pipeline", unit="script", ncols=80)
@@ -152,8 +236,9 @@ def main():
             args_to_pass = ["python", str(path)]
             if REPLACE_MODE:
                 args_to_pass.append("--replace")
-            process = subprocess.Popen(args_to_pass)
-            process.communicate()
+            with span("orchestrator.step", step=name):
+                process = subprocess.Popen(args_to_pass, env=child_env())
+                process.communicate()
             if process.returncode != 0:
                 print(f"❌ Error in {name}")
             if process.returncode != 0:
@@ -161,8 +246,9 @@ def main():
 
         else:
             print(f"\n🚀 Running: {name}")
-            process = subprocess.Popen(["python", str(path)])
-            process.communicate()
+            with span("orchestrator.step", step=name):
+                process = subprocess.Popen(["python", str(path)], env=child_env())
+                process.communicate()
             if process.returncode != 0:
                 print(f"❌ Error in {name}")
 
@@ -183,9 +269,22 @@ if __name__ == "__main__":
     
     python orchestrator.py --only scraper_group_parallel
     python orchestrator.py --only profile_scraper.py
+    python orchestrator.py --only statement_scraper.py
+    python orchestrator.py --only income_statement.py   # single statement, separate page visit
     python3 orchestrator.py --only sql_master_run.py
     
     python orchestrator.py
     python orchestrator.py --replace
+    python orchestrator.py --rps 4           # let the scraper fleet make up to 4 requests/s to Bursa
+    python orchestrator.py --min-concurrency 2 --max-concurrency 10
+    python orchestrator.py --workers 4       # each parallel scraper shards its companies over 4 processes
+    python orchestrator.py --only scraper_group_parallel --job-store postgres   # run on every scrape node
+    python orchestrator.py --breaker-error-rate 0.3 --company-deadline 180
+    python orchestrator.py --full-scan       # statement scraper ignores the refresh schedule (python3 scrapers_1000/refresh_schedule.py shows it)
+    python orchestrator.py --only scraper_group_parallel --base-url http://127.0.0.1:8765   # against scrapers_1000/mock_site.py
+    python orchestrator.py --browser-max-rss 800 --browser-max-pages 30   # tighter memory envelope for long unattended runs
+    python orchestrator.py --statement-format both   # also write complete_*_long.csv (loaded by statement_long_injection.py)
+    python orchestrator.py --resume --full-scan   # pick up an interrupted run where the run journal left off
+    python3 scrapers_1000/tracing.py         # where the last run's time went (spans in scrapers_1000/outputs/traces.jsonl)
     python3 orchestrator.py --only sql_master_run.py --replace
     """
\ No newline at end of file
@@ -0,0 +1,366 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+import psutil
+from retry_policy import enforce_deadline
+from concurrency import exclude_from_latency
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("browser_pool")
+DEFAULT_POOL_SIZE = 3          # Long-lived Chromium processes kept warm
+DEFAULT_MAX_PAGES = 50         # Recycle a browser after it has served this many contexts
+DEFAULT_MAX_RSS_MB = 1200      # Drain and recycle a browser (all its processes) above this
+DEFAULT_KILL_RSS_MB = 2500     # Kill it outright above this; in-flight companies are requeued
+DEFAULT_WATCHDOG_SECONDS = 10
+CRASH_REQUEUES = 2             # Fresh browsers a company gets after the one it was on crashed
+
+ENV_MAX_PAGES = "BROWSER_MAX_PAGES"
+ENV_MAX_RSS = "BROWSER_MAX_RSS_MB"
+ENV_KILL_RSS = "BROWSER_KILL_RSS_MB"
+ENV_WATCHDOG = "BROWSER_WATCHDOG_SECONDS"
+
+# Every profile directory a pool launches a browser with is listed in <pid>.profiles here, so a
+# later run can remove the ones a crashed run left behind. Nothing outside those lists is swept.
+POOL_STATE_DIR = Path(tempfile.gettempdir()) / "bursa_browser_pool"
+PROFILE_MARKER = "Local State"  # Written by Chromium into every user data dir
+STALE_PROFILE_SECONDS = 600    # Never sweep anything younger; another run may be starting up
+
+
+# ─── PROCESS HELPERS ───
+def _is_chromium(proc) -> bool:
+    name = proc.name().lower()
+    return "chrom" in name or "headless_shell" in name
+
+# Browser (root) processes started by this Python process, via the Playwright driver
+def _browser_processes() -> dict:
+    found = {}
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            parent = proc.parent()
+            if _is_chromium(proc) and (parent is None or not _is_chromium(parent)):
+                found[proc.pid] = proc
+        except psutil.Error:
+            continue
+    return found
+
+# psutil.Process objects rather than bare pids, so a recycled pid is never mistaken for ours
+def _tree(root: psutil.Process) -> list:
+    return [root] + root.children(recursive=True)
+
+def _tree_rss(root: psutil.Process) -> Optional[int]:
+    try:
+        procs = _tree(root)
+    except psutil.Error:
+        return None
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+def _kill_tree(root: psutil.Process):
+    try:
+        procs = _tree(root)
+    except psutil.Error:
+        return
+    for proc in reversed(procs):
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    psutil.wait_procs(procs, timeout=5)
+
+def _user_data_dir(proc: psutil.Process) -> Optional[str]:
+    try:
+        for arg in proc.cmdline():
+            if arg.startswith("--user-data-dir="):
+                return arg.split("=", 1)[1]
+    except psutil.Error:
+        pass
+    return None
+
+def _profiles_in_use() -> set:
+    in_use = set()
+    for proc in psutil.process_iter(["cmdline"]):
+        for arg in proc.info.get("cmdline") or []:
+            if arg.startswith("--user-data-dir="):
+                in_use.add(os.path.realpath(arg.split("=", 1)[1]))
+    return in_use
+
+def _record_profile(profile_dir: str, state_dir: Path = POOL_STATE_DIR):
+    try:
+        state_dir.mkdir(parents=True, exist_ok=True)
+        with open(state_dir / f"{os.getpid()}.profiles", "a") as f:
+            f.write(f"{profile_dir}\n")
+    except OSError as e:
+        log.warning("⚠️ Could not record browser profile %s: %s", profile_dir, e)
+
+# Removes the profile directories recorded by pools that are no longer running, once no browser
+# uses them and they carry Chromium's marker file. Returns how many went.
+def sweep_temp_profiles(state_dir: Path = POOL_STATE_DIR) -> int:
+    if not state_dir.is_dir():
+        return 0
+    in_use = _profiles_in_use()
+    cutoff = time.time() - STALE_PROFILE_SECONDS
+    removed = 0
+    for manifest in state_dir.glob("*.profiles"):
+        if not manifest.stem.isdigit() or psutil.pid_exists(int(manifest.stem)):
+            continue  # That pool is still running (or the file isn't one of ours)
+        pending = []
+        for line in manifest.read_text().splitlines():
+            path = Path(line)
+            try:
+                if not line or not path.is_dir() or not (path / PROFILE_MARKER).exists():
+                    continue  # Already gone, or not a Chromium profile; drop it from the list
+                if os.path.realpath(path) in in_use or path.stat().st_mtime > cutoff:
+                    pending.append(line)
+                    continue
+            except OSError:
+                pending.append(line)
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        if pending:
+            manifest.write_text("".join(f"{line}\n" for line in pending))
+        else:
+            manifest.unlink(missing_ok=True)
+    return removed
+
+
+class BrowserCrashed(Exception):
+    pass
+
+
+# ─── POOL SLOT ───
+# One warm browser plus the bookkeeping needed to decide when to recycle it.
+class BrowserSlot:
+    def __init__(self, index: int):
+        self.index = index
+        self.browser = None
+        self.active = 0          # Contexts currently open on this browser
+        self.pages_served = 0    # Contexts handed out since the last (re)launch
+        self.launches = 0
+        self.process = None      # Browser root process (psutil), for the memory watchdog
+        self.profile_dir = None
+        self.rss = 0             # Last sampled RSS of the browser and all its children
+        self.draining = False    # Over the memory threshold: no new contexts, recycle when idle
+        self.closing = False
+        self.crashes = 0
+
+    def is_healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def sample_rss(self) -> Optional[int]:
+        if self.process is None:
+            return None
+        rss = _tree_rss(self.process)
+        self.rss = rss or 0
+        return rss
+
+
+# ─── BROWSER POOL ───
+# Keeps N browsers warm for the whole run and hands out fresh, isolated contexts.
+# Replaces the old "launch Chromium per company" pattern in every scraper.
+#
+#   async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}) as pool:
+#       results = await pool.run(lambda context: scrape(context, cid), user_agent=ua)
+#
+# A watchdog samples each browser's RSS (browser process plus renderers). Above max_rss_mb
+# the slot is drained and recycled once idle; above kill_rss_mb it is killed on the spot.
+# A browser that dies mid-company is relaunched and pool.run() starts that company over on a
+# fresh browser, so a long run stays within roughly size × max_rss_mb.
+class BrowserPool:
+    def __init__(self, pw, size: int = DEFAULT_POOL_SIZE, max_pages: Optional[int] = None,
+                 launch_kwargs: Optional[dict] = None, routing=None, max_rss_mb: Optional[float] = None,
+                 kill_rss_mb: Optional[float] = None, watchdog_seconds: Optional[float] = None):
+        self.pw = pw
+        self.size = max(1, size)
+        self.max_pages = max_pages or int(os.getenv(ENV_MAX_PAGES, DEFAULT_MAX_PAGES))
+        self.max_rss = (max_rss_mb or float(os.getenv(ENV_MAX_RSS, DEFAULT_MAX_RSS_MB))) * 2**20
+        self.kill_rss = (kill_rss_mb or float(os.getenv(ENV_KILL_RSS, DEFAULT_KILL_RSS_MB))) * 2**20
+        self.watchdog_seconds = watchdog_seconds or float(os.getenv(ENV_WATCHDOG, DEFAULT_WATCHDOG_SECONDS))
+        self.launch_kwargs = launch_kwargs or {"headless": True}
+        self.routing = routing   # Optional request_router.RoutingPolicy installed on every context
+        self.slots = [BrowserSlot(i) for i in range(self.size)]
+        self._lock = asyncio.Lock()
+        self._launch_lock = asyncio.Lock()
+        self._watchdog = None
+        self.recycles = {}       # reason → count
+        self.requeued = 0
+        self.peak_rss = 0
+        self.profiles_removed = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        self.profiles_removed += await asyncio.to_thread(sweep_temp_profiles)
+        await asyncio.gather(*(self._launch(slot) for slot in self.slots))
+        self._watchdog = asyncio.create_task(self._watch())
+        log.info("🌐 Browser pool ready with %s browser(s)", self.size)
+
+    async def close(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        for slot in self.slots:
+            await self._shutdown(slot)
+        log.info("%s", self.summary())
+
+    # Launches are serialised so the new browser process can be told apart from the others
+    async def _launch(self, slot: BrowserSlot):
+        async with self._launch_lock:
+            before = _browser_processes()
+            browser = await self.pw.chromium.launch(**self.launch_kwargs)
+            started = [proc for pid, proc in _browser_processes().items() if pid not in before]
+        slot.browser = browser
+        slot.process = started[0] if len(started) == 1 else None
+        slot.profile_dir = _user_data_dir(slot.process) if slot.process else None
+        if slot.profile_dir:
+            _record_profile(slot.profile_dir)
+        slot.pages_served = 0
+        slot.draining = slot.closing = False
+        slot.launches += 1
+        browser.on("disconnected", lambda _: self._on_disconnected(slot, browser))
+
+    def _on_disconnected(self, slot: BrowserSlot, browser):
+        if slot.browser is browser and not slot.closing:
+            slot.crashes += 1
+            log.error("💥 Browser slot %s crashed; relaunching on next use", slot.index)
+
+    async def _shutdown(self, slot: BrowserSlot):
+        if slot.browser is not None:
+            slot.closing = True
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+            slot.browser = None
+        # A crashed or killed browser leaves children and its profile directory behind
+        if slot.process is not None:
+            await asyncio.to_thread(_kill_tree, slot.process)
+            slot.process = None
+        if slot.profile_dir:
+            await asyncio.to_thread(shutil.rmtree, slot.profile_dir, True)
+            slot.profile_dir = None
+
+    async def _recycle(self, slot: BrowserSlot, reason: str):
+        log.info("♻️ Recycling browser slot %s (%s)", slot.index, reason)
+        kind = reason.split(" ")[0]
+        self.recycles[kind] = self.recycles.get(kind, 0) + 1
+        await self._shutdown(slot)
+        await self._launch(slot)
+
+    def _recycle_reason(self, slot: BrowserSlot) -> Optional[str]:
+        if slot.active:
+            return None
+        if not slot.is_healthy():
+            return "crashed"
+        if slot.draining:
+            return f"memory {slot.rss / 2**20:.0f} MB"
+        if slot.pages_served >= self.max_pages:
+            return f"served {slot.pages_served} pages"
+        return None
+
+    # Health check + recycling happen here, before a slot is handed out.
+    async def _acquire_slot(self) -> BrowserSlot:
+        async with self._lock:
+            slot = min(self.slots, key=lambda s: (s.draining, s.active, s.pages_served))
+            if not slot.is_healthy():
+                await self._recycle(slot, "crashed")
+            elif self._recycle_reason(slot):
+                await self._recycle(slot, self._recycle_reason(slot))
+            slot.active += 1
+            slot.pages_served += 1
+            return slot
+
+    async def _release_slot(self, slot: BrowserSlot):
+        async with self._lock:
+            slot.active -= 1
+            reason = self._recycle_reason(slot)
+            if reason:
+                await self._recycle(slot, reason)
+
+    # ─── WATCHDOG ───
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.watchdog_seconds)
+            for slot in self.slots:
+                rss = await asyncio.to_thread(slot.sample_rss)
+                if rss is None:
+                    continue
+                self.peak_rss = max(self.peak_rss, rss)
+                if rss > self.kill_rss:
+                    log.warning("🧨 Browser slot %s at %.0f MB; killing it", slot.index, rss / 2 ** 20)
+                    await asyncio.to_thread(_kill_tree, slot.process)
+                elif rss > self.max_rss and not slot.draining:
+                    log.info("🧠 Browser slot %s at %.0f MB; draining for recycle", slot.index, rss / 2 ** 20)
+                    slot.draining = True
+                    async with self._lock:
+                        reason = self._recycle_reason(slot)
+                        if reason:
+                            await self._recycle(slot, reason)
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        slot = await self._acquire_slot()
+        browser = slot.browser
+        context = None
+        try:
+            try:
+                context = await browser.new_context(**context_kwargs)
+                if self.routing is not None:
+                    await self.routing.install(context)
+                yield context
+            except Exception as e:
+                if not browser.is_connected():
+                    raise BrowserCrashed(f"browser slot {slot.index} crashed") from e
+                raise
+            # Scrape functions swallow their own errors, so a crash can look like "no data"
+            if not browser.is_connected():
+                raise BrowserCrashed(f"browser slot {slot.index} crashed")
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._release_slot(slot)
+
+    # Runs `work(context)` on a fresh context. If the browser underneath crashes, the company
+    # goes back in line for a relaunched browser, up to CRASH_REQUEUES times.
+    # The company deadline (retry_policy.company_deadline) caps the whole visit, requeues included
+    async def run(self, work, **context_kwargs):
+        async with enforce_deadline():
+            for attempt in range(CRASH_REQUEUES + 1):
+                try:
+                    async with self.context(**context_kwargs) as context:
+                        try:
+                            return await work(context)
+                        finally:
+                            if self.routing is not None:
+                                exclude_from_latency(self.routing.take_limiter_wait(context))
+                except BrowserCrashed as e:
+                    if attempt == CRASH_REQUEUES:
+                        raise
+                    self.requeued += 1
+                    log.info("🔁 %s; requeueing the company on a fresh browser", e)
+
+    def summary(self) -> str:
+        launches = sum(slot.launches for slot in self.slots)
+        crashes = sum(slot.crashes for slot in self.slots)
+        recycles = ", ".join(f"{k}: {v}" for k, v in sorted(self.recycles.items())) or "none"
+        return (f"🌐 Browser pool: {launches} launches, recycles ({recycles}), {crashes} crashes, "
+                f"{self.requeued} companies requeued, peak browser RSS {self.peak_rss / 2**20:.0f} MB, "
+                f"{self.profiles_removed} stale profile dirs removed")
@@ -1,11 +1,22 @@
 import asyncio
+import re
 from pathlib import Path
 import polars as pl
 from playwright.async_api import async_playwright
 from tqdm.asyncio import tqdm_asyncio
 from typing import Optional
+from request_router import policy_for
+from concurrency import AdaptiveConcurrency, exclude_from_latency
+from network_capture import ResponseCapture, find_record_list
+from site_config import rebase
+from retry_policy import BURSA_HOSTNAME, breaker_for, company_deadline, enforce_deadline, goto, retry_async
+from tracing import span
+from run_journal import journal_attempt, journal_error, journal_phase
+from waits import WAIT_STATS, row_signature, wait_for_network_idle, wait_for_rows_change, wait_for_visible
+from log_config import get_logger
 
 # ─── PATH CONFIG ─────────────────────────────
+log = get_logger("bursa_url_finder")
 BASE_DIR = Path(__file__).resolve().parent.parent
 INPUT_PATH = BASE_DIR / "list_bursa_ids" / "bursa_company_list.csv"
 OUTPUT_PATH = BASE_DIR / "csvs" / "cleaned" / "company_urls.csv"
@@ -17,124 +28,251 @@ for path in [SCREENSHOT_DIR, DEBUG_HTML_DIR, OUTPUT_PATH.parent, NO_FINANCIALS_P
     path.mkdir(parents=True, exist_ok=True)
 
 BURSA_URL = "https://my.bursamalaysia.com/market/assets/equities/stocks"
+BURSA_HOST = "https://my.bursamalaysia.com"   # Saved URLs always use the live host; goto() rebases them
+
+# ─── LISTING INDEX CONFIG ────────────────────
+# Stock codes are 4 digits plus an optional suffix (e.g. 0051, 5235SS)
+STOCK_CODE_RE = re.compile(r"^\d{4}[A-Z0-9]*$")
+# Candidate keys in the listing's JSON; the API is undocumented, so these are guesses
+# that must both be present on a record before it is trusted.
+CODE_KEYS = ("stock_code", "stockCode", "code", "short_code", "shortCode", "symbol")
+LINK_KEYS = ("url", "href", "link", "path")
+LISTING_ROW_SELECTOR = "#stocklistingRef a:has(span)"
+MAX_LISTING_PAGES = 500
+
+# Every anchor in the listing table → {span text that looks like a stock code: href}
+LISTING_ANCHORS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map(a => ({
+    href: a.getAttribute("href"),
+    spans: Array.from(a.querySelectorAll("span")).map(s => s.innerText.trim()),
+}))
+"""
 
 # ─── SEARCH FUNCTION ─────────────────────────
-async def run_search_and_navigate(page, search_term: str, retries: int = 3) -> Optional[str]:
-    for attempt in range(1, retries + 1):
-        try:
-            await page.goto(BURSA_URL, timeout=30000, wait_until="domcontentloaded")
-            await page.wait_for_timeout(3000 * attempt)
+# One search attempt. Raises on errors (after saving a screenshot and the HTML) and returns
+# None when the search ran but found nothing; scrape_single decides what to retry.
+@span("search.listing")
+async def run_search_and_navigate(page, search_term: str) -> Optional[str]:
+    try:
+        journal_phase("navigate")
+        await page.goto(rebase(BURSA_URL), timeout=30000, wait_until="domcontentloaded")
+        # Wait for the listing widget to render instead of a fixed sleep
+        await wait_for_visible(page, '#stocklistingRef i', timeout=20000, name="listing_ready")
 
-            await page.locator('#stocklistingRef i').click()
-            await page.get_by_text('Stock Name').click()
-            await page.get_by_text('Stock Name').click()
+        journal_phase("search")
+        await page.locator('#stocklistingRef i').click()
+        await page.get_by_text('Stock Name').click()
+        await page.get_by_text('Stock Name').click()
 
-            search_box = page.locator('#stocklistingRef').get_by_role('textbox', name='Search')
-            await search_box.click()
-            await search_box.fill(search_term)
-            await page.wait_for_timeout(1500)
+        search_box = page.locator('#stocklistingRef').get_by_role('textbox', name='Search')
+        await search_box.click()
+        await search_box.fill(search_term)
 
-            match = page.locator(f"a:has(span:text-is('{search_term}'))").first
-            if await match.count() == 0:
-                return None
+        # Results either arrive over the network or are filtered client-side; once things
+        # settle, give the anchor a short grace period before calling it "not found"
+        match_selector = f"a:has(span:text-is('{search_term}'))"
+        await wait_for_network_idle(page, timeout=5000, name="search_idle")
+        await wait_for_visible(page, match_selector, timeout=1500, name="search_result")
 
-            href = await match.get_attribute("href")
-            return f"https://my.bursamalaysia.com{href}" if href else None
+        journal_phase("extract")
+        match = page.locator(match_selector).first
+        if await match.count() == 0:
+            return None
 
-        except Exception as e:
-            print(f"⚠️ Error ({search_term}) attempt {attempt}: {e}")
-            await page.screenshot(path=SCREENSHOT_DIR / f"{search_term}_fail.png")
-            DEBUG_HTML_DIR.joinpath(f"{search_term}.html").write_text(await page.content())
-            await page.wait_for_timeout(3000 * attempt)
+        href = await match.get_attribute("href")
+        return f"{BURSA_HOST}{href}" if href else None
+
+    except Exception:
+        await page.screenshot(path=SCREENSHOT_DIR / f"{search_term}_fail.png")
+        DEBUG_HTML_DIR.joinpath(f"{search_term}.html").write_text(await page.content())
+        raise
+
+# ─── LISTING INDEX ───────────────────────────
+def _absolute(href: str) -> str:
+    return href if href.startswith("http") else f"{BURSA_HOST}{href}"
+
+def index_from_payloads(payloads: list) -> dict:
+    def is_listing(records):
+        return any(
+            any(k in r for k in CODE_KEYS) and any(k in r for k in LINK_KEYS)
+            for r in records[:5]
+        )
+
+    index = {}
+    for payload in payloads:
+        records = find_record_list(payload["data"], is_listing)
+        for record in records or []:
+            code = next((record[k] for k in CODE_KEYS if record.get(k)), None)
+            link = next((record[k] for k in LINK_KEYS if record.get(k)), None)
+            if isinstance(code, str) and isinstance(link, str) and STOCK_CODE_RE.match(code.strip()):
+                index[code.strip()] = _absolute(link)
+    return index
+
+async def index_from_table(page) -> dict:
+    index = {}
+    for _ in range(MAX_LISTING_PAGES):
+        for anchor in await page.evaluate(LISTING_ANCHORS_JS, LISTING_ROW_SELECTOR):
+            if not anchor["href"]:
+                continue
+            for text in anchor["spans"]:
+                if STOCK_CODE_RE.match(text):
+                    index[text] = _absolute(anchor["href"])
+
+        next_btn = page.locator("#stocklistingRef").get_by_role("button", name="Next")
+        if not await next_btn.count() or not await next_btn.first.is_enabled():
+            break
+        before = await row_signature(page, LISTING_ROW_SELECTOR)
+        await next_btn.first.click()
+        if not await wait_for_rows_change(page, LISTING_ROW_SELECTOR, before, timeout=5000, name="listing_next"):
+            break
+    return index
+
+# Loads the equities listing once and returns {stock code: URL} for every listed company.
+# The listing is paginated, so the table is paged through until it stops advancing; the JSON
+# each page fetched is merged on top (its links win where both have a code).
+async def build_listing_index(pw, routing=None) -> dict:
+    browser = await pw.chromium.launch(headless=True)
+    try:
+        context = await browser.new_context()
+        if routing is not None:
+            await routing.install(context)
+        page = await context.new_page()
+        capture = ResponseCapture(page)
 
-    print(f"❌ Failed after retries: {search_term}")
-    return None
+        await goto(page, BURSA_URL, timeout=30000, wait_until="domcontentloaded")
+        await wait_for_visible(page, LISTING_ROW_SELECTOR, timeout=30000, name="listing_ready")
+        await wait_for_network_idle(page, timeout=10000, name="listing_idle")
+
+        from_table = await index_from_table(page)
+        from_api = index_from_payloads(capture.payloads)
+        index = {**from_table, **from_api}
+        log.info("📇 Indexed %s stock URLs (%s from the listing API, %s from the listing table)",
+                 len(index), len(from_api), len(from_table))
+        return index
+    except Exception as e:
+        log.warning("⚠️ Could not build listing index, falling back to per-company search: %s", e)
+        return {}
+    finally:
+        await browser.close()
 
 # ─── SINGLE TASK ─────────────────────────────
-async def scrape_single(pw, cid: str, existing_map: dict, bad_ids: set, sem: asyncio.Semaphore, failed: list) -> dict:
+async def scrape_single(pw, cid: str, existing_map: dict, bad_ids: set, sem: AdaptiveConcurrency, failed: list, routing=None) -> dict:
     if cid in bad_ids:
-        print(f"🚫 Skipping {cid}, known to have no financials.")
+        log.info("🚫 Skipping %s, known to have no financials.", cid)
         return {"company_id": cid, "new_url": None}
 
     if cid in existing_map and existing_map[cid]:
-        print(f"⏭️ Skipping {cid}, already scraped.")
+        log.info("⏭️ Skipping %s, already scraped.", cid)
         return {"company_id": cid, "new_url": existing_map[cid]}
 
-    async with sem:
-        browser = await pw.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-
+    async with sem.slot():
         url = None
-        for _ in range(3):
-            url = await run_search_and_navigate(page, cid.zfill(4))
+        with journal_attempt("bursa_url_finder", cid) as attempt:
+            browser = await pw.chromium.launch(headless=True)
+            context = await browser.new_context()
+            if routing is not None:
+                await routing.install(context)
+            page = await context.new_page()
+
+            # One retry loop (jittered backoff, company deadline, fleet-wide breaker) instead of
+            # three searches that each retried three times. "Not found" is retried too, since the
+            # listing sometimes filters before its data has arrived.
+            try:
+                with company_deadline():
+                    async with enforce_deadline(f"search {cid}"):
+                        url = await retry_async(
+                            lambda: run_search_and_navigate(page, cid.zfill(4)),
+                            breaker=breaker_for(BURSA_HOSTNAME), retry_if=lambda found: found is None,
+                            name=f"search {cid}",
+                        )
+            except Exception as e:
+                journal_error(e)
+                log.warning("⚠️ Error (%s): %s", cid, e)
             if url:
-                print(f"✅ Success: {cid} → {url}")
-                break
-            await page.wait_for_timeout(1000)
+                attempt.rows = 1
+                log.info("✅ Success: %s → %s", cid, url)
+            else:
+                log.error("❌ Failed after retries: %s", cid)
 
-        await context.close()
-        await browser.close()
+            if routing is not None:
+                exclude_from_latency(routing.take_limiter_wait(context))
+            await context.close()
+            await browser.close()
 
         if not url:
             failed.append(cid)
         return {"company_id": cid, "new_url": url}
 
 # ─── MAIN ────────────────────────────────────
-async def main(retry_mode=False):
+async def main(retry_mode=False, use_index=True):
     if retry_mode and NO_FINANCIALS_PATH.exists():
         try:
             retry_df = pl.read_csv(NO_FINANCIALS_PATH, schema_overrides={"company_id": pl.Utf8})
             all_ids = [cid.strip().zfill(4) for cid in retry_df.get_column("company_id").unique().to_list()]
-            print(f"🔁 Retrying {len(all_ids)} previously failed companies.")
+            log.info("🔁 Retrying %s previously failed companies.", len(all_ids))
         except Exception as e:
-            print(f"⚠️ Failed to read no_financials.csv: {e}")
+            log.warning("⚠️ Failed to read no_financials.csv: %s", e)
             return
     else:
         try:
             df = pl.read_csv(INPUT_PATH, schema_overrides={"company_id": pl.Utf8})
             all_ids = [cid.strip().zfill(4) for cid in df.get_column("company_id").unique().to_list()]
         except Exception as e:
-            print(f"❌ Failed to read input: {e}")
+            log.error("❌ Failed to read input: %s", e)
             return
     existing_map = {}
     if OUTPUT_PATH.exists():
         try:
             old = pl.read_csv(OUTPUT_PATH, schema_overrides={"company_id": pl.Utf8, "new_url": pl.Utf8})
             existing_map = {r["company_id"]: r["new_url"] for r in old.to_dicts() if r["new_url"]}
-            print(f"🔁 Resuming with {len(existing_map)} already scraped.")
+            log.info("🔁 Resuming with %s already scraped.", len(existing_map))
         except Exception as e:
-            print(f"⚠️ Failed to read existing output: {e}")
+            log.warning("⚠️ Failed to read existing output: %s", e)
 
     bad_ids = set()
     if NO_FINANCIALS_PATH.exists():
         try:
             bad_df = pl.read_csv(NO_FINANCIALS_PATH, schema_overrides={"company_id": pl.Utf8})
             bad_ids = set(bad_df.get_column("company_id").to_list())
-            print(f"🚫 Loaded {len(bad_ids)} bad company_ids from {NO_FINANCIALS_PATH}")
+            log.info("🚫 Loaded %s bad company_ids from %s", len(bad_ids), NO_FINANCIALS_PATH)
         except Exception as e:
-            print(f"⚠️ Failed to read bad ids: {e}")
+            log.warning("⚠️ Failed to read bad ids: %s", e)
 
     remaining = [cid for cid in all_ids if (cid not in existing_map or not existing_map[cid]) and cid not in bad_ids]
     
     if not remaining:
-        print("✅ All company_ids have already been scraped or rejected. Nothing new to process.")
+        log.info("✅ All company_ids have already been scraped or rejected. Nothing new to process.")
         return
 
     results = list(existing_map.items()) if existing_map else []
 
-    sem = asyncio.Semaphore(3)
+    sem = AdaptiveConcurrency.from_env("bursa_url_finder")
     failed = []
 
     try:
         async with async_playwright() as pw:
-            tasks = [scrape_single(pw, cid, existing_map, bad_ids, sem, failed) for cid in remaining]
+            routing = policy_for("bursa_url_finder")
+
+            # One pass over the listing resolves almost everything; the UI search only runs for misses
+            index = await build_listing_index(pw, routing) if use_index else {}
+            misses = []
+            for cid in remaining:
+                if cid in index:
+                    results.append((cid, index[cid]))
+                else:
+                    misses.append(cid)
+            if index:
+                log.info("✅ Resolved %s from the index, %s left for search", len(remaining) - len(misses), len(misses))
+
+            tasks = [scrape_single(pw, cid, existing_map, bad_ids, sem, failed, routing) for cid in misses]
             for fut in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Scraping Bursa URLs"):
                 r = await fut
                 if r["new_url"]:
                     results.append((r["company_id"], r["new_url"]))
+            log.info("%s", routing.summary())
+            log.info("%s", WAIT_STATS.summary())
     except KeyboardInterrupt:
-        print("\n⏹️ Interrupted. Saving progress...")
+        log.info("⏹️ Interrupted. Saving progress...")
     finally:
         # Save successful results
         unique_results = {}
@@ -147,9 +285,9 @@ async def main(retry_mode=False):
                 "company_id": list(unique_results.keys()),
                 "new_url": list(unique_results.values())
             }).write_csv(OUTPUT_PATH)
-            print(f"\n✅ Saved {len(unique_results)} URLs to {OUTPUT_PATH}")
+            log.info("✅ Saved %s URLs to %s", len(unique_results), OUTPUT_PATH)
         else:
-            print("⚠️ No valid URLs to save.")
+            log.warning("⚠️ No valid URLs to save.")
 
         # ─── RETRY MODE: Update no_financials.csv Only If Added ───
         if retry_mode:
@@ -176,11 +314,11 @@ async def main(retry_mode=False):
 
             if new_failed:
                 pl.DataFrame({"company_id": new_failed}).write_csv(NO_FINANCIALS_PATH)
-                print(f"❌ Logged {len(new_failed)} companies with no financials to {NO_FINANCIALS_PATH}")
+                log.error("❌ Logged %s companies with no financials to %s", len(new_failed), NO_FINANCIALS_PATH)
             else:
                 if NO_FINANCIALS_PATH.exists():
                     NO_FINANCIALS_PATH.unlink()
-                print("✅ All previously failed companies have now succeeded. no_financials.csv removed.")
+                log.info("✅ All previously failed companies have now succeeded. no_financials.csv removed.")
 
 # ─── ENTRY ───────────────────────────────────
 import argparse
@@ -188,9 +326,10 @@ import argparse
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--retry", action="store_true", help="Retry previously failed company_ids only")
+    parser.add_argument("--no-index", action="store_true", help="Skip the listing index and search every company in the UI")
     args = parser.parse_args()
 
-    asyncio.run(main(retry_mode=args.retry))
+    asyncio.run(main(retry_mode=args.retry, use_index=not args.no_index))
     """
     This script:
 	•	Searches Bursa by company ID
@@ -201,4 +340,5 @@ if __name__ == "__main__":
  
     python bursa_url_finder.py           # normal mode
     python bursa_url_finder.py --retry   # retry mode (only from no_financials.csv)
+    python bursa_url_finder.py --no-index   # per-company UI search only (old behaviour)
     """
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("concurrency")
+DEFAULT_START = 3
+DEFAULT_FLOOR = 1
+DEFAULT_CEILING = 8
+WINDOW = 6                 # Completed companies per adjustment decision
+MAX_ERROR_RATE = 0.34      # More than ~2 in 6 failing → back off
+MAX_TIMEOUT_RATE = 0.17    # More than 1 in 6 timing out → back off
+LATENCY_FACTOR = 2.0       # Median latency this many times the best seen → back off
+
+ENV_START = "SCRAPER_CONCURRENCY"
+ENV_FLOOR = "SCRAPER_MIN_CONCURRENCY"
+ENV_CEILING = "SCRAPER_MAX_CONCURRENCY"
+
+# A company that loaded fine but has nothing to scrape says nothing about the server's health
+HEALTHY_OUTCOMES = ("ok", "empty")
+
+_current_slot = ContextVar("concurrency_slot", default=None)
+
+
+# One in-flight company. The wrapper marks it failed when the scrape raised or came back empty
+# after swallowing an error (run_journal.classify), or no_data() when the page loaded cleanly
+# without any rows; exceptions escaping the `async with` are classified automatically.
+class Slot:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.outcome = "ok"
+        self.excluded = 0.0      # Seconds spent queued on the host rate limiter, not on the site
+
+    def fail(self, kind: str = "error"):
+        self.outcome = kind
+
+    def no_data(self):
+        self.outcome = "empty"
+
+    def latency(self) -> float:
+        return max(0.0, time.monotonic() - self.started - self.excluded)
+
+# Takes time the current company spent waiting on our own rate limiter out of its latency sample,
+# so the limiter pacing requests doesn't read as the site slowing down (BrowserPool.run reports it)
+def exclude_from_latency(seconds: float):
+    slot = _current_slot.get()
+    if slot is not None:
+        slot.excluded += seconds
+
+
+# ─── AIMD CONTROLLER ───
+# Drop-in replacement for the old asyncio.Semaphore(3): the limit grows by one after every
+# healthy window of completions and halves when errors, timeouts or latency spike.
+#
+#   sem = AdaptiveConcurrency.from_env("statement_scraper")
+#   async with sem.slot() as slot:
+#       df = await scrape(...)
+#       if df.empty:
+#           slot.no_data()
+class AdaptiveConcurrency:
+    def __init__(self, name: str, start: int = DEFAULT_START, floor: int = DEFAULT_FLOOR,
+                 ceiling: int = DEFAULT_CEILING, window: int = WINDOW):
+        self.name = name
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = min(max(start, self.floor), self.ceiling)
+        self.window = window
+        self.active = 0
+        self.best_latency = None
+        self._results = []
+        self._cond = asyncio.Condition()
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdaptiveConcurrency":
+        return cls(
+            name,
+            start=int(os.getenv(ENV_START, DEFAULT_START)),
+            floor=int(os.getenv(ENV_FLOOR, DEFAULT_FLOOR)),
+            ceiling=int(os.getenv(ENV_CEILING, DEFAULT_CEILING)),
+        )
+
+    # Plain `async with sem:` still works for callers that don't report outcomes
+    async def __aenter__(self):
+        await self._acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._release()
+
+    async def _acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def _release(self):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self._acquire()
+        slot = Slot()
+        token = _current_slot.set(slot)
+        try:
+            yield slot
+        except Exception as e:
+            slot.fail("timeout" if "Timeout" in type(e).__name__ else "error")
+            raise
+        finally:
+            _current_slot.reset(token)
+            await self._record(slot.latency(), slot.outcome)
+            await self._release()
+
+    async def _record(self, latency: float, outcome: str):
+        async with self._cond:
+            self._results.append((latency, outcome))
+            if len(self._results) < self.window:
+                return
+            results, self._results = self._results, []
+
+            latencies = [lat for lat, _ in results]
+            median = statistics.median(latencies)
+            error_rate = sum(o not in HEALTHY_OUTCOMES for _, o in results) / len(results)
+            timeout_rate = sum(o == "timeout" for _, o in results) / len(results)
+            if self.best_latency is None or median < self.best_latency:
+                self.best_latency = median
+
+            old = self.limit
+            if timeout_rate > MAX_TIMEOUT_RATE or error_rate > MAX_ERROR_RATE:
+                self.limit = max(self.floor, self.limit // 2)
+                reason = f"errors {error_rate:.0%}, timeouts {timeout_rate:.0%}"
+            elif median > self.best_latency * LATENCY_FACTOR:
+                self.limit = max(self.floor, self.limit // 2)
+                reason = f"median latency {median:.1f}s vs best {self.best_latency:.1f}s"
+            else:
+                self.limit = min(self.ceiling, self.limit + 1)
+                reason = f"healthy window (median {median:.1f}s, errors {error_rate:.0%})"
+
+            if self.limit != old:
+                log.info("🎚️ [%s] concurrency %s → %s: %s", self.name, old, self.limit, reason)
+                self._cond.notify_all()
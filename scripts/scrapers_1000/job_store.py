@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+# ─── CONFIG ───
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_SQLITE_PATH = BASE_DIR / "outputs" / "jobs.sqlite"
+DEFAULT_LEASE_SECONDS = 600     # A claimed job returns to the queue if not finished in this time
+DEFAULT_MAX_ATTEMPTS = 3
+
+ENV_BACKEND = "JOB_STORE"                # "sqlite" or "postgres"; unset → scrapers use local CSV checks
+ENV_SQLITE_PATH = "JOB_STORE_SQLITE"
+ENV_LEASE = "JOB_LEASE_SECONDS"
+ENV_MAX_ATTEMPTS = "JOB_MAX_ATTEMPTS"
+BACKENDS = ("sqlite", "postgres")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_jobs (
+    company_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    url TEXT,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expiry DOUBLE PRECISION,
+    last_error TEXT,
+    updated_at DOUBLE PRECISION,
+    PRIMARY KEY (company_id, section)
+)
+"""
+
+
+def backend_from_env() -> Optional[str]:
+    return os.getenv(ENV_BACKEND) or None
+
+def connection_url(backend: str) -> str:
+    if backend == "postgres":
+        # Same credentials as the SQL injection scripts
+        user = os.getenv("PG_USER")
+        password = os.getenv("PG_PASSWORD")
+        host = os.getenv("PG_HOST")
+        port = os.getenv("PG_PORT")
+        database = os.getenv("PG_DATABASE")
+        return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{database}"
+    path = Path(os.getenv(ENV_SQLITE_PATH, DEFAULT_SQLITE_PATH))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return f"sqlite:///{path}"
+
+
+# ─── JOB STORE ───
+# Durable (company_id, section) job table shared by every scraper process on every host.
+# Done-ness lives here instead of in "a CSV exists in outputs/<section>/", so several
+# machines can split one scrape. Claims take a lease; a node that dies simply lets its
+# leases expire and the jobs go back to pending for someone else.
+#
+# PostgreSQL claims with FOR UPDATE SKIP LOCKED so concurrent workers never block on or
+# double-claim a row. SQLite (local runs) gets the same guarantee from its single writer.
+# Lease times are epoch seconds from the claiming host, so keep node clocks NTP-synced.
+class JobStore:
+    def __init__(self, backend: str = "sqlite", lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown job store backend '{backend}' (expected one of {BACKENDS})")
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._engine = None
+        self._pid = None
+
+    @classmethod
+    def from_env(cls, backend: Optional[str] = None) -> "JobStore":
+        return cls(
+            backend or backend_from_env() or "sqlite",
+            lease_seconds=int(os.getenv(ENV_LEASE, DEFAULT_LEASE_SECONDS)),
+            max_attempts=int(os.getenv(ENV_MAX_ATTEMPTS, DEFAULT_MAX_ATTEMPTS)),
+        )
+
+    # Engines aren't shared across processes; each worker builds its own on first use
+    @property
+    def engine(self):
+        if self._engine is None or self._pid != os.getpid():
+            # SQLite: wait on the writer lock instead of failing fast when workers claim at once
+            connect_args = {"timeout": 30} if self.backend == "sqlite" else {}
+            self._engine = create_engine(connection_url(self.backend), connect_args=connect_args)
+            self._pid = os.getpid()
+            with self._engine.begin() as conn:
+                conn.execute(text(SCHEMA))
+        return self._engine
+
+    def __getstate__(self):
+        return {**self.__dict__, "_engine": None, "_pid": None}
+
+    def enqueue(self, section: str, entries: list, done_ids=()) -> int:
+        now = time.time()
+        done_ids = set(done_ids)
+        rows = [{
+            "company_id": entry["company_id"],
+            "section": section,
+            "url": entry.get("new_url"),
+            "payload": json.dumps(entry),
+            # Work finished before the job table existed is recorded as done, not redone
+            "status": "done" if entry["company_id"] in done_ids else "pending",
+            "now": now,
+        } for entry in entries]
+        if not rows:
+            return 0
+        with self.engine.begin() as conn:
+            result = conn.execute(text("""
+                INSERT INTO scrape_jobs (company_id, section, url, payload, status, updated_at)
+                VALUES (:company_id, :section, :url, :payload, :status, :now)
+                ON CONFLICT (company_id, section) DO NOTHING
+            """), rows)
+        return result.rowcount
+
+    # Expired leases go back to pending (or to failed once attempts run out)
+    def requeue_expired(self, section: Optional[str] = None) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(text("""
+                UPDATE scrape_jobs
+                SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+                    last_error = COALESCE(last_error, 'lease expired'),
+                    lease_owner = NULL, lease_expiry = NULL, updated_at = :now
+                WHERE status = 'leased' AND lease_expiry < :now
+                  AND (:section IS NULL OR section = :section)
+            """), {"max_attempts": self.max_attempts, "now": time.time(), "section": section})
+        return result.rowcount
+
+    def claim(self, section: str, owner: str) -> Optional[dict]:
+        lock = "FOR UPDATE SKIP LOCKED" if self.backend == "postgres" else ""
+        now = time.time()
+        with self.engine.begin() as conn:
+            row = conn.execute(text(f"""
+                UPDATE scrape_jobs
+                SET status = 'leased', lease_owner = :owner, lease_expiry = :expiry,
+                    attempts = attempts + 1, updated_at = :now
+                WHERE (company_id, section) IN (
+                    SELECT company_id, section FROM scrape_jobs
+                    WHERE section = :section AND status = 'pending'
+                    ORDER BY attempts, company_id
+                    LIMIT 1
+                    {lock}
+                )
+                RETURNING company_id, url, payload, attempts
+            """), {"owner": owner, "expiry": now + self.lease_seconds, "now": now, "section": section}).fetchone()
+        if row is None:
+            return None
+        entry = json.loads(row.payload) if row.payload else {}
+        entry.update({"company_id": row.company_id, "new_url": row.url, "attempts": row.attempts})
+        return entry
+
+    def complete(self, section: str, company_id: str, owner: str):
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE scrape_jobs
+                SET status = 'done', lease_owner = NULL, lease_expiry = NULL, last_error = NULL, updated_at = :now
+                WHERE company_id = :company_id AND section = :section AND lease_owner = :owner
+            """), {"company_id": company_id, "section": section, "owner": owner, "now": time.time()})
+
+    def fail(self, section: str, company_id: str, owner: str, error: str):
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE scrape_jobs
+                SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expiry = NULL, last_error = :error, updated_at = :now
+                WHERE company_id = :company_id AND section = :section AND lease_owner = :owner
+            """), {"company_id": company_id, "section": section, "owner": owner,
+                   "error": (error or "")[:1000], "max_attempts": self.max_attempts, "now": time.time()})
+
+    # Puts finished jobs back to pending with a fresh payload (scheduled refreshes)
+    def reopen(self, section: str, entries: list) -> int:
+        rows = [{
+            "company_id": entry["company_id"],
+            "section": section,
+            "url": entry.get("new_url"),
+            "payload": json.dumps(entry),
+            "now": time.time(),
+        } for entry in entries]
+        if not rows:
+            return 0
+        with self.engine.begin() as conn:
+            result = conn.execute(text("""
+                UPDATE scrape_jobs
+                SET status = 'pending', attempts = 0, url = :url, payload = :payload, last_error = NULL, updated_at = :now
+                WHERE company_id = :company_id AND section = :section AND status IN ('done', 'failed')
+            """), rows)
+        return result.rowcount
+
+    def requeue_failed(self, section: Optional[str] = None) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(text("""
+                UPDATE scrape_jobs SET status = 'pending', attempts = 0, updated_at = :now
+                WHERE status = 'failed' AND (:section IS NULL OR section = :section)
+            """), {"now": time.time(), "section": section})
+        return result.rowcount
+
+    def counts(self, section: Optional[str] = None) -> dict:
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT status, COUNT(*) FROM scrape_jobs
+                WHERE (:section IS NULL OR section = :section)
+                GROUP BY status
+            """), {"section": section}).fetchall()
+        return {status: n for status, n in rows}
+
+    def queue(self, section: str) -> "JobQueue":
+        return JobQueue(self, section)
+
+
+# ─── QUEUE ADAPTER ───
+# Gives the job store the same claim/complete/counts interface as work_queue.WorkQueue, so
+# the scrapers' queue_worker + drain_queue run unchanged against either backend.
+class JobQueue:
+    def __init__(self, store: JobStore, section: str):
+        self.store = store
+        self.section = section
+
+    def owner(self, worker_id: int) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+
+    def claim(self, worker_id: int) -> Optional[dict]:
+        self.store.requeue_expired(self.section)
+        entry = self.store.claim(self.section, self.owner(worker_id))
+        if entry is not None:
+            entry["_owner"] = self.owner(worker_id)
+        return entry
+
+    def complete(self, entry: dict, status: str = "done", error: Optional[str] = None):
+        if status == "done":
+            self.store.complete(self.section, entry["company_id"], entry["_owner"])
+        else:
+            self.store.fail(self.section, entry["company_id"], entry["_owner"], error or status)
+
+    def counts(self) -> dict:
+        counts = self.store.counts(self.section)
+        counts["running"] = counts.pop("leased", 0)
+        return counts
+
+    def close(self):
+        if self.store._engine is not None and self.store._pid == os.getpid():
+            self.store._engine.dispose()
+        self.store._engine = None
+
+
+# ─── CLI ───
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or reset the scrape job table.")
+    parser.add_argument("command", choices=["status", "requeue-failed", "requeue-expired"])
+    parser.add_argument("--backend", choices=BACKENDS, help="Defaults to $JOB_STORE or sqlite")
+    parser.add_argument("--section", help="Limit to one section (statements, market, profile)")
+    args = parser.parse_args()
+
+    store = JobStore.from_env(args.backend)
+    if args.command == "requeue-failed":
+        print(f"🔁 Requeued {store.requeue_failed(args.section)} failed jobs")
+    elif args.command == "requeue-expired":
+        print(f"🔁 Requeued {store.requeue_expired(args.section)} expired leases")
+    print(f"📋 Jobs ({store.backend}{', ' + args.section if args.section else ''}): {store.counts(args.section)}")
+
+"""
+Usage:
+    python3 scrapers_1000/job_store.py status --section statements
+    python3 scrapers_1000/job_store.py requeue-failed --backend postgres
+    JOB_STORE=postgres python3 scrapers_1000/statement_scraper.py --workers 4   # on every node
+"""
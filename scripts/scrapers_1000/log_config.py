@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from tracing import current_span
+
+# ─── CONFIG ───
+ENV_LEVEL = "BURSA_LOG_LEVEL"        # DEBUG adds the per-company DataFrame previews
+ENV_FORMAT = "BURSA_LOG_FORMAT"      # "json" → one JSON object per line
+ENV_RATE = "BURSA_LOG_RATE"          # Same message (template) at most this often per window; 0 = no limit
+DEFAULT_LEVEL = "INFO"
+DEFAULT_RATE = 20
+RATE_WINDOW_SECONDS = 60
+ROOT_LOGGER = "bursa"
+
+# Copied onto every record from the span it was logged in (see tracing.py)
+CONTEXT_FIELDS = ("scraper", "company_id", "section", "attempt")
+
+
+# ─── FILTERS ───
+# Both run on the thread that logs (the listener has no span context) and cost a dict lookup.
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        active = current_span()
+        attributes = active.attributes if active is not None else {}
+        record.context = {k: attributes[k] for k in CONTEXT_FIELDS if k in attributes}
+        return True
+
+# Caps each message template (e.g. "Failed to scrape company_id %s — %s: %s") at `rate`
+# records per window, so one failure mode hitting every company can't flood the output. The
+# first record of the next window reports how many were dropped.
+class RateLimitFilter(logging.Filter):
+    def __init__(self, rate: int = DEFAULT_RATE, window: float = RATE_WINDOW_SECONDS):
+        super().__init__()
+        self.rate = rate
+        self.window = window
+        self._counts = {}   # (logger, level, template) → [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._counts.get(key)
+            if window is None or now - window[0] >= self.window:
+                suppressed = window[2] if window else 0
+                self._counts[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+# ─── FORMATTERS ───
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "suppressed", 0):
+            text += f" (+{record.suppressed} similar suppressed)"
+        return text
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            **getattr(record, "context", {}),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# ─── SETUP ───
+# QueueHandler.prepare() runs the whole formatter on the calling thread. Here only the %s
+# arguments and any traceback are rendered, so the queued record holds no live objects;
+# timestamps, JSON and the stream write happen on the listener.
+class QueuedHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.msg += "\n" + logging.Formatter().formatException(record.exc_info)
+            record.exc_info = record.exc_text = None
+        return record
+
+# Loggers only put records on a queue; a listener thread formats them and writes stdout, so
+# a slow terminal or pipe never stalls the event loop.
+_state = {"handler": None, "listener": None}
+_setup_lock = threading.Lock()
+
+def _start_listener(handler: logging.handlers.QueueHandler):
+    stream = logging.StreamHandler(sys.stdout)
+    if os.getenv(ENV_FORMAT, "text").lower() == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(TextFormatter("%(message)s"))
+    handler.queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(handler.queue, stream)
+    listener.start()
+    _state["listener"] = listener
+
+# A forked worker (work_queue.run_sharded) inherits the handler but not the listener thread
+def _restart_in_child():
+    if _state["handler"] is not None:
+        _start_listener(_state["handler"])
+
+# Writes out whatever is still queued. Runs at exit; forked workers, which skip atexit,
+# call it themselves (work_queue._worker_entry).
+def flush_logs():
+    if _state["listener"] is not None:
+        _state["listener"].stop()
+        _state["listener"] = None
+
+def configure():
+    with _setup_lock:
+        if _state["handler"] is not None:
+            return
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(os.getenv(ENV_LEVEL, DEFAULT_LEVEL).upper())
+        root.propagate = False
+        handler = QueuedHandler(queue.SimpleQueue())
+        handler.addFilter(ContextFilter())
+        handler.addFilter(RateLimitFilter(int(os.getenv(ENV_RATE, DEFAULT_RATE))))
+        root.addHandler(handler)
+        _state["handler"] = handler
+        _start_listener(handler)
+        atexit.register(flush_logs)
+        os.register_at_fork(after_in_child=_restart_in_child)
+
+# Module loggers hang off one "bursa" logger:
+#
+#   log = get_logger("statement_scraper")
+#   log.warning("⚠️ Failed to scrape company_id %s — %s: %s", cid, url, e)
+#
+# Keep the %s arguments out of the message: the template is what rate limiting counts.
+def get_logger(name: str) -> logging.Logger:
+    configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+# Building a preview means a to_string() per company; skipped entirely below DEBUG
+def log_preview(log: logging.Logger, df, title: str, *args):
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(title + "\n%s", *args, df.head(5).to_string())
@@ -0,0 +1,147 @@
+import os
+import re
+from pathlib import Path
+import pandas as pd
+from numeric_parsing import NON_METRIC_COLUMNS, to_float_frame
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("long_format")
+BASE_DIR = Path(__file__).resolve().parent
+COMBINED_DIR = BASE_DIR.parent / "bursa_scrape_sql_inject" / "bursa_data"
+METRIC_DICTIONARY_PATH = COMBINED_DIR / "statement_metric_dictionary.csv"
+
+# Which combined statement files the merge step writes:
+#   wide → complete_*.csv as before (one "<date> Value" / "<date> YoY %" row per label)
+#   long → complete_*_long.csv (one row per company, fiscal date and metric)
+#   both → both
+ENV_FORMAT = "STATEMENT_FORMAT"
+WIDE, LONG, BOTH = "wide", "long", "both"
+FORMATS = (WIDE, LONG, BOTH)
+
+LONG_COLUMNS = ["company_id", "fiscal_date", "metric_code", "value", "yoy_pct"]
+DICTIONARY_COLUMNS = ["statement", "metric_code", "metric_label"]
+DATE_PATTERN = r"(\d{1,2} \w{3} \d{4})"
+
+
+def output_formats() -> set:
+    fmt = os.getenv(ENV_FORMAT, WIDE).lower()
+    if fmt not in FORMATS:
+        log.warning("⚠️ Unknown %s=%s, writing wide statements", ENV_FORMAT, fmt)
+        fmt = WIDE
+    return {WIDE, LONG} if fmt == BOTH else {fmt}
+
+# complete_income_statements.csv → complete_income_statements_long.csv
+def long_path(combined_path: Path) -> Path:
+    return combined_path.with_name(f"{combined_path.stem}_long{combined_path.suffix}")
+
+# Same normalisation the SQL scripts apply to the wide column names, so a metric_code matches
+# the column it used to be: "Net Income - Starting Line" → net_income_starting_line
+def metric_code(label: str) -> str:
+    code = label.replace("-", " ").replace("/", " ").strip().lower()
+    code = re.sub(r"[^\w\s]", "", code)
+    code = re.sub(r"\s+", "_", code)
+    return re.sub(r"_+", "_", code)
+
+
+# ─── METRIC DICTIONARY ───
+# statement → {metric label → metric_code}, kept in statement_metric_dictionary.csv. A label
+# keeps its code for good; a new label whose code is already taken by another label of the
+# same statement gets a numbered one (…_2). Quarterly files share their statement's codes.
+class MetricDictionary:
+    def __init__(self, path: Path = METRIC_DICTIONARY_PATH):
+        self.path = path
+        self.codes = {}
+        self.added = 0
+        if path.exists():
+            for row in pd.read_csv(path, dtype=str).itertuples(index=False):
+                self.codes.setdefault(row.statement, {})[row.metric_label] = row.metric_code
+
+    def code(self, statement: str, label: str) -> str:
+        codes = self.codes.setdefault(statement, {})
+        if label not in codes:
+            base = code = metric_code(label)
+            taken = set(codes.values())
+            n = 2
+            while code in taken:
+                code, n = f"{base}_{n}", n + 1
+            codes[label] = code
+            self.added += 1
+        return codes[label]
+
+    def save(self):
+        rows = [(statement, code, label)
+                for statement, codes in sorted(self.codes.items())
+                for label, code in sorted(codes.items(), key=lambda item: item[1])]
+        pd.DataFrame(rows, columns=DICTIONARY_COLUMNS).to_csv(self.path, index=False)
+        if self.added:
+            log.info("📖 Added %s metrics to %s", self.added, self.path)
+        self.added = 0
+
+
+# ─── WIDE → LONG ───
+# One wide statement frame (as build_wide_frame writes it) → one row per (company, fiscal date,
+# metric) carrying both the value and its YoY %, so the Value/YoY rows are paired here once
+# instead of in every SQL script. Metrics with neither figure for a date are dropped.
+def to_long_frame(df: pd.DataFrame, statement: str, dictionary: MetricDictionary) -> pd.DataFrame:
+    metrics = [c for c in df.columns if c not in NON_METRIC_COLUMNS]
+    if df.empty or not metrics:
+        return pd.DataFrame(columns=LONG_COLUMNS)
+
+    # Codes are handed out in column (page) order, so which of two colliding labels gets the
+    # plain code doesn't depend on which dates happen to carry figures
+    codes = {label: dictionary.code(statement, label) for label in metrics}
+    df = to_float_frame(df, metrics)  # Per-company CSVs from before typed parsing hold text
+    labels = df["Year/Type"].astype(str)
+    df = df.assign(
+        fiscal_date=labels.str.extract(DATE_PATTERN, expand=False),
+        kind=labels.str.contains("YoY", regex=False).map({True: "yoy_pct", False: "value"}),
+    )
+    melted = df.melt(id_vars=["company_id", "fiscal_date", "kind"], value_vars=metrics,
+                     var_name="metric_label", value_name="figure").dropna(subset=["fiscal_date", "figure"])
+    if melted.empty:
+        return pd.DataFrame(columns=LONG_COLUMNS)
+
+    tidy = (
+        melted.pivot_table(index=["company_id", "fiscal_date", "metric_label"], columns="kind",
+                           values="figure", aggfunc="first")
+        .reindex(columns=["value", "yoy_pct"])
+        .reset_index()
+    )
+    tidy["metric_code"] = tidy["metric_label"].map(codes)
+    return tidy[LONG_COLUMNS]
+
+# Per-company wide CSVs → one long CSV. `statement` names the dictionary the codes come from
+# (income / balance / cashflow).
+def write_long_statements(statement: str, csv_paths: list, out_path: Path, dictionary: MetricDictionary):
+    frames = [to_long_frame(pd.read_csv(f, dtype={"company_id": str}), statement, dictionary) for f in csv_paths]
+    frames = [df for df in frames if not df.empty]
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=LONG_COLUMNS)
+    combined.to_csv(out_path, index=False)
+    log.info("✅ Wrote %s long rows from %s files into %s", len(combined), len(csv_paths), out_path)
+
+
+# ─── MERGE ───
+# Per-company CSVs → the combined files, for every scraper that writes statements. `targets`
+# are (outputs_dir, combined_path, statement) triples; `statement` picks the metric dictionary
+# (income / balance / cashflow), which the quarterly folders share with the annual ones.
+def merge_statement_csvs(targets):
+    formats = output_formats()
+    dictionary = MetricDictionary() if LONG in formats else None
+    for outputs_dir, combined_path, statement in targets:
+        csvs_to_merge = [f for f in outputs_dir.glob("*.csv") if f.name != combined_path.name]
+        if not csvs_to_merge:
+            log.warning("⚠️ No CSVs found in %s. Nothing to combine.", outputs_dir)
+            continue
+        log.info("📦 Merging %s CSVs from %s", len(csvs_to_merge), outputs_dir)
+        if WIDE in formats:
+            combined_df = pd.concat(
+                (pd.read_csv(f, dtype={"company_id": str}) for f in csvs_to_merge),
+                ignore_index=True
+            )
+            combined_df.to_csv(combined_path, index=False)
+            log.info("✅ Combined %s files into %s", len(csvs_to_merge), combined_path)
+        if dictionary is not None:
+            write_long_statements(statement, csvs_to_merge, long_path(combined_path), dictionary)
+    if dictionary is not None:
+        dictionary.save()
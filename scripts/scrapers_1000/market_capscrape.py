@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import os
 import random
@@ -5,14 +6,27 @@ from pathlib import Path
 import pandas as pd
 from tqdm.asyncio import tqdm_asyncio
 from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from request_router import policy_for
+from concurrency import AdaptiveConcurrency
+from snapshot_archive import snapshot_page
+from work_queue import default_workers, drain_queue, run_sharded
+from job_store import BACKENDS, JobStore, backend_from_env
+from retry_policy import company_deadline, goto
+from tracing import span
+from numeric_parsing import to_float_frame
+from run_journal import add_journal_args, classify, journal_attempt, journal_error, journal_phase, rerun_for_job_store, select_for_rerun
 from datetime import datetime
+from log_config import get_logger
 
 # ─── CONFIG ───
+log = get_logger("market_capscrape")
 BASE_DIR = Path(__file__).resolve().parent
 OUTPUTS_DIR = BASE_DIR / "outputs" / "marketcap_volume"
 OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
 CSV_PATH = BASE_DIR.parent / "csvs" / "cleaned" / "company_urls.csv"
 COMBINED_OUTPUT_PATH = BASE_DIR.parent / "bursa_scrape_sql_inject" / "bursa_data" / "market_info_sample.csv"
+NUMERIC_COLUMNS = ["market_cap_mil", "volume"]   # Written as float64, e.g. "1,234.56" → 1234.56
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64)...",
@@ -23,24 +37,32 @@ USER_AGENTS = [
 # ─── SCRAPE FUNCTION ───
 async def scrape_market_info(page, company_id: str, url: str):
     try:
-        await page.goto(url, timeout=60000)
+        journal_phase("navigate")
+        await goto(page, url)
 
         market_cap, volume = None, None
+        journal_phase("market_cap")
 
         try:
-            market_cap_locator = page.locator("div.sdt-stockinfo-label", has_text="Market Cap (Mil)").locator("xpath=../div[@class='sdt-stockinfo-text']")
-            await market_cap_locator.wait_for(timeout=10000)
-            market_cap = await market_cap_locator.inner_text()
+            with span("extract.market_cap"):
+                market_cap_locator = page.locator("div.sdt-stockinfo-label", has_text="Market Cap (Mil)").locator("xpath=../div[@class='sdt-stockinfo-text']")
+                await market_cap_locator.wait_for(timeout=10000)
+                market_cap = await market_cap_locator.inner_text()
         except Exception as e:
-            print(f"⚠️ Market Cap not found for {company_id}: {e}")
+            journal_error(e)
+            log.warning("⚠️ Market Cap not found for %s: %s", company_id, e)
 
+        journal_phase("volume")
         try:
-            await page.wait_for_selector("div.sdt-stockinfo.value div.sdt-stockinfo-text", timeout=5000)
-            volume = await page.locator("div.sdt-stockinfo.value div.sdt-stockinfo-text").inner_text()
-        except:
-            print(f"⚠️ Volume not found for {company_id}")
+            with span("extract.volume"):
+                await page.wait_for_selector("div.sdt-stockinfo.value div.sdt-stockinfo-text", timeout=5000)
+                volume = await page.locator("div.sdt-stockinfo.value div.sdt-stockinfo-text").inner_text()
+        except Exception as e:
+            journal_error(e)
+            log.warning("⚠️ Volume not found for %s", company_id)
 
-        print(f"✅ {company_id.zfill(4)} → Market Cap: {market_cap}, Volume: {volume}")
+        await snapshot_page(page, company_id, "market", url)
+        log.info("✅ %s → Market Cap: %s, Volume: %s", company_id.zfill(4), market_cap, volume)
 
         return {
             "company_id": company_id.zfill(4),
@@ -50,7 +72,8 @@ async def scrape_market_info(page, company_id: str, url: str):
         }
 
     except Exception as e:
-        print(f"❌ Failed for {company_id.zfill(4)}: {e}")
+        journal_error(e)
+        log.error("❌ Failed for %s: %s", company_id.zfill(4), e)
         return {
             "company_id": company_id.zfill(4),
             "market_cap_mil": None,
@@ -59,50 +82,104 @@ async def scrape_market_info(page, company_id: str, url: str):
         }
 
 # ─── TASK WRAPPER ───
-async def scrape_wrapper(pw, sem, entry):
+async def scrape_wrapper(pool, sem, entry):
     cid, url = entry["company_id"], entry["new_url"]
     random_user_agent = random.choice(USER_AGENTS)
 
-    async with sem:
-        browser = await pw.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=random_user_agent)
-        page = await context.new_page()
-
-        # inside scrape_wrapper
-        try:
-            result = await scrape_market_info(page, cid, url)
+    async with sem.slot() as slot:
+        with journal_attempt("market_capscrape", cid) as attempt, company_deadline():
+            async def visit(context):
+                page = await context.new_page()
+                return await scrape_market_info(page, cid, url)
+
+            result = await pool.run(visit, user_agent=random_user_agent)
+            attempt.rows = int(bool(result["market_cap_mil"] or result["volume"]))
+            if not attempt.rows:
+                if attempt.error is not None:
+                    slot.fail(classify(attempt.error))  # A timeout/selector failure the scrape swallowed
+                else:
+                    slot.no_data()
             # Save per company_id
-            pd.DataFrame([result]).to_csv(OUTPUTS_DIR / f"{cid}.csv", index=False)
-        finally:
-            await context.close()
-            await browser.close()
+            journal_phase("serialize")
+            with span("serialize.csv", section="market"):
+                to_float_frame(pd.DataFrame([result]), NUMERIC_COLUMNS).to_csv(OUTPUTS_DIR / f"{cid}.csv", index=False)
         return result
 
+# ─── QUEUE WORKER ───
+async def scrape_outcome(pool, sem, entry):
+    result = await scrape_wrapper(pool, sem, entry)
+    return "ok" if result["market_cap_mil"] or result["volume"] else "empty"
+
+# Body of one --workers process: own Playwright and browser pool, pulling from the shared queue
+async def queue_worker(queue, worker_id: int):
+    sem = AdaptiveConcurrency.from_env(f"market_capscrape-{worker_id}")
+    async with async_playwright() as pw:
+        routing = policy_for("market_capscrape")
+        async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}, routing=routing) as pool:
+            await drain_queue(queue, worker_id, lambda entry: scrape_outcome(pool, sem, entry), lambda: sem.limit)
+        log.info("%s", routing.summary())
+
 # ─── MAIN FUNCTION ───
-async def main():
+async def main(workers=1, job_store=None, rerun=None):
     df_urls = pd.read_csv(CSV_PATH, dtype=str).dropna(subset=["company_id", "new_url"])
     seen_ids = {f.stem for f in OUTPUTS_DIR.glob("*.csv")}
-    companies = df_urls[~df_urls["company_id"].isin(seen_ids)].to_dict("records")
-
-    sem = asyncio.Semaphore(3)
+    pending = companies = df_urls[~df_urls["company_id"].isin(seen_ids)].to_dict("records")
+    # Empty results are saved too, so --only-failed looks past the CSV check
+    companies = select_for_rerun("market_capscrape", rerun, companies, df_urls.to_dict("records"))
+
+    if job_store:
+        store = JobStore.from_env(job_store)
+        job_entries, done_ids, rerun_entries = rerun_for_job_store(rerun, df_urls.to_dict("records"), pending, companies, seen_ids)
+        log.info("📋 Enqueued %s new market jobs", store.enqueue('market', job_entries, done_ids))
+        if rerun_entries:
+            log.info("🔁 Reopened %s failed market jobs", store.reopen('market', rerun_entries))
+        run_sharded("market_capscrape", None, queue_worker, workers, desc="Scraping Market Info",
+                    queue=store.queue("market"))
+        combine_market_outputs()
+        return
+
+    if workers > 1:
+        run_sharded("market_capscrape", companies, queue_worker, workers, desc="Scraping Market Info")
+        combine_market_outputs()
+        return
+
+    sem = AdaptiveConcurrency.from_env("market_capscrape")
     results, bad_ids = [], []
 
     async with async_playwright() as pw:
-        tasks = [scrape_wrapper(pw, sem, entry) for entry in companies]
-        for future in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Scraping Market Info"):
-            result = await future
-            results.append(result)
-            if not result["market_cap_mil"] and not result["volume"]:
-                bad_ids.append(result["company_id"])
-
-        # Always combine all CSVs from the output folder
+        routing = policy_for("market_capscrape")
+        async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}, routing=routing) as pool:
+            tasks = [scrape_wrapper(pool, sem, entry) for entry in companies]
+            for future in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Scraping Market Info"):
+                result = await future
+                results.append(result)
+                if not result["market_cap_mil"] and not result["volume"]:
+                    bad_ids.append(result["company_id"])
+        log.info("%s", routing.summary())
+
+    combine_market_outputs()
+
+# Always combine all CSVs from the output folder
+def combine_market_outputs():
     all_csvs = list(OUTPUTS_DIR.glob("*.csv"))
     if all_csvs:
         combined_df = pd.concat([pd.read_csv(f) for f in all_csvs], ignore_index=True)
         combined_df.to_csv(COMBINED_OUTPUT_PATH, index=False)
-        print(f"\n✅ Combined CSV updated at {COMBINED_OUTPUT_PATH} with {len(combined_df)} rows.")
+        log.info("✅ Combined CSV updated at %s with %s rows.", COMBINED_OUTPUT_PATH, len(combined_df))
     else:
-        print(f"\n⚠️ No CSVs found in {OUTPUTS_DIR}. Nothing to combine.")
+        log.warning("⚠️ No CSVs found in %s. Nothing to combine.", OUTPUTS_DIR)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape Bursa market cap and volume.")
+    parser.add_argument(
+        "--workers", type=int, default=default_workers(),
+        help="Worker processes sharing one queue, each with its own browsers (default: $SCRAPER_WORKERS or 1)."
+    )
+    parser.add_argument(
+        "--job-store", choices=BACKENDS, default=backend_from_env(),
+        help="Claim companies from the durable job table (sqlite locally, postgres across machines) instead of checking local CSVs (default: $JOB_STORE)."
+    )
+    add_journal_args(parser)
+    args = parser.parse_args()
+
+    asyncio.run(main(workers=args.workers, job_store=args.job_store, rerun=args))
\ No newline at end of file
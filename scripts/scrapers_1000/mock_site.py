@@ -0,0 +1,227 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+# ─── CONFIG ───
+BASE_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = BASE_DIR / "fixtures"        # *.har recordings (see "Recording fixtures" below)
+DEFAULT_PORT = 8765
+
+# Headers that describe the original transfer rather than the body we send back
+SKIP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive"}
+
+
+# ─── FAULT INJECTION ───
+class MockConfig:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0,
+                 drop_rate: float = 0, slow_pattern: Optional[str] = None, slow_ms: float = 0,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms        # Added to every response
+        self.jitter_ms = jitter_ms          # Plus uniform [0, jitter) on top
+        self.failure_rate = failure_rate    # Share of requests answered with 503
+        self.drop_rate = drop_rate          # Share of requests whose connection is closed unanswered
+        self.slow_pattern = re.compile(slow_pattern) if slow_pattern else None
+        self.slow_ms = slow_ms              # Extra delay for paths matching slow_pattern (pagination)
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self) -> float:
+        with self._lock:
+            return self.rng.random()
+
+    def delay_for(self, path: str) -> float:
+        delay = self.latency_ms + self.jitter_ms * self.roll()
+        if self.slow_pattern is not None and self.slow_pattern.search(path):
+            delay += self.slow_ms
+        return delay / 1000
+
+
+# ─── FIXTURES ───
+# Responses from one or more HAR files, keyed by method + path?query (+ POST body). The host
+# is dropped on purpose: my. and www.bursamalaysia.com both end up on the one mock server.
+class FixtureStore:
+    def __init__(self, har_paths):
+        self.responses = {}
+        self.har_paths = [Path(p) for p in har_paths]
+        for path in self.har_paths:
+            self._load(path)
+
+    @staticmethod
+    def _key(method: str, path: str, body: Optional[bytes] = None):
+        digest = hashlib.sha256(body).hexdigest()[:16] if body else None
+        return method.upper(), path, digest
+
+    def _load(self, har_path: Path):
+        har = json.loads(har_path.read_text(encoding="utf-8"))
+        for entry in har.get("log", {}).get("entries", []):
+            request, response = entry["request"], entry["response"]
+            url = urlparse(request["url"])
+            path = url.path + (f"?{url.query}" if url.query else "")
+            post = (request.get("postData") or {}).get("text")
+            body = self._body(har_path, response.get("content", {}))
+            record = {
+                "status": response.get("status", 200),
+                "headers": [(h["name"], h["value"]) for h in response.get("headers", [])
+                            if h["name"].lower() not in SKIP_HEADERS],
+                "body": body,
+            }
+            # Later entries win, so re-recording a page replaces it
+            self.responses[self._key(request["method"], path, post.encode() if post else None)] = record
+            self.responses.setdefault(self._key(request["method"], path), record)
+            self.responses.setdefault(self._key(request["method"], url.path), record)
+
+    # Content is inline (text, maybe base64) or, for recordings made with update_content="attach",
+    # a sidecar file next to the HAR
+    @staticmethod
+    def _body(har_path: Path, content: dict) -> bytes:
+        if content.get("_file"):
+            return (har_path.parent / content["_file"]).read_bytes()
+        text = content.get("text") or ""
+        if content.get("encoding") == "base64":
+            return base64.b64decode(text)
+        return text.encode("utf-8")
+
+    def lookup(self, method: str, path: str, body: Optional[bytes] = None) -> Optional[dict]:
+        return (self.responses.get(self._key(method, path, body))
+                or self.responses.get(self._key(method, path))
+                or self.responses.get(self._key(method, urlparse(path).path)))
+
+
+# ─── SERVER ───
+def make_handler(store: FixtureStore, config: MockConfig, stats: Counter):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+
+            time.sleep(config.delay_for(self.path))
+            if config.roll() < config.drop_rate:
+                stats["dropped"] += 1
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            if config.roll() < config.failure_rate:
+                stats["failed"] += 1
+                self._send(503, [("Content-Type", "text/plain")], b"injected failure")
+                return
+
+            record = store.lookup(self.command, self.path, body)
+            if record is None:
+                stats["missing"] += 1
+                self._send(404, [("Content-Type", "text/plain")], b"not in fixtures")
+                return
+            stats["served"] += 1
+            self._send(record["status"], record["headers"], record["body"])
+
+        def _send(self, status: int, headers: list, body: bytes):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_HEAD = do_OPTIONS = _serve
+
+        def log_message(self, fmt, *args):
+            pass  # One line per request drowns the scraper's own output
+
+    return Handler
+
+
+# Runs the mock in a background thread; the benchmarks use it as a context manager.
+#
+#   with MockSite(FIXTURE_DIR.glob("*.har"), MockConfig(latency_ms=200)) as site:
+#       os.environ["BURSA_BASE_URL"] = site.base_url
+class MockSite:
+    def __init__(self, har_paths, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.store = FixtureStore(har_paths)
+        self.config = config or MockConfig()
+        self.stats = Counter()
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.store, self.config, self.stats))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def summary(self) -> str:
+        counts = ", ".join(f"{k}={v}" for k, v in sorted(self.stats.items())) or "no requests"
+        return f"🧪 Mock site {self.base_url}: {len(self.store.har_paths)} HAR file(s), {counts}"
+
+
+# ─── CLI ───
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded Bursa pages locally, with injectable latency and failures.")
+    parser.add_argument("--har", nargs="*", help=f"HAR recordings to serve (default: every *.har in {FIXTURE_DIR})")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MOCK_PORT", DEFAULT_PORT)))
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency, uniform in [0, jitter)")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Share of requests answered with 503")
+    parser.add_argument("--drop-rate", type=float, default=0, help="Share of requests whose connection is dropped")
+    parser.add_argument("--slow-pattern", help="Regex on path?query for extra-slow responses (e.g. pagination)")
+    parser.add_argument("--slow-ms", type=float, default=0, help="Extra delay for --slow-pattern matches")
+    parser.add_argument("--seed", type=int, help="Seed the fault injection for reproducible runs")
+    args = parser.parse_args()
+
+    har_paths = args.har if args.har else sorted(FIXTURE_DIR.glob("*.har"))
+    if not har_paths:
+        parser.error(f"No HAR files given and none found in {FIXTURE_DIR}")
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.failure_rate, args.drop_rate,
+                        args.slow_pattern, args.slow_ms, args.seed)
+    site = MockSite(har_paths, config, host=args.host, port=args.port)
+    print(f"🧪 Serving {len(site.store.responses)} recorded responses from {len(har_paths)} HAR file(s) at {site.base_url}")
+    print(f"   BURSA_BASE_URL={site.base_url} python3 scrapers_1000/statement_scraper.py --company-id <id>")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.server.server_close()
+        print(site.summary())
+
+"""
+Recording fixtures (once, against the live site):
+    BURSA_HAR=scrapers_1000/fixtures/1155.har BURSA_HAR_MODE=record python3 scrapers_1000/statement_scraper.py --company-id 1155
+    BURSA_HAR=scrapers_1000/fixtures/1155_profile.har BURSA_HAR_MODE=record python3 scrapers_1000/profile_scraper.py ...
+
+Offline, option 1: replay a HAR straight into the browser (no server):
+    BURSA_HAR=scrapers_1000/fixtures/1155.har python3 scrapers_1000/statement_scraper.py --company-id 1155
+
+Offline, option 2: the mock server, with faults:
+    python3 scrapers_1000/mock_site.py --latency-ms 150 --jitter-ms 100 --failure-rate 0.05
+    python3 scrapers_1000/mock_site.py --slow-pattern "page=|pageNo" --slow-ms 3000 --seed 7
+    BURSA_BASE_URL=http://127.0.0.1:8765 python3 scrapers_1000/statement_scraper.py --company-id 1155
+"""
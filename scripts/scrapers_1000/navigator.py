@@ -0,0 +1,217 @@
+import json
+import os
+from collections import deque
+from typing import Optional
+from retry_policy import NAVIGATION_RETRY, goto, retry_async
+from run_journal import SelectorMissing
+from statement_parsing import TABLE_BODY_SELECTOR
+from tracing import span
+from waits import wait_for_text_change, wait_for_visible
+from log_config import get_logger
+
+log = get_logger("navigator")
+
+# ─── STATES ───
+# The stock page is one SPA view with a tab bar (Overview / Profile / Financials / ...);
+# Financials has a Statements sub-tab whose table switches between three statements and
+# two periods.
+LANDING = "landing"          # Just loaded; an announcement modal may cover the tabs
+READY = "ready"              # Modal gone, default tab showing
+PROFILE = "profile"
+FINANCIALS = "financials"    # Financials tab open, Statements not yet
+INCOME = "income"            # Financials → Statements (the income statement is the default sub-tab)
+BALANCE = "balance"
+CASHFLOW = "cashflow"
+STATEMENT_STATES = (INCOME, BALANCE, CASHFLOW)
+
+ANNUAL = "Annual"
+QUARTERLY = "Quarterly"
+
+# state → {next state: button that gets there}; LANDING → READY closes the modal instead
+EDGES = {
+    LANDING: {READY: "Close"},
+    READY: {PROFILE: "Profile", FINANCIALS: "Financials"},
+    PROFILE: {FINANCIALS: "Financials"},
+    FINANCIALS: {INCOME: "Statements", PROFILE: "Profile"},
+    INCOME: {BALANCE: "Balance Sheet", CASHFLOW: "Cash Flow", PROFILE: "Profile"},
+    BALANCE: {CASHFLOW: "Cash Flow", PROFILE: "Profile"},
+    CASHFLOW: {BALANCE: "Balance Sheet", PROFILE: "Profile"},
+}
+
+# What each state looks like once it has rendered. Button names are matched exactly everywhere:
+# role names otherwise match any substring, case-insensitively ("Annual" would hit "Annual Report").
+PROFILE_SELECTOR = "div.contactDetails-left"
+STATEMENTS_BUTTON_SELECTOR = 'role=button[name="Statements"s]'
+CLOSE_BUTTON_SELECTOR = 'role=button[name="Close"s]'
+
+CLICK_TIMEOUT = 3000         # ms
+STEP_TIMEOUT = 5000          # ms for a transition to show up on screen
+DEEP_LINK_TIMEOUT = 3000
+
+# Routes appended to the company URL that open a view directly, e.g.
+# BURSA_DEEP_LINKS='{"income": "#financials/statements"}'. A route that fails to open its
+# view is not tried again in this process; states without one use the click path.
+ENV_DEEP_LINKS = "BURSA_DEEP_LINKS"
+DEEP_LINKS = json.loads(os.getenv(ENV_DEEP_LINKS) or "{}")
+_deep_link_works = {}
+
+
+def shortest_path(start: str, target: str) -> Optional[list]:
+    previous = {start: None}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if state == target:
+            path = []
+            while previous[state] is not None:
+                path.append(state)
+                state = previous[state]
+            return path[::-1]
+        for nxt in EDGES.get(state, {}):
+            if nxt not in previous:
+                previous[nxt] = state
+                queue.append(nxt)
+    return None
+
+
+# ─── NAVIGATOR ───
+# Replaces the Financials/Statements click dance. It knows which view the page is on, clicks
+# the shortest path to the one asked for, and waits for each step to render before the next
+# click; a step that didn't take is clicked once more. When a whole route fails it recovers
+# through the Profile tab (or a reload) and routes again.
+#
+#   nav = TabNavigator(page, url)
+#   await nav.open()
+#   await nav.go(BALANCE, period=ANNUAL)
+class TabNavigator:
+    def __init__(self, page, url: str):
+        self.page = page
+        self.url = url
+        self.state = LANDING
+        self.period = None       # Unknown until ensure_period() has looked
+
+    async def open(self):
+        await goto(self.page, self.url)
+        self.state, self.period = LANDING, None
+        await self._dismiss_modal()
+
+    async def go(self, target: str, period: Optional[str] = None):
+        with span("navigation", target=target):
+            if self.state != target:
+                await retry_async(lambda: self._route(target), policy=NAVIGATION_RETRY,
+                                  on_retry=self._recover, name=f"navigate to {target}")
+            if period and target in STATEMENT_STATES:
+                await self.ensure_period(period)
+
+    async def _route(self, target: str):
+        if await self._deep_link(target):
+            return
+        path = shortest_path(self.state, target)
+        if path is None:
+            raise SelectorMissing(f"No route from {self.state} to {target}")
+        for state in path:
+            await self._step(state)
+
+    # ─── TRANSITIONS ───
+    async def _step(self, target: str):
+        if target == READY:
+            await self._dismiss_modal()
+            return
+        button = EDGES[self.state][target]
+        switching = self.state in STATEMENT_STATES and target in STATEMENT_STATES
+        before = await self._table_text() if switching else None
+        for click in (1, 2):  # The site sometimes swallows the first click on a tab
+            await self._close_late_modal()
+            await self.page.get_by_role("button", name=button, exact=True).first.click(timeout=CLICK_TIMEOUT)
+            if await self._arrived(target, before):
+                break
+        else:
+            # Same table text after two sub-tab clicks: read it anyway, as the old dance did
+            if not (switching and await self.page.locator(TABLE_BODY_SELECTOR).first.is_visible()):
+                raise SelectorMissing(f"Clicked '{button}' twice but {target} never showed ({self.state} → {target})")
+            log.warning("⚠️ Table did not visibly change after clicking '%s', parsing anyway", button)
+        if target in STATEMENT_STATES and not switching:
+            self.period = None  # Freshly opened table; its period is whatever the site defaults to
+        self.state = target
+
+    async def _arrived(self, target: str, table_before: Optional[str], timeout: int = STEP_TIMEOUT) -> bool:
+        if target == PROFILE:
+            return await wait_for_visible(self.page, PROFILE_SELECTOR, timeout=timeout, name="nav_profile")
+        if target == FINANCIALS:
+            return await wait_for_visible(self.page, STATEMENTS_BUTTON_SELECTOR, timeout=timeout, name="nav_financials")
+        if not await wait_for_visible(self.page, TABLE_BODY_SELECTOR, timeout=timeout, name=f"nav_{target}"):
+            return False
+        if table_before is not None:
+            return await wait_for_text_change(self.page, TABLE_BODY_SELECTOR, table_before,
+                                              timeout=timeout, name=f"nav_{target}_table")
+        return True
+
+    async def _dismiss_modal(self):
+        if await wait_for_visible(self.page, CLOSE_BUTTON_SELECTOR, timeout=CLICK_TIMEOUT, name="nav_modal"):
+            await self.page.locator(CLOSE_BUTTON_SELECTOR).first.click(timeout=CLICK_TIMEOUT)
+        self.state = READY
+
+    # The announcement modal can also pop up a moment after load, over whatever we click next
+    async def _close_late_modal(self):
+        close = self.page.locator(CLOSE_BUTTON_SELECTOR).first
+        if await close.count() and await close.is_visible():
+            await close.click(timeout=CLICK_TIMEOUT)
+
+    async def _deep_link(self, target: str) -> bool:
+        route = DEEP_LINKS.get(target)
+        if not route or _deep_link_works.get(target) is False:
+            return False
+        await goto(self.page, self.url.split("#")[0] + route)
+        self.period = None
+        await self._dismiss_modal()
+        ok = await self._arrived(target, None, timeout=DEEP_LINK_TIMEOUT)
+        if _deep_link_works.get(target) is None:
+            log.info("🔗 Deep link for %s %s", target, "works" if ok else "did not open the view; using clicks")
+        _deep_link_works[target] = ok
+        if ok:
+            self.state = target
+        return ok
+
+    # Back to a known state after a failed route: the Profile tab, or a fresh load of the page
+    async def _recover(self, attempt: int, error):
+        try:
+            await self.page.get_by_role("button", name="Profile", exact=True).first.click(timeout=CLICK_TIMEOUT)
+            if await self._arrived(PROFILE, None):
+                self.state = PROFILE
+                return
+        except Exception:
+            pass
+        await self.open()
+
+    # ─── PERIOD ───
+    # The period dropdown's button shows the current period; picking the other one re-renders
+    # the table. After a sub-tab switch it may already read right, in which case nothing is clicked.
+    # Returns whether the dropdown now shows `period`: tables without a dropdown only have one
+    # period, and the site doesn't say which.
+    async def ensure_period(self, period: str = ANNUAL) -> bool:
+        other = QUARTERLY if period == ANNUAL else ANNUAL
+        if self.period != period:
+            current = self.page.get_by_role("button", name=other, exact=True)
+            if await current.count() and await current.first.is_visible():
+                before = await self._table_text()
+                await current.first.click(timeout=CLICK_TIMEOUT)
+                await self.page.get_by_text(period, exact=True).first.click(timeout=CLICK_TIMEOUT)
+                if before is not None:
+                    await wait_for_text_change(self.page, TABLE_BODY_SELECTOR, before,
+                                               timeout=STEP_TIMEOUT, name=f"nav_{period.lower()}")
+            self.period = period
+        if not await wait_for_visible(self.page, TABLE_BODY_SELECTOR, timeout=STEP_TIMEOUT, name="nav_period_table"):
+            raise SelectorMissing(f"No statement table after selecting {period}")
+        return await self._showing(period)
+
+    async def _showing(self, period: str) -> bool:
+        button = self.page.get_by_role("button", name=period, exact=True)
+        return bool(await button.count()) and await button.first.is_visible()
+
+    # ─── TABLE HELPERS ───
+    async def _table_text(self) -> Optional[str]:
+        table = self.page.locator(TABLE_BODY_SELECTOR).first
+        try:
+            return await table.inner_text(timeout=CLICK_TIMEOUT)
+        except Exception:
+            return None
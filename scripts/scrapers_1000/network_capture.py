@@ -0,0 +1,216 @@
+import json
+from datetime import datetime
+from typing import Optional
+import pandas as pd
+from statement_parsing import build_wide_frame
+from snapshot_archive import save_snapshot
+from tracing import span
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("network_capture")
+# Key names probed when walking the JSON behind the stock tables. The Bursa SPA's
+# payloads are not documented, so these are lists of candidates rather than a schema.
+NAME_KEYS = ("name", "label", "title", "metric", "item", "description")
+ROW_VALUE_KEYS = ("values", "data", "periods", "items")
+PERIOD_KEYS = ("periods", "dates", "fiscalPeriods", "fiscal_periods", "headers", "columns")
+DATE_KEYS = ("date", "fiscalDate", "fiscal_date", "periodEndDate", "period_end_date", "period")
+AMOUNT_KEYS = ("value", "amount", "val")
+YOY_KEYS = ("yoy", "yoyChange", "yoy_change", "change", "changePercent", "change_percent", "growth")
+# YoY keys whose bare numbers are already percentage points (5 → "5%"). A bare number under any
+# other key could just as well be a fraction (0.05), so it is left empty rather than guessed at.
+PERCENT_POINT_KEYS = ("changePercent", "change_percent")
+DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%d %b %Y", "%d/%m/%Y")
+
+
+# ─── RESPONSE CAPTURE ───
+# Listens to the page's XHR/fetch responses and keeps every JSON body in arrival order.
+# Callers take a mark() before clicking a tab and read since(mark) afterwards, so each
+# statement/section only looks at the responses its own click triggered.
+#
+#   capture = ResponseCapture(page)
+#   mark = capture.mark()
+#   await page.get_by_role("button", name="Cash Flow").click()
+#   df = parse_statement_payloads(capture.since(mark), cid, url)
+class ResponseCapture:
+    def __init__(self, page):
+        self.page = page
+        self.payloads = []
+        page.on("response", self._on_response)
+
+    async def _on_response(self, response):
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            data = await response.json()
+        except Exception:
+            return  # Body gone (navigation, closed page) or not actually JSON
+        self.payloads.append({"seq": len(self.payloads), "url": response.url, "data": data})
+
+    def mark(self) -> int:
+        return len(self.payloads)
+
+    def since(self, mark: int) -> list:
+        return self.payloads[mark:]
+
+    # Raw JSON goes into the snapshot archive so parsing can be fixed later without re-scraping
+    # (reparse.py prefers these over the HTML snapshot of the same visit)
+    def save(self, company_id: str, section: str, payloads: Optional[list] = None,
+             visit: Optional[str] = None):
+        payloads = self.payloads if payloads is None else payloads
+        save_snapshot(company_id, section, json.dumps(payloads, ensure_ascii=False),
+                      kind="json", url=self.page.url, visit=visit)
+
+
+# ─── JSON WALKING ───
+def _first(d: dict, keys):
+    for key in keys:
+        if key in d and d[key] is not None:
+            return d[key]
+    return None
+
+# Depth-first search for the first list of dicts that satisfies `accept`.
+def find_record_list(node, accept):
+    if isinstance(node, list):
+        if node and all(isinstance(x, dict) for x in node) and accept(node):
+            return node
+        for child in node:
+            found = find_record_list(child, accept)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        for child in node.values():
+            found = find_record_list(child, accept)
+            if found is not None:
+                return found
+    return None
+
+def normalize_date(raw) -> Optional[str]:
+    if isinstance(raw, dict):
+        raw = _first(raw, DATE_KEYS)
+    if not isinstance(raw, str):
+        return None
+    text = raw.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%d %b %Y")
+        except ValueError:
+            continue
+    try:
+        # e.g. "FY 31 Dec 2024" → same last-three-tokens rule as the DOM parser
+        return datetime.strptime(" ".join(text.split()[-3:]), "%d %b %Y").strftime("%d %b %Y")
+    except ValueError:
+        return None
+
+# Same text shape the DOM parser reads ("+5%" for YoY), so build_wide_frame types both alike.
+def _is_blank(raw) -> bool:
+    return raw is None or (isinstance(raw, str) and raw.strip() in {"-", "—", ""})
+
+def _as_value(raw):
+    if _is_blank(raw):
+        return None
+    return str(raw)
+
+_unknown_pct_keys = set()
+
+def _as_pct(raw, key: Optional[str] = None):
+    if _is_blank(raw):
+        return None
+    text = str(raw).strip()
+    if text.endswith("%"):
+        return text
+    if key in PERCENT_POINT_KEYS:
+        return f"{text}%"
+    if key not in _unknown_pct_keys:
+        _unknown_pct_keys.add(key)
+        log.warning("⚠️ YoY '%s' holds bare numbers (e.g. %r) in an unknown unit; leaving YoY empty. "
+                    "Add the key to PERCENT_POINT_KEYS if they are percentage points.", key, raw)
+    return None
+
+def _first_key(d: dict, keys) -> Optional[str]:
+    return next((key for key in keys if d.get(key) is not None), None)
+
+
+# ─── STATEMENT PARSER ───
+def _is_statement_rows(rows) -> bool:
+    sample = rows[0]
+    return _first(sample, NAME_KEYS) is not None and isinstance(_first(sample, ROW_VALUE_KEYS), list)
+
+def _is_period_list(candidate) -> bool:
+    if not isinstance(candidate, list) or not candidate:
+        return False
+    first = candidate[0]
+    return not isinstance(first, dict) or _first(first, DATE_KEYS) is not None
+
+def _period_labels(payload) -> list:
+    stack = [payload] if isinstance(payload, dict) else []
+    while stack:
+        node = stack.pop()
+        candidate = _first(node, PERIOD_KEYS)
+        if _is_period_list(candidate):
+            labels = [normalize_date(p) for p in candidate]
+            # Header lists can start with the metric-name column; drop it so indices line up
+            while labels and labels[0] is None:
+                labels.pop(0)
+            return labels
+        stack.extend(v for v in node.values() if isinstance(v, dict))
+    return []
+
+# Turns one statement payload into the same {(date, "Value"|"YoY %"): {metric: val}}
+# structure as statement_parsing.extract_statement_table.
+def statement_raw_data(payload) -> dict:
+    rows = find_record_list(payload, _is_statement_rows)
+    if not rows:
+        return {}
+
+    periods = _period_labels(payload)
+    raw_data = {}
+    for row in rows:
+        metric = str(_first(row, NAME_KEYS)).strip()
+        if not metric or "Amount Standardised" in metric:
+            continue
+        for j, cell in enumerate(_first(row, ROW_VALUE_KEYS)):
+            if isinstance(cell, dict):
+                year = normalize_date(cell) or (periods[j] if j < len(periods) else None)
+                pct_key = _first_key(cell, YOY_KEYS)
+                val, pct = _first(cell, AMOUNT_KEYS), cell.get(pct_key) if pct_key else None
+            else:
+                year = periods[j] if j < len(periods) else None
+                val, pct, pct_key = cell, None, None
+            if year is None:
+                continue
+            raw_data.setdefault((year, "Value"), {})[metric] = _as_value(val)
+            raw_data.setdefault((year, "YoY %"), {})[metric] = _as_pct(pct, pct_key)
+    return raw_data
+
+# Newest payload wins: the last statement-shaped response after a tab/period click is the
+# one that filled the table on screen.
+@span("extract.json")
+def parse_statement_payloads(payloads: list, company_id: str, url: str) -> pd.DataFrame:
+    for captured in reversed(payloads):
+        raw_data = statement_raw_data(captured["data"])
+        if raw_data:
+            return build_wide_frame(raw_data, company_id, url)
+    return pd.DataFrame()
+
+
+# ─── RECORD TABLE PARSER ───
+# For ownership / top 10 / insider: `field_map` is {output column: JSON key}, matching the
+# columns the DOM extractors in profile_scraper.py produce.
+@span("extract.json")
+def parse_record_payloads(payloads: list, field_map: dict) -> pd.DataFrame:
+    wanted_keys = set(field_map.values())
+
+    def accept(rows):
+        return len(wanted_keys & set(rows[0])) >= max(2, len(wanted_keys) // 2)
+
+    for captured in reversed(payloads):
+        records = find_record_list(captured["data"], accept)
+        if records:
+            return pd.DataFrame([
+                {col: _as_value(record.get(key)) for col, key in field_map.items()}
+                for record in records
+            ])
+    return pd.DataFrame()
@@ -0,0 +1,49 @@
+import pandas as pd
+
+# ─── CONFIG ───
+# Cells the site shows when there is no figure. They become NaN, the same as an empty cell.
+MISSING_TOKENS = ("", "-", "—", "–", "N/A", "n/a", "NA", "None", "none", "nan", "NaN")
+
+# Columns of a wide statement frame that are labels, not figures
+NON_METRIC_COLUMNS = ("company_id", "Year/Type", "source_url")
+
+NUMBER_PATTERN = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+
+# ─── PARSER ───
+# Scraped figure strings → float64 in one vectorized pass:
+#
+#   "1,234.5" → 1234.5     "(1,234.5)" → -1234.5     "−12" → -12.0 (unicode minus)
+#   "(-5)"    → -5.0       (brackets only negate a figure without a sign)
+#   "+5.2%"   → 5.2        "-", "—", "", None → NaN
+#
+# YoY percentages stay in percentage points. Text that isn't a number at all ("n.m.", "12x")
+# is NaN too; a number that already arrived as one (the JSON path) passes straight through.
+def to_float(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype("float64")
+
+    text = values.astype(object).where(values.notna(), "").astype(str).str.strip()
+    missing = text.isin(MISSING_TOKENS)
+    text = text.str.replace("−", "-", regex=False)
+    # Accounting brackets negate an unsigned figure; "(-5)" is already signed and stays -5
+    negative = text.str.fullmatch(r"\(\s*[^+\-\s].*\)")
+    text = text.str.replace(r"[,\s%()]", "", regex=True)
+    valid = ~missing & text.str.fullmatch(NUMBER_PATTERN)
+
+    parsed = pd.to_numeric(text.where(valid, "nan"), errors="coerce").astype("float64")
+    return parsed.mask(negative, -parsed)
+
+
+# Types every figure column of a wide statement frame (Value and YoY % rows alike) in place.
+# All cells go through to_float as one flat column rather than column by column.
+def to_float_frame(df: pd.DataFrame, columns=None) -> pd.DataFrame:
+    if columns is None:
+        columns = [c for c in df.columns if c not in NON_METRIC_COLUMNS]
+    columns = [c for c in columns if c in df.columns]
+    if df.empty or not columns:
+        return df
+
+    flat = pd.Series(df[columns].to_numpy(dtype=object).ravel())
+    typed = to_float(flat).to_numpy().reshape(len(df), len(columns))
+    return df.assign(**{col: typed[:, i] for i, col in enumerate(columns)})
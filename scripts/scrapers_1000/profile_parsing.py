@@ -0,0 +1,111 @@
+import pandas as pd
+
+# ─── SECTION SELECTORS ───
+# Containers the profile scraper reads each table from (live page and archived HTML alike)
+MANAGEMENT_SELECTOR = "div.stock-detailed-profile-manegement-table"
+OWNERSHIP_SELECTOR = "div:nth-child(3)"
+TOP10_SELECTOR = "div:nth-child(4)"
+INSIDER_SELECTOR = "div.latest-insider"
+
+# ─── COLUMN MAPS ───
+# Output column → CSS selector inside a ".stock-table-row"
+MANAGEMENT_COLUMNS = {
+    "Name": ".nameCol",
+    "Designation": ".designationCol",
+    "Role": ".roleCol",
+    "Since": ".sinceCol",
+}
+
+OWNERSHIP_COLUMNS = {
+    "Investor Name": "div.scroll span",
+    "No. of Investors": ".owner_idCol",
+    "Ownership %": ".ownership_percentageCol",
+    "Position (M shares)": ".shares_heldCol",
+    "Position Change (M)": ".shares_changedCol",
+    "Position Change (M) %": ".position_changeCol",
+    "Position Value Change (M)": ".value_of_shares_changedCol",
+    "Value (M USD)": ".value_heldCol",
+}
+
+# Top 10 investors and latest insider tables share the same columns
+HOLDER_COLUMNS = {
+    "Investor Name": ".ownerCol span",
+    "Ownership %": ".ownership_percentageCol",
+    "Position (M Shares)": ".shares_heldCol",
+    "Position Change (M)": ".shares_changedCol",
+    "Position Change (M) %": ".position_changeCol",
+    "Position Value Change (M)": ".value_of_shares_changedCol",
+    "Value (M USD)": ".value_heldCol",
+    "Filing Date": ".report_dateCol",
+    "Filing Source": ".sourceCol",
+}
+
+# JSON field names behind the ownership / top 10 / insider tables, used by --capture-json.
+# The table cells carry the same names as CSS classes (".shares_heldCol" → "shares_held").
+OWNERSHIP_JSON_FIELDS = {
+    "Investor Name": "owner",
+    "No. of Investors": "owner_id",
+    "Ownership %": "ownership_percentage",
+    "Position (M shares)": "shares_held",
+    "Position Change (M)": "shares_changed",
+    "Position Change (M) %": "position_change",
+    "Position Value Change (M)": "value_of_shares_changed",
+    "Value (M USD)": "value_held",
+}
+HOLDER_JSON_FIELDS = {
+    "Investor Name": "owner",
+    "Ownership %": "ownership_percentage",
+    "Position (M Shares)": "shares_held",
+    "Position Change (M)": "shares_changed",
+    "Position Change (M) %": "position_change",
+    "Position Value Change (M)": "value_of_shares_changed",
+    "Value (M USD)": "value_held",
+    "Filing Date": "report_date",
+    "Filing Source": "source",
+}
+
+PROFILE_FIELDS = ["Sector", "Sub Sector", "Website", "Phone", "Fax"]
+
+
+# ─── OFFLINE HTML PARSERS ───
+# Used by reparse.py on archived snapshots. They mirror the live extractors in
+# profile_scraper.py / market_capscrape.py, with get_text("\n") standing in for innerText.
+def _soup(html: str):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "lxml")
+
+def _text(node):
+    return node.get_text("\n", strip=True) if node is not None else None
+
+def parse_table_rows_html(html: str, section_selector: str, columns: dict) -> pd.DataFrame:
+    soup = _soup(html)
+    rows = []
+    for row in soup.select(f"{section_selector} .stock-table-body .stock-table-row"):
+        rows.append({name: _text(row.select_one(selector)) for name, selector in columns.items()})
+    return pd.DataFrame(rows, columns=list(columns)) if rows else pd.DataFrame()
+
+def parse_profile_overview_html(html: str) -> pd.DataFrame:
+    soup = _soup(html)
+    data = {"About": _text(soup.select_one("div.contactDetails-left .contactInfo-value"))}
+
+    field_map = dict.fromkeys(PROFILE_FIELDS)
+    right = _text(soup.select_one("div.contactDetails-right")) or ""
+    lines = [line.strip() for line in right.splitlines() if line.strip()]
+    for i, label in enumerate(lines):
+        if label in field_map and i + 1 < len(lines):
+            field_map[label] = lines[i + 1]
+    data.update(field_map)
+
+    data["Address"] = _text(soup.select_one("a.location_pin"))
+    return pd.DataFrame([data])
+
+# Market cap and volume from the stock header, as read by market_capscrape.py
+def parse_market_info_html(html: str) -> dict:
+    soup = _soup(html)
+    market_cap = None
+    for label in soup.select("div.sdt-stockinfo-label"):
+        if "Market Cap (Mil)" in label.get_text():
+            market_cap = _text(label.parent.find("div", class_="sdt-stockinfo-text", recursive=False))
+            break
+    volume = _text(soup.select_one("div.sdt-stockinfo.value div.sdt-stockinfo-text"))
+    return {"market_cap_mil": market_cap, "volume": volume}
@@ -1,9 +1,30 @@
 import asyncio
+import argparse
 import random
 from pathlib import Path
 import pandas as pd
 from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from request_router import policy_for
+from concurrency import AdaptiveConcurrency
+from network_capture import ResponseCapture, parse_record_payloads
+from snapshot_archive import new_visit_id, snapshot_page
+from waits import WAIT_STATS, row_signature, wait_for_rows_change
+from work_queue import default_workers, drain_queue, run_sharded
+from job_store import BACKENDS, JobStore, backend_from_env
+from retry_policy import company_deadline
+from navigator import PROFILE, TabNavigator
+from tracing import span
+from run_journal import add_journal_args, classify, journal_attempt, journal_error, journal_phase, rerun_for_job_store, select_for_rerun
+from profile_parsing import (
+    MANAGEMENT_SELECTOR, OWNERSHIP_SELECTOR, TOP10_SELECTOR, INSIDER_SELECTOR,
+    MANAGEMENT_COLUMNS, OWNERSHIP_COLUMNS, HOLDER_COLUMNS,
+    OWNERSHIP_JSON_FIELDS, HOLDER_JSON_FIELDS,
+)
 from tqdm.asyncio import tqdm_asyncio
+from log_config import get_logger, log_preview
+
+log = get_logger("profile_scraper")
 
 
 
@@ -57,14 +78,16 @@ async def extract_section_table(page, section_selector: str) -> pd.DataFrame:
         if len(cells) == len(headers):
             rows.append(dict(zip(headers, cells)))
         else:
-            print(f"⚠️ Row length mismatch at index {i}, skipping row.")
+            log.warning("⚠️ Row length mismatch at index %s, skipping row.", i)
 
     return pd.DataFrame(rows)
 
 
 # Loops through paginated tables, clicking “Next” until no more pages, aggregating data into one DataFrame.
+# After each click it waits for the row set to change; if it never does, that was the last page.
 async def paginate_section(page, next_button_selector: str, section_selector: str) -> pd.DataFrame:
     all_pages = []
+    row_selector = f"{section_selector} .stock-table-body .stock-table-row"
     while True:
         df = await extract_section_table(page, section_selector)
         if not df.empty:
@@ -72,19 +95,44 @@ async def paginate_section(page, next_button_selector: str, section_selector: st
         try:
             next_btn = page.locator(next_button_selector)
             if await next_btn.is_enabled():
+                before = await row_signature(page, row_selector)
                 await next_btn.click()
-                await page.wait_for_timeout(1500)
+                if not await wait_for_rows_change(page, row_selector, before, timeout=5000, name="section_next"):
+                    break
             else:
                 break
         except:
             break
     return pd.concat(all_pages, ignore_index=True) if all_pages else pd.DataFrame()
 
+# Reads every row of a table page in one page.evaluate call instead of a .count() + .inner_text()
+# round-trip per column per row. `columns` maps output column → CSS selector inside the row;
+# a missing cell comes back as None, same as the old per-cell extractors.
+ROWS_TO_JSON_JS = """
+({ rowSelector, columns }) => Array.from(document.querySelectorAll(rowSelector)).map(row => {
+    const out = {};
+    for (const [name, selector] of Object.entries(columns)) {
+        const cell = row.querySelector(selector);
+        out[name] = cell ? cell.innerText : null;
+    }
+    return out;
+})
+"""
+
+@span("extract.table")
+async def extract_table_rows(page, section_selector: str, columns: dict) -> pd.DataFrame:
+    rows = await page.evaluate(ROWS_TO_JSON_JS, {
+        "rowSelector": f"{section_selector} .stock-table-body .stock-table-row",
+        "columns": columns,
+    })
+    return pd.DataFrame(rows, columns=list(columns)) if rows else pd.DataFrame()
+
 # ─────────────────────────────────────────────
 # PROFILE EXTRACTOR
 # ─────────────────────────────────────────────
 
 # Scrapes the “About”, sector, contact info, and address from the profile overview page into a single-row DataFrame.
+@span("extract.profile")
 async def extract_profile_overview(page) -> pd.DataFrame:
     data = {}
 
@@ -109,7 +157,7 @@ async def extract_profile_overview(page) -> pd.DataFrame:
                 field_map[label] = lines[i + 1]
         data.update(field_map)
     except Exception as e:
-        print(f"⚠️ Failed parsing right column: {e}")
+        log.warning("⚠️ Failed parsing right column: %s", e)
 
     try:
         address_node = page.locator("a.location_pin")
@@ -126,26 +174,20 @@ async def extract_profile_overview(page) -> pd.DataFrame:
 # ─────────────────────────────────────────────
 # MANAGEMENT EXTRACTOR
 # ─────────────────────────────────────────────
-async def extract_management_table(page, section_selector: str) -> pd.DataFrame:
-    row_locator = page.locator(f"{section_selector} .stock-table-body .stock-table-row")
-    row_count = await row_locator.count()
-
-    data = []
-    for i in range(row_count):
-        row = row_locator.nth(i)
-        data.append({
-            "Name": await row.locator(".nameCol").inner_text() if await row.locator(".nameCol").count() else None,
-            "Designation": await row.locator(".designationCol").inner_text() if await row.locator(".designationCol").count() else None,
-            "Role": await row.locator(".roleCol").inner_text() if await row.locator(".roleCol").count() else None,
-            "Since": await row.locator(".sinceCol").inner_text() if await row.locator(".sinceCol").count() else None,
-        })
 
-    return pd.DataFrame(data)
+async def extract_management_table(page, section_selector: str) -> pd.DataFrame:
+    return await extract_table_rows(page, section_selector, MANAGEMENT_COLUMNS)
 
-async def paginate_management_table(page, section_selector: str) -> pd.DataFrame:
+# With a company_id, every page is also archived (part = page index) for reparse.py
+async def paginate_management_table(page, section_selector: str, company_id=None, visit=None) -> pd.DataFrame:
     all_pages = []
+    row_selector = f"{section_selector} .stock-table-body .stock-table-row"
+    page_index = 0
 
     while True:
+        if company_id:
+            await snapshot_page(page, company_id, "management", page.url, part=page_index, visit=visit)
+        page_index += 1
         df = await extract_management_table(page, section_selector)
         if not df.empty:
             all_pages.append(df)
@@ -156,9 +198,9 @@ async def paginate_management_table(page, section_selector: str) -> pd.DataFrame
             for i in range(await next_btns.count()):
                 btn = next_btns.nth(i)
                 if await btn.get_attribute("disabled") is None:
+                    before = await row_signature(page, row_selector)
                     await btn.click()
-                    await page.wait_for_timeout(1500)
-                    found = True
+                    found = await wait_for_rows_change(page, row_selector, before, timeout=5000, name="management_next")
                     break
             if not found:
                 break
@@ -169,68 +211,31 @@ async def paginate_management_table(page, section_selector: str) -> pd.DataFrame
 
 # Ownership table extractor
 async def extract_ownership_table(page, section_selector: str) -> pd.DataFrame:
-    row_locator = page.locator(f"{section_selector} .stock-table-body .stock-table-row")
-    row_count = await row_locator.count()
+    return await extract_table_rows(page, section_selector, OWNERSHIP_COLUMNS)
 
-    data = []
-    for i in range(row_count):
-        row = row_locator.nth(i)
-        data.append({
-            "Investor Name": await row.locator("div.scroll span").inner_text() if await row.locator("div.scroll span").count() else None,
-            "No. of Investors": await row.locator(".owner_idCol").inner_text() if await row.locator(".owner_idCol").count() else None,
-            "Ownership %": await row.locator(".ownership_percentageCol").inner_text() if await row.locator(".ownership_percentageCol").count() else None,
-            "Position (M shares)": await row.locator(".shares_heldCol").inner_text() if await row.locator(".shares_heldCol").count() else None,
-            "Position Change (M)": await row.locator(".shares_changedCol").inner_text() if await row.locator(".shares_changedCol").count() else None,
-            "Position Change (M) %": await row.locator(".position_changeCol").inner_text() if await row.locator(".position_changeCol").count() else None,
-            "Position Value Change (M)": await row.locator(".value_of_shares_changedCol").inner_text() if await row.locator(".value_of_shares_changedCol").count() else None,
-            "Value (M USD)": await row.locator(".value_heldCol").inner_text() if await row.locator(".value_heldCol").count() else None,
-        })
-
-    return pd.DataFrame(data)
+# Prefers the JSON captured since `mark`; falls back to the DOM extractor when nothing parses.
+async def extract_with_capture(page, capture, mark: int, section: str, company_id: str,
+                               field_map: dict, dom_extractor, section_selector: str, visit=None) -> pd.DataFrame:
+    await snapshot_page(page, company_id, section, page.url, visit=visit)
+    if capture:
+        try:
+            await page.wait_for_load_state("networkidle", timeout=5000)
+        except Exception:
+            pass
+        payloads = capture.since(mark)
+        capture.save(company_id, section, payloads, visit=visit)
+        df = parse_record_payloads(payloads, field_map)
+        if not df.empty:
+            return df
+    return await dom_extractor(page, section_selector)
 
 #top investors table extractor
 async def extract_top10_table(page, section_selector: str) -> pd.DataFrame:
-    row_locator = page.locator(f"{section_selector} .stock-table-body .stock-table-row")
-    row_count = await row_locator.count()
-
-    data = []
-    for i in range(row_count):
-        row = row_locator.nth(i)
-        data.append({
-            "Investor Name": await row.locator(".ownerCol span").inner_text() if await row.locator(".ownerCol span").count() else None,
-            "Ownership %": await row.locator(".ownership_percentageCol").inner_text() if await row.locator(".ownership_percentageCol").count() else None,
-            "Position (M Shares)": await row.locator(".shares_heldCol").inner_text() if await row.locator(".shares_heldCol").count() else None,
-            "Position Change (M)": await row.locator(".shares_changedCol").inner_text() if await row.locator(".shares_changedCol").count() else None,
-            "Position Change (M) %": await row.locator(".position_changeCol").inner_text() if await row.locator(".position_changeCol").count() else None,
-            "Position Value Change (M)": await row.locator(".value_of_shares_changedCol").inner_text() if await row.locator(".value_of_shares_changedCol").count() else None,
-            "Value (M USD)": await row.locator(".value_heldCol").inner_text() if await row.locator(".value_heldCol").count() else None,
-            "Filing Date": await row.locator(".report_dateCol").inner_text() if await row.locator(".report_dateCol").count() else None,
-            "Filing Source": await row.locator(".sourceCol").inner_text() if await row.locator(".sourceCol").count() else None,
-        })
-
-    return pd.DataFrame(data)
+    return await extract_table_rows(page, section_selector, HOLDER_COLUMNS)
 
 # Latest insider table extractor
 async def extract_insider_table(page, section_selector: str) -> pd.DataFrame:
-    row_locator = page.locator(f"{section_selector} .stock-table-body .stock-table-row")
-    row_count = await row_locator.count()
-
-    data = []
-    for i in range(row_count):
-        row = row_locator.nth(i)
-        data.append({
-            "Investor Name": await row.locator(".ownerCol span").inner_text() if await row.locator(".ownerCol span").count() else None,
-            "Ownership %": await row.locator(".ownership_percentageCol").inner_text() if await row.locator(".ownership_percentageCol").count() else None,
-            "Position (M Shares)": await row.locator(".shares_heldCol").inner_text() if await row.locator(".shares_heldCol").count() else None,
-            "Position Change (M)": await row.locator(".shares_changedCol").inner_text() if await row.locator(".shares_changedCol").count() else None,
-            "Position Change (M) %": await row.locator(".position_changeCol").inner_text() if await row.locator(".position_changeCol").count() else None,
-            "Position Value Change (M)": await row.locator(".value_of_shares_changedCol").inner_text() if await row.locator(".value_of_shares_changedCol").count() else None,
-            "Value (M USD)": await row.locator(".value_heldCol").inner_text() if await row.locator(".value_heldCol").count() else None,
-            "Filing Date": await row.locator(".report_dateCol").inner_text() if await row.locator(".report_dateCol").count() else None,
-            "Filing Source": await row.locator(".sourceCol").inner_text() if await row.locator(".sourceCol").count() else None,
-        })
-
-    return pd.DataFrame(data)
+    return await extract_table_rows(page, section_selector, HOLDER_COLUMNS)
 
 
 
@@ -244,67 +249,87 @@ async def extract_insider_table(page, section_selector: str) -> pd.DataFrame:
 # Main orchestrator that clicks through the profile and all section tabs, 
 # runs respective extractors, and returns a dictionary of 5 DataFrames.
 
-async def scrape_company_profile(page, company_id: str, url: str) -> dict:
-    print(f"\n🔍 Scraping company_id: {company_id}")
-    
-    await page.goto(url, timeout=60000)
-    await page.get_by_role("button", name="Close").click()
-    await page.get_by_role("button", name="Profile").click()
+async def scrape_company_profile(page, company_id: str, url: str, capture=None) -> dict:
+    log.info("🔍 Scraping company_id: %s", company_id)
+    visit = new_visit_id(company_id)
 
-    profile_df = await extract_profile_overview(page)
-    print("📄 Profile Extracted:")
-    print(profile_df.head(5))
+    journal_phase("navigate")
+    nav = TabNavigator(page, url)
+    await nav.open()
+    await nav.go(PROFILE)
 
-    await page.get_by_text("NameDesignationRoleSince").click()
-    await page.get_by_role("button", name="Details").first.click()
-    management_df = await paginate_management_table(page, "div.stock-detailed-profile-manegement-table")
-    print("📊 Table 'Management' Extracted:")
-    print(management_df.head(5))
+    journal_phase("profile")
+    with span("section", section="profile"):
+        profile_df = await extract_profile_overview(page)
+        await snapshot_page(page, company_id, "profile", url, visit=visit)  # After the Address reveal click
+        log_preview(log, profile_df, "📄 Profile Extracted:")
 
-    # Ownership Section
-    try:
+    journal_phase("management")
+    with span("section", section="management"):
+        await page.get_by_text("NameDesignationRoleSince").click()
         await page.get_by_role("button", name="Details").first.click()
+        management_df = await paginate_management_table(page, MANAGEMENT_SELECTOR, company_id, visit)
+        log_preview(log, management_df, "📊 Table 'Management' Extracted:")
 
-        next_items = page.get_by_role("listitem").filter(has_text="Next")
-        if await next_items.count() > 1:
-            await next_items.nth(1).click()
+    # Ownership Section
+    journal_phase("ownership")
+    with span("section", section="ownership"):
+        try:
+            mark = capture.mark() if capture else 0
+            await page.get_by_role("button", name="Details").first.click()
 
-        ownership_df = await extract_ownership_table(page, "div:nth-child(3)")
-        print("📊 Table 'Ownership Type' Extracted:")
-        print(ownership_df.head(5))
-    except Exception as e:
-        print(f"⚠️ Skipping Ownership section: {e}")
-        ownership_df = pd.DataFrame()
+            next_items = page.get_by_role("listitem").filter(has_text="Next")
+            if await next_items.count() > 1:
+                await next_items.nth(1).click()
+
+            ownership_df = await extract_with_capture(
+                page, capture, mark, "ownership", company_id,
+                OWNERSHIP_JSON_FIELDS, extract_ownership_table, OWNERSHIP_SELECTOR, visit)
+            log_preview(log, ownership_df, "📊 Table 'Ownership Type' Extracted:")
+        except Exception as e:
+            journal_error(e)
+            log.warning("⚠️ Skipping Ownership section: %s", e)
+            ownership_df = pd.DataFrame()
 
     # Top 10 Investors Section
-    try:
-        await page.get_by_role("button", name="Details").nth(1).click()
+    journal_phase("top10")
+    with span("section", section="top10"):
+        try:
+            mark = capture.mark() if capture else 0
+            await page.get_by_role("button", name="Details").nth(1).click()
 
-        next_items = page.get_by_role("listitem").filter(has_text="Next")
-        if await next_items.count() > 2:
-            await next_items.nth(2).click()
+            next_items = page.get_by_role("listitem").filter(has_text="Next")
+            if await next_items.count() > 2:
+                await next_items.nth(2).click()
 
-        top10_df = await extract_top10_table(page, "div:nth-child(4)")
-        print("📊 Table 'Top 10 Investors' Extracted:")
-        print(top10_df.head(5))
-    except Exception as e:
-        print(f"⚠️ Skipping Top 10 Investors section: {e}")
-        top10_df = pd.DataFrame()
+            top10_df = await extract_with_capture(
+                page, capture, mark, "top10", company_id,
+                HOLDER_JSON_FIELDS, extract_top10_table, TOP10_SELECTOR, visit)
+            log_preview(log, top10_df, "📊 Table 'Top 10 Investors' Extracted:")
+        except Exception as e:
+            journal_error(e)
+            log.warning("⚠️ Skipping Top 10 Investors section: %s", e)
+            top10_df = pd.DataFrame()
 
     # Insider Section
-    try:
-        await page.get_by_role("button", name="Details").nth(2).click()
+    journal_phase("insider")
+    with span("section", section="insider"):
+        try:
+            mark = capture.mark() if capture else 0
+            await page.get_by_role("button", name="Details").nth(2).click()
 
-        next_items = page.get_by_role("listitem").filter(has_text="Next")
-        if await next_items.count() > 3:
-            await next_items.nth(3).click()
+            next_items = page.get_by_role("listitem").filter(has_text="Next")
+            if await next_items.count() > 3:
+                await next_items.nth(3).click()
 
-        insider_df = await extract_insider_table(page, "div.latest-insider")
-        print("📊 Table 'Latest Insider / Individual Holders' Extracted:")
-        print(insider_df.head(5))
-    except Exception as e:
-        print(f"⚠️ Skipping Insider section: {e}")
-        insider_df = pd.DataFrame()
+            insider_df = await extract_with_capture(
+                page, capture, mark, "insider", company_id,
+                HOLDER_JSON_FIELDS, extract_insider_table, INSIDER_SELECTOR, visit)
+            log_preview(log, insider_df, "📊 Table 'Latest Insider / Individual Holders' Extracted:")
+        except Exception as e:
+            journal_error(e)
+            log.warning("⚠️ Skipping Insider section: %s", e)
+            insider_df = pd.DataFrame()
 
     return {
         "profile": profile_df,
@@ -319,66 +344,102 @@ async def scrape_company_profile(page, company_id: str, url: str) -> dict:
 # ─────────────────────────────────────────────
 
 #Loads company URL list, filters out already scraped ones, creates concurrent scrape tasks with semaphores, and runs them using tqdm_asyncio.
-async def scrape_wrapper(pw, sem, entry):
+async def scrape_wrapper(pool, sem, entry, capture_json=False):
     cid, url = entry["company_id"], entry["new_url"]
     user_agent = random.choice(USER_AGENTS)
 
-    async with sem:
-        try:
-            # launches a persistent browser profile, meaning it stores session data (cookies, localStorage, etc.) in the user_data_dir.
-            # This is different from launch() + context.new_page() (normal Playwright), which uses a fresh, ephemeral context that resets after each run.
-            context = await pw.chromium.launch_persistent_context(
-                user_data_dir=f"/tmp/{cid}",
-                headless=True,
-                user_agent=user_agent  # ✅ Set user agent correctly here
-            )
-            page = await context.new_page()
-
-            results = await scrape_company_profile(page, cid, url)
-
-            for section, df in results.items():
-                single_csv_path = OUTPUTS_DIR / f"{cid}.{section}.csv"
-                df.to_csv(single_csv_path, index=False)
-
-                COMBINED_DIR = Path(__file__).resolve().parent.parent / "bursa_scrape_sql_inject" / "bursa_data"
-                COMBINED_DIR.mkdir(parents=True, exist_ok=True)
-                combined_csv_path = COMBINED_DIR / f"combined_{section}.csv"
-                df_with_meta = inject_id_url(df.copy(), cid, url)
-
-                if combined_csv_path.exists():
-                    existing = pd.read_csv(combined_csv_path, nrows=1)
-                    df_with_meta = df_with_meta[existing.columns.intersection(df_with_meta.columns)]
-                    df_with_meta.to_csv(combined_csv_path, mode="a", header=False, index=False)
-                else:
-                    df_with_meta.to_csv(combined_csv_path, index=False)
-
-            await context.close()
+    async with sem.slot() as slot:
+        with journal_attempt("profile_scraper", cid) as attempt, company_deadline():
+            # Each company gets a fresh, ephemeral context on one of the pool's warm browsers.
+            # The old per-company persistent profile (/tmp/{cid}) never carried state between companies
+            # anyway; the pool sweeps the profiles of its own browsers that a crash left behind.
+            async def visit(context):
+                page = await context.new_page()
+                capture = ResponseCapture(page) if capture_json else None
+                return await scrape_company_profile(page, cid, url, capture)
 
-        except Exception as e:
-            print(f"❌ Error scraping {cid}: {e}")
-            # Attempt to close context safely
             try:
-                await context.close()
-            except:
-                pass
+                results = await pool.run(visit, user_agent=user_agent)
+
+                journal_phase("serialize")
+                for section, df in results.items():
+                    with span("serialize.csv", section=section):
+                        single_csv_path = OUTPUTS_DIR / f"{cid}.{section}.csv"
+                        df.to_csv(single_csv_path, index=False)
+
+                        COMBINED_DIR = Path(__file__).resolve().parent.parent / "bursa_scrape_sql_inject" / "bursa_data"
+                        COMBINED_DIR.mkdir(parents=True, exist_ok=True)
+                        combined_csv_path = COMBINED_DIR / f"combined_{section}.csv"
+                        df_with_meta = inject_id_url(df.copy(), cid, url)
+
+                        if combined_csv_path.exists():
+                            existing = pd.read_csv(combined_csv_path, nrows=1)
+                            df_with_meta = df_with_meta[existing.columns.intersection(df_with_meta.columns)]
+                            df_with_meta.to_csv(combined_csv_path, mode="a", header=False, index=False)
+                        else:
+                            df_with_meta.to_csv(combined_csv_path, index=False)
+
+                attempt.rows = sum(len(df) for df in results.values())
+                if results["profile"].empty and results["management"].empty:
+                    if attempt.error is not None:
+                        slot.fail(classify(attempt.error))  # A timeout/selector failure the scrape swallowed
+                    else:
+                        slot.no_data()
+
+            except Exception as e:
+                slot.fail("timeout" if "Timeout" in type(e).__name__ else "error")
+                journal_error(e)
+                log.error("❌ Error scraping %s: %s", cid, e)
+    return slot.outcome
 
 
-async def main():
+# Body of one --workers process: own Playwright and browser pool, pulling from the shared queue
+async def queue_worker(queue, worker_id: int, capture_json=False):
+    sem = AdaptiveConcurrency.from_env(f"profile_scraper-{worker_id}")
+    async with async_playwright() as pw:
+        routing = policy_for("profile_scraper")
+        async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}, routing=routing) as pool:
+            await drain_queue(queue, worker_id, lambda entry: scrape_wrapper(pool, sem, entry, capture_json), lambda: sem.limit)
+        log.info("%s", routing.summary())
+        log.info("%s", WAIT_STATS.summary())
+
+async def main(capture_json=False, workers=1, job_store=None, rerun=None):
     df_urls = pd.read_csv(CSV_PATH, dtype=str).dropna(subset=["company_id", "new_url"])
     seen_ids = get_seen_ids()
-    companies = df_urls[~df_urls["company_id"].isin(seen_ids)].to_dict("records")
-
-    sem = asyncio.Semaphore(3)
+    pending = companies = df_urls[~df_urls["company_id"].isin(seen_ids)].to_dict("records")
+    # Section CSVs are written even when empty, so --only-failed looks past the seen check
+    companies = select_for_rerun("profile_scraper", rerun, companies, df_urls.to_dict("records"))
+
+    if job_store:
+        store = JobStore.from_env(job_store)
+        job_entries, done_ids, rerun_entries = rerun_for_job_store(rerun, df_urls.to_dict("records"), pending, companies, seen_ids)
+        log.info("📋 Enqueued %s new profile jobs", store.enqueue('profile', job_entries, done_ids))
+        if rerun_entries:
+            log.info("🔁 Reopened %s failed profile jobs", store.reopen('profile', rerun_entries))
+        run_sharded("profile_scraper", None, queue_worker, workers, desc="Scraping profiles",
+                    queue=store.queue("profile"), capture_json=capture_json)
+        return
+
+    if workers > 1:
+        run_sharded("profile_scraper", companies, queue_worker, workers,
+                    desc="Scraping profiles", capture_json=capture_json)
+        return
+
+    sem = AdaptiveConcurrency.from_env("profile_scraper")
 
     async with async_playwright() as pw:
-        tasks = [scrape_wrapper(pw, sem, entry) for entry in companies]
+        routing = policy_for("profile_scraper")
+        async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}, routing=routing) as pool:
+            tasks = [scrape_wrapper(pool, sem, entry, capture_json) for entry in companies]
 
-        # tqdm_asyncio with progress bar
-        for future in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Scraping profiles"):
-            await future
+            # tqdm_asyncio with progress bar
+            for future in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Scraping profiles"):
+                await future
+        log.info("%s", routing.summary())
+        log.info("%s", WAIT_STATS.summary())
 
 def combine_all_profile_sections():
-    print("\n🔄 Combining all profile section CSVs...")
+    log.info("🔄 Combining all profile section CSVs...")
 
     combined_dir = Path(__file__).resolve().parent.parent / "bursa_scrape_sql_inject" / "bursa_data"
     combined_dir.mkdir(parents=True, exist_ok=True)
@@ -394,18 +455,34 @@ def combine_all_profile_sections():
                 df.insert(1, "source_file", file.name)
                 all_dfs.append(df)
             except Exception as e:
-                print(f"⚠️ Error reading {file.name}: {e}")
+                log.warning("⚠️ Error reading %s: %s", file.name, e)
 
         if all_dfs:
             combined = pd.concat(all_dfs, ignore_index=True)
             out_path = combined_dir / f"combined_{section}.csv"
             combined.to_csv(out_path, index=False)
-            print(f"✅ Merged {len(all_dfs)} CSVs into combined_{section}.csv")
+            log.info("✅ Merged %s CSVs into combined_%s.csv", len(all_dfs), section)
         else:
-            print(f"⚠️ No data found for section: {section}")
+            log.warning("⚠️ No data found for section: %s", section)
     
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Scrape Bursa company profiles.")
+    parser.add_argument(
+        "--capture-json", action="store_true",
+        help="Parse ownership/top 10/insider tables from the page's XHR/fetch JSON (archived under outputs/snapshots)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=default_workers(),
+        help="Worker processes sharing one queue, each with its own browsers (default: $SCRAPER_WORKERS or 1)."
+    )
+    parser.add_argument(
+        "--job-store", choices=BACKENDS, default=backend_from_env(),
+        help="Claim companies from the durable job table (sqlite locally, postgres across machines) instead of checking local CSVs (default: $JOB_STORE)."
+    )
+    add_journal_args(parser)
+    args = parser.parse_args()
+
+    asyncio.run(main(capture_json=args.capture_json, workers=args.workers, job_store=args.job_store, rerun=args))
     combine_all_profile_sections()
 
     """
@@ -0,0 +1,93 @@
+import asyncio
+import fcntl
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+# ─── CONFIG ───
+# All scraper processes started by the orchestrator share one bucket through this file, so the
+# budget is per host for the whole fleet rather than per process.
+DEFAULT_STATE_PATH = Path(tempfile.gettempdir()) / "bursa_rate_limiter.json"
+DEFAULT_RATE = 2.0     # Requests per second to bursamalaysia.com, across every process
+DEFAULT_BURST = 5      # Bucket capacity: short bursts allowed after idle time
+
+ENV_RATE = "BURSA_RPS"
+ENV_BURST = "BURSA_BURST"
+ENV_STATE_PATH = "BURSA_RATE_STATE"
+
+
+# ─── TOKEN BUCKET ───
+# Cross-process token bucket. The bucket lives in a small JSON file guarded by an flock, so
+# the critical section is a read-modify-write of a few bytes. It runs on a worker thread, since
+# blocking on another process's lock must not stall the event loop, and waiting happens outside
+# the lock with asyncio.sleep so the loop keeps serving other pages.
+class HostRateLimiter:
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 state_path: Optional[Path] = None):
+        self.rate = max(rate, 0.01)
+        self.burst = max(burst, 1)
+        self.state_path = Path(state_path or DEFAULT_STATE_PATH)
+        self.lock_path = self.state_path.with_suffix(".lock")
+        self.acquired = 0
+        self.waited = 0.0
+
+    @classmethod
+    def from_env(cls) -> "HostRateLimiter":
+        return cls(
+            rate=float(os.getenv(ENV_RATE, DEFAULT_RATE)),
+            burst=int(os.getenv(ENV_BURST, DEFAULT_BURST)),
+            state_path=os.getenv(ENV_STATE_PATH) or None,
+        )
+
+    # Returns 0 when a token was taken, otherwise how long to wait before trying again.
+    def _try_take(self) -> float:
+        with open(self.lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                try:
+                    state = json.loads(self.state_path.read_text())
+                    tokens, updated = float(state["tokens"]), float(state["updated"])
+                except (FileNotFoundError, ValueError, KeyError):
+                    tokens, updated = float(self.burst), now
+
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (1 - tokens) / self.rate
+
+                self.state_path.write_text(json.dumps({"tokens": tokens, "updated": now}))
+                return wait
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Returns how long the caller was held back
+    async def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self._try_take)
+            if wait == 0:
+                self.acquired += 1
+                return waited
+            self.waited += wait
+            waited += wait
+            await asyncio.sleep(wait)
+
+    # Called by the orchestrator before a run so a stale file from an old run can't start empty.
+    # Only the state goes; the lock file stays, since a process holding or waiting on it must keep
+    # sharing its inode with everyone who opens it later.
+    def reset(self):
+        with open(self.lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.state_path.unlink(missing_ok=True)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def summary(self) -> str:
+        return f"⏱️ Rate limiter: {self.acquired} requests at ≤{self.rate:g}/s, waited {self.waited:.1f}s in total"
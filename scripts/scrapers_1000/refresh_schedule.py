@@ -0,0 +1,151 @@
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+from run_journal import read_journal
+
+# ─── CONFIG ───
+BASE_DIR = Path(__file__).resolve().parent
+CSV_PATH = BASE_DIR.parent / "csvs" / "cleaned" / "company_urls.csv"
+INCOME_COMBINED_PATH = BASE_DIR.parent / "bursa_scrape_sql_inject" / "bursa_data" / "complete_income_statements.csv"
+FISCAL_DATE_PATTERN = r"(\d{1,2} \w{3} \d{4})"   # Same extraction as income_injection.py
+
+ENV_REFRESH = "STATEMENT_REFRESH"                # "incremental" → statement_scraper follows this schedule
+ENV_PUBLISH_LAG = "REFRESH_PUBLISH_LAG_DAYS"
+ENV_BACKOFF = "REFRESH_BACKOFF_DAYS"
+ENV_BACKOFF_CAP = "REFRESH_BACKOFF_CAP_DAYS"
+DEFAULT_PUBLISH_LAG_DAYS = 60    # Q4 results (and the new annual column) land ~2 months after year end
+DEFAULT_BACKOFF_DAYS = 7
+DEFAULT_BACKOFF_CAP_DAYS = 56
+
+# Every scraper that writes the statement CSVs counts as a visit
+STATEMENT_SCRAPERS = ("statement_scraper", "income_statement", "balance_sheet", "cash_flow")
+
+
+def incremental_from_env() -> bool:
+    return os.getenv(ENV_REFRESH) == "incremental"
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# ─── INPUTS ───
+def latest_fiscal_dates(path: Path = INCOME_COMBINED_PATH) -> dict:
+    if not path.exists():
+        return {}
+    df = pd.read_csv(path, dtype={"company_id": str}, usecols=["company_id", "Year/Type"])
+    df["Fiscal Date"] = pd.to_datetime(
+        df["Year/Type"].str.extract(FISCAL_DATE_PATTERN)[0], format="%d %b %Y", errors="coerce")
+    latest = df.dropna(subset=["Fiscal Date"]).groupby("company_id")["Fiscal Date"].max()
+    return {cid: ts.to_pydatetime() for cid, ts in latest.items()}
+
+def visit_history(scrapers=STATEMENT_SCRAPERS) -> dict:
+    visits = {}
+    for entry in read_journal(scrapers):
+        try:
+            started = datetime.fromisoformat(entry["started_at"]).astimezone(timezone.utc).replace(tzinfo=None)
+        except (KeyError, ValueError):
+            continue
+        visits.setdefault(str(entry["company_id"]), []).append(started)
+    return visits
+
+
+# ─── SCHEDULE ───
+# A company publishes one new annual column a year, shortly after its fiscal year end, so
+# there is nothing to fetch until (latest Fiscal Date + 1 year + publication lag). Once that
+# date passes the company is due; every visit since then that didn't advance the Fiscal Date
+# (the combined CSV still shows the old year, or the page had no table) doubles the wait
+# before the next try, up to the cap. Companies with no Fiscal Date yet are due from day one
+# and back off the same way.
+class RefreshSchedule:
+    def __init__(self, publish_lag_days: int = DEFAULT_PUBLISH_LAG_DAYS,
+                 backoff_days: int = DEFAULT_BACKOFF_DAYS, backoff_cap_days: int = DEFAULT_BACKOFF_CAP_DAYS,
+                 fiscal_dates: Optional[dict] = None, visits: Optional[dict] = None):
+        self.publish_lag = timedelta(days=publish_lag_days)
+        self.backoff = timedelta(days=backoff_days)
+        self.backoff_cap = timedelta(days=backoff_cap_days)
+        self.fiscal_dates = latest_fiscal_dates() if fiscal_dates is None else fiscal_dates
+        self.visits = visit_history() if visits is None else visits
+
+    @classmethod
+    def from_env(cls) -> "RefreshSchedule":
+        return cls(
+            publish_lag_days=int(os.getenv(ENV_PUBLISH_LAG, DEFAULT_PUBLISH_LAG_DAYS)),
+            backoff_days=int(os.getenv(ENV_BACKOFF, DEFAULT_BACKOFF_DAYS)),
+            backoff_cap_days=int(os.getenv(ENV_BACKOFF_CAP, DEFAULT_BACKOFF_CAP_DAYS)),
+        )
+
+    def period_due(self, company_id: str) -> Optional[datetime]:
+        latest = self.fiscal_dates.get(company_id)
+        if latest is None:
+            return None
+        try:
+            next_year_end = latest.replace(year=latest.year + 1)
+        except ValueError:  # 29 Feb year end
+            next_year_end = latest.replace(year=latest.year + 1, day=28)
+        return next_year_end + self.publish_lag
+
+    def plan_one(self, company_id: str, now: datetime) -> dict:
+        company_id = str(company_id)
+        latest = self.fiscal_dates.get(company_id)
+        period_due = self.period_due(company_id)
+        plan = {"company_id": company_id, "latest_fiscal_date": latest, "period_due": period_due}
+
+        if period_due is not None and now < period_due:
+            return {**plan, "due": False, "reason": "period_not_due", "next_try": period_due}
+
+        misses = sorted(v for v in self.visits.get(company_id, []) if period_due is None or v >= period_due)
+        if not misses:
+            return {**plan, "due": True, "reason": "never_scraped" if latest is None else "period_due", "next_try": now}
+
+        wait = min(self.backoff_cap, self.backoff * (2 ** (len(misses) - 1)))
+        next_try = misses[-1] + wait
+        return {**plan, "due": now >= next_try, "reason": "backoff", "misses": len(misses), "next_try": next_try}
+
+    def plan(self, company_ids, now: Optional[datetime] = None) -> list:
+        now = now or _utcnow()
+        return [self.plan_one(cid, now) for cid in company_ids]
+
+
+def summarize(plans: list) -> str:
+    due = [p for p in plans if p["due"]]
+    reasons = {}
+    for p in due:
+        reasons[p["reason"]] = reasons.get(p["reason"], 0) + 1
+    waiting = sorted((p for p in plans if not p["due"]), key=lambda p: p["next_try"])
+    lines = [f"📅 {len(due)} of {len(plans)} companies due for a statement refresh "
+             f"({', '.join(f'{k}: {v}' for k, v in sorted(reasons.items())) or 'none'})"]
+    if waiting:
+        lines.append(f"   next up: {waiting[0]['company_id']} on {waiting[0]['next_try']:%d %b %Y}")
+    return "\n".join(lines)
+
+
+# ─── CLI ───
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show which companies are due for a financial statement refresh.")
+    parser.add_argument("--list", action="store_true", help="Print every due company with its reason")
+    parser.add_argument("--company-id", help="Explain the schedule for one company")
+    args = parser.parse_args()
+
+    df_urls = pd.read_csv(CSV_PATH, dtype=str).dropna(subset=["company_id", "new_url"])
+    schedule = RefreshSchedule.from_env()
+    plans = schedule.plan([args.company_id] if args.company_id else df_urls["company_id"])
+
+    if args.company_id or args.list:
+        for p in plans:
+            if p["due"] or args.company_id:
+                latest = f"{p['latest_fiscal_date']:%d %b %Y}" if p["latest_fiscal_date"] else "-"
+                print(f"{p['company_id']:>6}  {'due' if p['due'] else 'wait':<4}  {p['reason']:<15} "
+                      f"latest FY {latest:<11}  next try {p['next_try']:%d %b %Y}")
+    print(summarize(plans))
+
+"""
+Usage:
+    python3 scrapers_1000/refresh_schedule.py                     # How many companies a refresh would visit today
+    python3 scrapers_1000/refresh_schedule.py --list
+    python3 scrapers_1000/refresh_schedule.py --company-id 1155
+    python3 scrapers_1000/statement_scraper.py --incremental      # Scrape only the due companies
+    REFRESH_PUBLISH_LAG_DAYS=90 python3 scrapers_1000/statement_scraper.py --incremental
+"""
@@ -0,0 +1,173 @@
+import argparse
+import json
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+import pandas as pd
+from tqdm import tqdm
+from snapshot_archive import latest_snapshots, load_blob
+from statement_parsing import parse_statement_html
+from numeric_parsing import to_float_frame
+from network_capture import parse_statement_payloads, parse_record_payloads
+from profile_parsing import (
+    MANAGEMENT_SELECTOR, OWNERSHIP_SELECTOR, TOP10_SELECTOR, INSIDER_SELECTOR,
+    MANAGEMENT_COLUMNS, OWNERSHIP_COLUMNS, HOLDER_COLUMNS,
+    OWNERSHIP_JSON_FIELDS, HOLDER_JSON_FIELDS,
+    parse_table_rows_html, parse_profile_overview_html, parse_market_info_html,
+)
+from statement_scraper import STATEMENT_SECTIONS, merge_statement_outputs
+from profile_scraper import OUTPUTS_DIR as PROFILE_OUTPUTS_DIR, combine_all_profile_sections
+from market_capscrape import OUTPUTS_DIR as MARKET_OUTPUTS_DIR, NUMERIC_COLUMNS as MARKET_NUMERIC_COLUMNS, combine_market_outputs
+
+# ─── CONFIG ───
+# Rebuilds the per-company CSVs from outputs/snapshots without opening a browser, so a
+# parser fix can be applied to everything already scraped.
+PROFILE_SECTIONS = {
+    # section: (table selector, DOM columns, JSON field map); None → not a row table
+    "profile": None,
+    "management": (MANAGEMENT_SELECTOR, MANAGEMENT_COLUMNS, None),
+    "ownership": (OWNERSHIP_SELECTOR, OWNERSHIP_COLUMNS, OWNERSHIP_JSON_FIELDS),
+    "top10": (TOP10_SELECTOR, HOLDER_COLUMNS, HOLDER_JSON_FIELDS),
+    "insider": (INSIDER_SELECTOR, HOLDER_COLUMNS, HOLDER_JSON_FIELDS),
+}
+ALL_SECTIONS = list(STATEMENT_SECTIONS) + list(PROFILE_SECTIONS) + ["market"]
+
+
+# ─── PARSERS ───
+def _split(entries):
+    json_entries = [e for e in entries if e["kind"] == "json"]
+    html_entries = [e for e in entries if e["kind"] == "html"]
+    return json_entries, html_entries
+
+def _html(entry) -> str:
+    return load_blob(entry["sha256"]).decode("utf-8")
+
+def parse_statement(section, cid, entries) -> pd.DataFrame:
+    json_entries, html_entries = _split(entries)
+    url = entries[0].get("url")
+    if json_entries:
+        df = parse_statement_payloads(json.loads(load_blob(json_entries[-1]["sha256"])), cid, url)
+        if not df.empty:
+            return df
+    if html_entries:
+        return parse_statement_html(_html(html_entries[-1]), cid, url)
+    return pd.DataFrame()
+
+def parse_profile_section(section, cid, entries) -> pd.DataFrame:
+    json_entries, html_entries = _split(entries)
+    if section == "profile":
+        return parse_profile_overview_html(_html(html_entries[-1])) if html_entries else pd.DataFrame()
+
+    selector, columns, json_fields = PROFILE_SECTIONS[section]
+    if json_entries and json_fields:
+        df = parse_record_payloads(json.loads(load_blob(json_entries[-1]["sha256"])), json_fields)
+        if not df.empty:
+            return df
+    # Management is archived once per table page (part = page index)
+    pages = [parse_table_rows_html(_html(e), selector, columns) for e in html_entries]
+    pages = [df for df in pages if not df.empty]
+    return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+
+def parse_market(section, cid, entries) -> pd.DataFrame:
+    _, html_entries = _split(entries)
+    if not html_entries:
+        return pd.DataFrame()
+    info = parse_market_info_html(_html(html_entries[-1]))
+    if not info["market_cap_mil"] and not info["volume"]:
+        return pd.DataFrame()
+    return to_float_frame(pd.DataFrame([{
+        "company_id": cid.zfill(4),
+        "market_cap_mil": info["market_cap_mil"],
+        "volume": info["volume"],
+        "source_url": html_entries[-1].get("url"),
+    }]), MARKET_NUMERIC_COLUMNS)
+
+def output_path(section: str, cid: str) -> Path:
+    if section in STATEMENT_SECTIONS:
+        return STATEMENT_SECTIONS[section]["outputs_dir"] / f"{cid}.csv"
+    if section in PROFILE_SECTIONS:
+        return PROFILE_OUTPUTS_DIR / f"{cid}.{section}.csv"
+    return MARKET_OUTPUTS_DIR / f"{cid}.csv"
+
+# Runs in a worker process: parse one (section, company) and write its CSV.
+# Empty results are not written, so a bad snapshot never clobbers a good CSV.
+def reparse_one(task):
+    section, cid, entries = task
+    try:
+        if section in STATEMENT_SECTIONS:
+            df = parse_statement(section, cid, entries)
+        elif section in PROFILE_SECTIONS:
+            df = parse_profile_section(section, cid, entries)
+        else:
+            df = parse_market(section, cid, entries)
+    except Exception as e:
+        return section, cid, None, str(e)
+
+    if df.empty:
+        return section, cid, 0, None
+    df.to_csv(output_path(section, cid), index=False)
+    return section, cid, len(df), None
+
+
+# ─── MAIN FUNCTION ───
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-company CSVs from archived page snapshots (no browser).")
+    parser.add_argument(
+        "--section", choices=ALL_SECTIONS + ["all"], default="all",
+        help="Which section to reparse (default: all)."
+    )
+    parser.add_argument(
+        "--company-id", type=str,
+        help="If set, reparse only this company ID."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=max(1, cpu_count() - 1),
+        help="Parser processes (default: CPU count - 1)."
+    )
+    args = parser.parse_args()
+
+    sections = ALL_SECTIONS if args.section == "all" else [args.section]
+    snapshots = latest_snapshots(sections, args.company_id)
+    tasks = [(section, cid, entries) for section, by_cid in snapshots.items() for cid, entries in by_cid.items()]
+    if not tasks:
+        print("⚠️ No snapshots found to reparse.")
+        return
+
+    print(f"🧩 Reparsing {len(tasks)} snapshots with {args.workers} worker(s)")
+    written, empty, failed = 0, [], []
+    with Pool(processes=max(1, args.workers)) as pool:
+        for section, cid, rows, error in tqdm(pool.imap_unordered(reparse_one, tasks, chunksize=8),
+                                              total=len(tasks), desc="Reparsing"):
+            if error:
+                failed.append((section, cid, error))
+            elif rows:
+                written += 1
+            else:
+                empty.append((section, cid))
+
+    print(f"✅ Wrote {written} CSVs, {len(empty)} snapshots parsed empty, {len(failed)} failed")
+    for section, cid, error in failed[:20]:
+        print(f"❌ {section} {cid}: {error}")
+
+    # ─── RE-MERGE COMBINED FILES ───
+    touched = set(snapshots)
+    if touched & set(STATEMENT_SECTIONS):
+        merge_statement_outputs()
+    if touched & set(PROFILE_SECTIONS):
+        combine_all_profile_sections()
+    if "market" in touched:
+        combine_market_outputs()
+
+
+if __name__ == "__main__":
+    main()
+
+"""
+Usage:
+    python3 scrapers_1000/reparse.py                                # Everything in the archive
+    python3 scrapers_1000/reparse.py --section balance --workers 8  # One section (balance_quarterly for the quarterly table)
+    python3 scrapers_1000/reparse.py --company-id 0051              # Single company mode
+
+Reads the latest visit per company/section from outputs/snapshots (see snapshot_archive.py),
+preferring captured JSON over HTML, and writes to the same per-company folders and combined
+files as the scrapers.
+"""
@@ -0,0 +1,206 @@
+import os
+import weakref
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+from rate_limiter import HostRateLimiter
+from site_config import BASE_URL, is_bursa_host, is_live, rebase
+
+# ─── CONFIG ───
+# We only ever read text, so anything that paints pixels is dead weight.
+DEFAULT_BLOCKED_TYPES = {"image", "font", "media"}
+
+# Analytics / ads / session-replay hosts seen on bursamalaysia.com pages (suffix match).
+DEFAULT_DENY_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "hotjar.io",
+    "clarity.ms",
+    "scorecardresearch.com",
+    "newrelic.com",
+    "nr-data.net",
+    "cloudflareinsights.com",
+    "tiktok.com",
+    "linkedin.com",
+    "licdn.com",
+    "twitter.com",
+    "ads-twitter.com",
+)
+
+# Never blocked, whatever their resource type (suffix match).
+DEFAULT_ALLOW_HOSTS = ()
+
+# Requests that count against the shared per-host budget (see rate_limiter.py). Static assets
+# come from caches/CDNs; page loads and API calls are what Bursa actually has to serve.
+RATE_LIMITED_HOSTS = ("bursamalaysia.com",)
+RATE_LIMITED_TYPES = {"document", "xhr", "fetch"}
+
+# HAR replay: BURSA_HAR=fixtures/1155.har answers every request from the recording and aborts
+# anything it doesn't have, so a scraper runs with no network at all. BURSA_HAR_MODE=record
+# writes the HAR instead (one context per file: record a single --company-id at a time).
+ENV_HAR = "BURSA_HAR"
+ENV_HAR_MODE = "BURSA_HAR_MODE"
+
+
+def _host_matches(host: str, suffixes: Iterable[str]) -> bool:
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+
+# ─── ROUTING POLICY ───
+# One policy per scraper run. Install it on every context (BrowserPool does this when given
+# `routing=`), then print policy.summary() at the end of the run.
+#
+#   policy = RoutingPolicy("market_capscrape")
+#   await policy.install(context)
+class RoutingPolicy:
+    def __init__(self, name: str, block_types: Optional[Iterable[str]] = None,
+                 deny_hosts: Iterable[str] = (), allow_hosts: Iterable[str] = (),
+                 allow_types: Iterable[str] = (), limiter: Optional[HostRateLimiter] = None,
+                 har_path: Optional[Path] = None, har_record: bool = False):
+        self.name = name
+        self.limiter = limiter
+        self.har_path = Path(har_path) if har_path else None
+        self.har_record = har_record
+        self.block_types = (set(DEFAULT_BLOCKED_TYPES) if block_types is None else set(block_types)) - set(allow_types)
+        self.deny_hosts = tuple(DEFAULT_DENY_HOSTS) + tuple(deny_hosts)
+        self.allow_hosts = tuple(DEFAULT_ALLOW_HOSTS) + tuple(allow_hosts)
+
+        self.blocked = Counter()         # resource_type → blocked request count
+        self.blocked_hosts = Counter()   # host → blocked request count
+        self.allowed = 0
+        self.allowed_bytes = 0           # response bytes actually downloaded
+        self.redirected = 0              # bursamalaysia.com requests answered by BURSA_BASE_URL
+        self._limiter_waits = weakref.WeakKeyDictionary()   # BrowserContext → seconds held by the limiter
+
+    def should_block(self, request) -> bool:
+        host = urlparse(request.url).hostname or ""
+        if _host_matches(host, self.allow_hosts):
+            return False
+        if request.resource_type in self.block_types:
+            return True
+        return _host_matches(host, self.deny_hosts)
+
+    async def handle(self, route):
+        request = route.request
+        if self.should_block(request):
+            self.blocked[request.resource_type] += 1
+            self.blocked_hosts[urlparse(request.url).hostname or ""] += 1
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed += 1
+            if self.limiter is not None and self._is_rate_limited(request):
+                waited = await self.limiter.acquire()
+                if waited:
+                    self._charge_wait(request, waited)
+            if not is_live() and is_bursa_host(urlparse(request.url).hostname or ""):
+                await self._redirect(route)
+            else:
+                await route.continue_()
+
+    # Absolute bursamalaysia.com URLs inside a page served by the mock site (XHRs, scripts)
+    # are fetched from the configured base instead, so nothing leaks to the live host
+    async def _redirect(self, route):
+        try:
+            response = await route.fetch(url=rebase(route.request.url))
+        except Exception:
+            await route.abort("connectionfailed")
+            return
+        self.redirected += 1
+        await route.fulfill(response=response)
+
+    def _charge_wait(self, request, waited: float):
+        try:
+            context = request.frame.page.context
+        except Exception:
+            return  # Service worker requests have no frame
+        self._limiter_waits[context] = self._limiter_waits.get(context, 0.0) + waited
+
+    # Seconds this context's requests spent queued on the limiter since the last call
+    def take_limiter_wait(self, context) -> float:
+        return self._limiter_waits.pop(context, 0.0)
+
+    def _is_rate_limited(self, request) -> bool:
+        host = urlparse(request.url).hostname or ""
+        return request.resource_type in RATE_LIMITED_TYPES and _host_matches(host, RATE_LIMITED_HOSTS)
+
+    async def _on_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+            self.allowed_bytes += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        except Exception:
+            pass  # Page/context already closed
+
+    # `target` is a BrowserContext (preferred: covers every page and popup) or a Page.
+    async def install(self, target):
+        await target.route("**/*", self.handle)
+        target.on("requestfinished", self._on_request_finished)
+        if self.har_path is not None:
+            # Registered last so it answers first; in replay mode a request missing from the HAR
+            # is aborted rather than sent to the network
+            await target.route_from_har(
+                self.har_path, update=self.har_record, update_content="embed" if self.har_record else None,
+                not_found="fallback" if self.har_record else "abort")
+
+    def summary(self) -> str:
+        total_blocked = sum(self.blocked.values())
+        by_type = ", ".join(f"{t}={n}" for t, n in self.blocked.most_common()) or "none"
+        top_hosts = ", ".join(f"{h}={n}" for h, n in self.blocked_hosts.most_common(5)) or "none"
+        text = (
+            f"🛡️ [{self.name}] blocked {total_blocked} requests ({by_type}); "
+            f"allowed {self.allowed} requests, {self.allowed_bytes / 1_048_576:.1f} MB downloaded; "
+            f"top blocked hosts: {top_hosts}"
+        )
+        if self.redirected:
+            text += f"; {self.redirected} Bursa requests served from {BASE_URL}"
+        if self.har_path is not None:
+            text += f"; HAR {'recorded to' if self.har_record else 'replayed from'} {self.har_path}"
+        if self.limiter is not None:
+            text += "\n" + self.limiter.summary()
+        return text
+
+
+# ─── PER-SCRAPER POLICIES ───
+# Allow/deny overrides per entry point. Stylesheets are left alone everywhere because several
+# scrapers rely on is_visible() / role queries that need layout.
+#
+# Server-sent price streams, web app manifests and subtitle tracks never hold anything we read.
+# The streams also keep "networkidle" from settling, which the JSON capture waits for.
+NON_CONTENT_TYPES = ("eventsource", "manifest", "texttrack")
+# Video embeds on the company and stock pages; nothing we scrape lives in them
+EMBED_HOSTS = ("youtube.com", "youtube-nocookie.com", "ytimg.com", "vimeo.com")
+
+# --capture-json parses the site's own XHR/fetch responses, so those types are allowed even
+# if a default or override would block them
+_JSON_CAPTURE = {"block_types": DEFAULT_BLOCKED_TYPES | set(NON_CONTENT_TYPES), "allow_types": ("xhr", "fetch")}
+
+SCRAPER_POLICIES = {
+    "bursa_url_finder": _JSON_CAPTURE,          # Reads the search listing's JSON
+    "statement_scraper": _JSON_CAPTURE,
+    "income_statement": _JSON_CAPTURE,
+    "balance_sheet": _JSON_CAPTURE,
+    "cash_flow": _JSON_CAPTURE,
+    "profile_scraper": {**_JSON_CAPTURE, "deny_hosts": EMBED_HOSTS},
+    # Reads two numbers from the quote header, which may be kept current over an event
+    # stream, so that stays; it never needs the JSON, so nothing is force-allowed
+    "market_capscrape": {"block_types": DEFAULT_BLOCKED_TYPES | {"manifest", "texttrack"},
+                         "deny_hosts": EMBED_HOSTS},
+}
+
+# Every policy paces bursamalaysia.com requests through the shared host limiter
+# (budget from BURSA_RPS / BURSA_BURST, set by the orchestrator's --rps).
+def policy_for(scraper_name: str) -> RoutingPolicy:
+    return RoutingPolicy(
+        scraper_name,
+        limiter=HostRateLimiter.from_env(),
+        har_path=os.getenv(ENV_HAR) or None,
+        har_record=os.getenv(ENV_HAR_MODE) == "record",
+        **SCRAPER_POLICIES.get(scraper_name, {}),
+    )
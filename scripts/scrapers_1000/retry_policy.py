@@ -0,0 +1,361 @@
+import asyncio
+import fcntl
+import json
+import os
+import random
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+from site_config import rebase
+from tracing import span, trace_attributes
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("retry_policy")
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 1.0        # Seconds; attempt n waits up to base * 2^(n-1) before retrying
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_COMPANY_DEADLINE = 240  # Seconds one company may spend on attempts and backoff
+
+DEFAULT_ERROR_RATE = 0.5        # Breaker opens when this share of recent calls to a host fail...
+DEFAULT_MIN_CALLS = 10          # ...out of at least this many...
+DEFAULT_WINDOW = 120            # ...made in the last this-many seconds
+DEFAULT_COOLDOWN = 60           # First pause; doubles every time the probe after it fails
+MAX_COOLDOWN = 600
+POLL_SECONDS = 2.0              # How often paused callers re-check a half-open breaker
+
+ENV_ATTEMPTS = "RETRY_ATTEMPTS"
+ENV_BASE_DELAY = "RETRY_BASE_DELAY"
+ENV_MAX_DELAY = "RETRY_MAX_DELAY"
+ENV_DEADLINE = "COMPANY_DEADLINE_SECONDS"
+ENV_ERROR_RATE = "BREAKER_ERROR_RATE"
+ENV_MIN_CALLS = "BREAKER_MIN_CALLS"
+ENV_WINDOW = "BREAKER_WINDOW_SECONDS"
+ENV_COOLDOWN = "BREAKER_COOLDOWN_SECONDS"
+
+BURSA_HOSTNAME = "my.bursamalaysia.com"
+
+_deadline = ContextVar("company_deadline", default=None)
+
+
+# Raised when a company's time budget runs out before another attempt could start.
+# The name contains "Timeout" on purpose so slot/journal classification treats it as one.
+class DeadlineTimeout(TimeoutError):
+    pass
+
+# A response that means the host itself is struggling (5xx, 429), not a missing page
+class HostUnavailable(Exception):
+    pass
+
+
+# ─── BACKOFF ───
+class RetryPolicy:
+    def __init__(self, attempts: int = DEFAULT_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            attempts=int(os.getenv(ENV_ATTEMPTS, DEFAULT_ATTEMPTS)),
+            base_delay=float(os.getenv(ENV_BASE_DELAY, DEFAULT_BASE_DELAY)),
+            max_delay=float(os.getenv(ENV_MAX_DELAY, DEFAULT_MAX_DELAY)),
+        )
+
+    # "Full jitter": uniform in [0, capped exponential], so workers that failed together
+    # don't all come back at the same instant
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+# Click sequences (the Financials/Statements dance): two tries with a short pause and no
+# breaker, since a button that didn't render says nothing about the host being down
+NAVIGATION_RETRY = RetryPolicy(attempts=2, base_delay=1.0, max_delay=2.0)
+
+# ─── DEADLINE ───
+# One per company, set by the scraper wrapper and picked up implicitly by every retry loop
+# (and page load timeout) underneath it. Time spent paused on an open breaker is not charged.
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires = time.monotonic() + seconds
+        self._timeout = None     # The asyncio.timeout enforcing it, while enforce_deadline() is active
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def extend(self, seconds: float):
+        self.expires += seconds
+        if self._timeout is not None:
+            self._timeout.reschedule(asyncio.get_running_loop().time() + self.remaining())
+
+    # Caps a Playwright timeout (ms) to what is left
+    def clamp_ms(self, timeout_ms: float) -> float:
+        return max(1000.0, min(timeout_ms, self.remaining() * 1000))
+
+@contextmanager
+def company_deadline(seconds: Optional[float] = None):
+    seconds = seconds if seconds is not None else float(os.getenv(ENV_DEADLINE, DEFAULT_COMPANY_DEADLINE))
+    token = _deadline.set(Deadline(seconds))
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
+
+def current_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+# The hard cap: the retry loops only look at the deadline between attempts, so a page load or
+# click that hangs inside one is cancelled here instead, once the company's budget is gone,
+# and surfaces as DeadlineTimeout. Breaker pauses push it back like they do the deadline.
+@asynccontextmanager
+async def enforce_deadline(name: str = "company"):
+    deadline = current_deadline()
+    if deadline is None or deadline._timeout is not None:  # No budget, or an outer block enforces it
+        yield
+        return
+    try:
+        async with asyncio.timeout(deadline.remaining()) as timeout:
+            deadline._timeout = timeout
+            try:
+                yield
+            finally:
+                deadline._timeout = None
+    except TimeoutError as e:
+        if isinstance(e, DeadlineTimeout) or not timeout.expired():
+            raise
+        raise DeadlineTimeout(f"{name}: company deadline exceeded") from e
+
+
+# ─── CIRCUIT BREAKER ───
+# Per target host, shared by every scraper process on the machine through a small flock'd JSON
+# file (same approach as rate_limiter.py). Closed: calls go through and their outcomes are
+# counted over a sliding window. Once the failure rate crosses the threshold it opens and every
+# caller in the fleet pauses for the cooldown instead of timing out company after company.
+# After the cooldown one caller is let through as a probe: success closes the breaker, failure
+# reopens it with a doubled cooldown.
+class CircuitBreaker:
+    def __init__(self, host: str, error_rate: float = DEFAULT_ERROR_RATE, min_calls: int = DEFAULT_MIN_CALLS,
+                 window: float = DEFAULT_WINDOW, cooldown: float = DEFAULT_COOLDOWN,
+                 state_path: Optional[Path] = None):
+        self.host = host
+        self.error_rate = error_rate
+        self.min_calls = max(1, min_calls)
+        self.window = window
+        self.cooldown = cooldown
+        self.state_path = Path(state_path or Path(tempfile.gettempdir()) / f"bursa_breaker_{host}.json")
+        self.lock_path = self.state_path.with_suffix(".lock")
+        self.paused = 0.0
+
+    @classmethod
+    def from_env(cls, host: str) -> "CircuitBreaker":
+        return cls(
+            host,
+            error_rate=float(os.getenv(ENV_ERROR_RATE, DEFAULT_ERROR_RATE)),
+            min_calls=int(os.getenv(ENV_MIN_CALLS, DEFAULT_MIN_CALLS)),
+            window=float(os.getenv(ENV_WINDOW, DEFAULT_WINDOW)),
+            cooldown=float(os.getenv(ENV_COOLDOWN, DEFAULT_COOLDOWN)),
+        )
+
+    def _update(self, fn):
+        with open(self.lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(self.state_path.read_text())
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                state.setdefault("state", "closed")
+                state.setdefault("events", [])
+                state.setdefault("cooldown", self.cooldown)
+                result = fn(state, time.time())
+                self.state_path.write_text(json.dumps(state))
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # 0 → go ahead (possibly as the half-open probe); otherwise seconds to wait and ask again
+    def _check(self) -> float:
+        def check(state, now):
+            if state["state"] == "closed":
+                return 0.0
+            if state["state"] == "open":
+                reopen_at = state["opened_at"] + state["cooldown"]
+                if now < reopen_at:
+                    return reopen_at - now
+                state["state"] = "half_open"
+            # Half-open: one probe at a time; a probe that never reports back expires
+            if now >= state.get("probe_until", 0):
+                state["probe_until"] = now + state["cooldown"]
+                return 0.0
+            return min(POLL_SECONDS, state["probe_until"] - now)
+        return self._update(check)
+
+    async def record_async(self, ok: bool):
+        await asyncio.to_thread(self.record, ok)
+
+    def record(self, ok: bool):
+        def record(state, now):
+            if state["state"] == "half_open":
+                if ok:
+                    state.update(state="closed", events=[], cooldown=self.cooldown, probe_until=0)
+                    return f"🟢 [{self.host}] circuit closed, resuming"
+                state.update(state="open", opened_at=now, probe_until=0,
+                             cooldown=min(MAX_COOLDOWN, state["cooldown"] * 2))
+                return f"🔴 [{self.host}] probe failed, pausing {state['cooldown']:.0f}s"
+            if state["state"] == "open":
+                return None  # Stragglers started before it opened
+
+            events = [e for e in state["events"] if e[0] >= now - self.window] + [[now, bool(ok)]]
+            state["events"] = events
+            failures = sum(not e[1] for e in events)
+            if len(events) >= self.min_calls and failures / len(events) >= self.error_rate:
+                state.update(state="open", opened_at=now, events=[], cooldown=self.cooldown)
+                return (f"🔴 [{self.host}] circuit open: {failures}/{len(events)} calls failed in "
+                        f"{self.window:.0f}s, pausing the fleet {self.cooldown:.0f}s")
+            return None
+        message = self._update(record)
+        if message:
+            log.warning("%s", message)
+
+    # The flock'd file I/O runs on a thread: another process holding the lock must not stall
+    # every coroutine on this event loop
+    async def wait(self) -> float:
+        waited = 0.0
+        while True:
+            pause = await asyncio.to_thread(self._check)
+            if pause == 0:
+                self.paused += waited
+                return waited
+            waited += pause
+            await asyncio.sleep(pause)
+
+    def wait_sync(self) -> float:
+        waited = 0.0
+        while True:
+            pause = self._check()
+            if pause == 0:
+                self.paused += waited
+                return waited
+            waited += pause
+            time.sleep(pause)
+
+    # Called by the orchestrator before a run so an outage from last time doesn't carry over
+    def reset(self):
+        for path in (self.state_path, self.lock_path):
+            path.unlink(missing_ok=True)
+
+    def summary(self) -> str:
+        return f"🧯 Breaker [{self.host}]: paused {self.paused:.1f}s in total"
+
+
+_breakers = {}
+
+def breaker_for(host: str) -> CircuitBreaker:
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker.from_env(host)
+    return _breakers[host]
+
+
+# ─── RETRY LOOPS ───
+# `fn` is a zero-argument callable making one attempt. Exceptions are retried; so is a result
+# for which `retry_if(result)` is true (the last such result is returned when attempts run out).
+# `on_retry(attempt, error)` runs between attempts, e.g. to click back to a known page state.
+# With a breaker, each attempt waits for it to be closed and reports whether it raised.
+#
+#   url = await retry_async(lambda: search(page, code), breaker=breaker_for(BURSA_HOSTNAME),
+#                           retry_if=lambda url: url is None)
+async def retry_async(fn, policy: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None,
+                      retry_if=None, on_retry=None, name: str = "call"):
+    policy = policy or RetryPolicy.from_env()
+    deadline = current_deadline()
+    result = None
+    for attempt in range(1, policy.attempts + 1):
+        if breaker is not None:
+            paused = await breaker.wait()
+            if deadline is not None:
+                deadline.extend(paused)
+        if deadline is not None and deadline.remaining() <= 0:
+            raise DeadlineTimeout(f"{name}: company deadline exceeded before attempt {attempt}")
+        try:
+            with trace_attributes(attempt=attempt):
+                result = await fn()
+        except Exception as e:
+            if breaker is not None:
+                await breaker.record_async(False)
+            if not _another_attempt(policy, deadline, attempt):
+                raise
+            log.warning("⚠️ %s attempt %s/%s failed: %s", name, attempt, policy.attempts, e)
+            error = e
+        else:
+            if breaker is not None:
+                await breaker.record_async(True)
+            if retry_if is None or not retry_if(result) or not _another_attempt(policy, deadline, attempt):
+                return result
+            error = None
+        if on_retry is not None:
+            await on_retry(attempt, error)
+        await asyncio.sleep(_backoff(policy, deadline, attempt))
+    return result
+
+def retry_call(fn, policy: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None,
+               retry_if=None, name: str = "call"):
+    policy = policy or RetryPolicy.from_env()
+    deadline = current_deadline()
+    result = None
+    for attempt in range(1, policy.attempts + 1):
+        if breaker is not None:
+            paused = breaker.wait_sync()
+            if deadline is not None:
+                deadline.extend(paused)
+        if deadline is not None and deadline.remaining() <= 0:
+            raise DeadlineTimeout(f"{name}: deadline exceeded before attempt {attempt}")
+        try:
+            with trace_attributes(attempt=attempt):
+                result = fn()
+        except Exception as e:
+            if breaker is not None:
+                breaker.record(False)
+            if not _another_attempt(policy, deadline, attempt):
+                raise
+            log.warning("⚠️ %s attempt %s/%s failed: %s", name, attempt, policy.attempts, e)
+        else:
+            if breaker is not None:
+                breaker.record(True)
+            if retry_if is None or not retry_if(result) or not _another_attempt(policy, deadline, attempt):
+                return result
+        time.sleep(_backoff(policy, deadline, attempt))
+    return result
+
+def _another_attempt(policy: RetryPolicy, deadline: Optional[Deadline], attempt: int) -> bool:
+    return attempt < policy.attempts and (deadline is None or deadline.remaining() > 0)
+
+def _backoff(policy: RetryPolicy, deadline: Optional[Deadline], attempt: int) -> float:
+    delay = policy.delay(attempt)
+    return min(delay, deadline.remaining()) if deadline is not None else delay
+
+
+# ─── PAGE LOADS ───
+# page.goto with backoff, the host's breaker and the company deadline, after moving the URL onto
+# the configured base (site_config.py). A 5xx/429 response counts as a failure even though
+# Playwright itself doesn't raise on it.
+async def goto(page, url: str, timeout: float = 60000, **kwargs):
+    url = rebase(url)  # Live URLs from the CSVs → BURSA_BASE_URL when pointed at the mock site
+    breaker = breaker_for(urlparse(url).hostname or BURSA_HOSTNAME)
+
+    async def attempt():
+        deadline = current_deadline()
+        with span("page.goto", url=url) as trace:
+            response = await page.goto(url, timeout=deadline.clamp_ms(timeout) if deadline else timeout, **kwargs)
+            if response is not None:
+                trace.set_attribute("http.status_code", response.status)
+        if response is not None and (response.status >= 500 or response.status == 429):
+            raise HostUnavailable(f"HTTP {response.status} from {url}")
+        return response
+
+    return await retry_async(attempt, breaker=breaker, name=f"goto {url}")
@@ -0,0 +1,204 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from tracing import span
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("run_journal")
+BASE_DIR = Path(__file__).resolve().parent
+JOURNAL_PATH = Path(os.getenv("RUN_JOURNAL", BASE_DIR / "outputs" / "run_journal.jsonl"))
+ENV_RESUME = "RUN_JOURNAL_RESUME"    # Default for --resume; the orchestrator sets it for child scrapers
+
+SUCCESS = "success"
+NO_DATA = "no_data"
+TIMEOUT = "timeout"
+SELECTOR_MISSING = "selector_missing"
+ERROR = "error"
+PARTIAL = "partial"     # Rows came back, but a section the visit wanted failed (see failed_sections)
+FAILURE_CLASSES = (NO_DATA, TIMEOUT, SELECTOR_MISSING, ERROR, PARTIAL)
+
+_current = ContextVar("run_journal_attempt", default=None)
+
+
+# Raised by the scrapers when the page loaded but the buttons/tables they need never appeared
+class SelectorMissing(Exception):
+    pass
+
+
+def classify(exc: BaseException) -> str:
+    if isinstance(exc, SelectorMissing):
+        return SELECTOR_MISSING
+    message = str(exc)
+    if "Timeout" in type(exc).__name__:
+        # Playwright's locator waits log "waiting for locator(...)"/"get_by_role(...)"; a slow
+        # goto logs "navigating to ..." instead, which is a real timeout
+        if "waiting for" in message and any(k in message for k in ("locator", "get_by", "selector")):
+            return SELECTOR_MISSING
+        return TIMEOUT
+    return ERROR
+
+
+# ─── ATTEMPT ───
+# One company, one try. Scrape functions deeper in the call stack update it through
+# journal_phase()/journal_error() without it being threaded through every signature.
+class Attempt:
+    def __init__(self, scraper: str, company_id: str):
+        self.scraper = scraper
+        self.company_id = str(company_id)
+        self.started = time.time()
+        self.phase = "launch"       # Wrappers open a browser context/page first
+        self.phases = {}            # phase → seconds spent in it (benchmarks/ reads these)
+        self._phase_mark = time.monotonic()
+        self.rows = 0
+        self.error: Optional[BaseException] = None
+        self.failed_sections = {}   # section → failure class, for scrapers that read several per visit
+
+    def enter(self, phase: str):
+        now = time.monotonic()
+        self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self._phase_mark
+        self.phase, self._phase_mark = phase, now
+
+    def outcome(self) -> str:
+        if self.rows:
+            return PARTIAL if self.failed_sections else SUCCESS
+        if self.error is not None:
+            return classify(self.error)
+        return NO_DATA
+
+def journal_phase(name: str):
+    attempt = _current.get()
+    if attempt is not None:
+        attempt.enter(name)
+
+# Scrape functions that swallow their own exceptions call this so the class isn't lost. Passing
+# the section it happened in keeps a visit that saved other sections from reading as a success.
+def journal_error(exc: BaseException, section: Optional[str] = None):
+    attempt = _current.get()
+    if attempt is not None:
+        attempt.error = exc
+        if section is not None:
+            attempt.failed_sections[section] = classify(exc)
+
+@contextmanager
+def journal_attempt(scraper: str, company_id: str):
+    attempt = Attempt(scraper, company_id)
+    token = _current.set(attempt)
+    try:
+        # Root span for the company; everything traced inside inherits its company_id
+        with span("company", scraper=scraper, company_id=attempt.company_id) as trace:
+            try:
+                yield attempt
+            except Exception as e:
+                attempt.error = e
+                raise
+            finally:
+                trace.set_attribute("outcome", attempt.outcome())
+                trace.set_attribute("rows", attempt.rows)
+    finally:
+        _current.reset(token)
+        attempt.enter(attempt.phase)  # Close the timing of the phase we ended in
+        ended = time.time()
+        append_entry({
+            "scraper": scraper,
+            "company_id": attempt.company_id,
+            "started_at": _iso(attempt.started),
+            "ended_at": _iso(ended),
+            "duration_s": round(ended - attempt.started, 2),
+            "phase": attempt.phase,
+            "outcome": attempt.outcome(),
+            "rows": attempt.rows,
+            "phases": {name: round(seconds, 3) for name, seconds in attempt.phases.items()},
+            "error": str(attempt.error)[:500] if attempt.error is not None else None,
+            "failed_sections": attempt.failed_sections,
+        })
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+# ─── JOURNAL FILE ───
+# Append-only JSONL, one line per finished attempt. An attempt cut off by a crash leaves
+# no line, so it reads as "never attempted" and is picked up again.
+def append_entry(entry: dict):
+    JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)  # Worker processes share the file
+        try:
+            f.write(json.dumps(entry) + "\n")
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def read_journal(scrapers=None):
+    if not JOURNAL_PATH.exists():
+        return
+    with open(JOURNAL_PATH, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if scrapers is None or entry.get("scraper") in scrapers:
+                yield entry
+
+def latest_outcomes(scraper: str) -> dict:
+    return {entry["company_id"]: entry for entry in read_journal((scraper,))}
+
+# company_id → sections its last attempt failed on (entries from before sections were journalled
+# have none)
+def failed_sections(scraper: str) -> dict:
+    return {cid: set(entry.get("failed_sections") or ()) for cid, entry in latest_outcomes(scraper).items()}
+
+
+# ─── RERUN SELECTION ───
+def add_journal_args(parser):
+    parser.add_argument(
+        "--resume", action="store_true", default=os.getenv(ENV_RESUME) == "1",
+        help="Skip companies whose last journalled attempt succeeded or found no data; retry the rest (default: $RUN_JOURNAL_RESUME=1)."
+    )
+    parser.add_argument(
+        "--only-failed", action="store_true",
+        help="Only rerun companies whose last journalled attempt failed (even if a CSV exists)."
+    )
+    parser.add_argument(
+        "--failed-class", action="append", choices=FAILURE_CLASSES,
+        help="With --only-failed (implied), only these outcome classes. Repeatable."
+    )
+
+# `pending` is the usual "no CSV yet" list, `everything` every company the scraper knows.
+def select_for_rerun(scraper: str, args, pending: list, everything: list) -> list:
+    only_failed = getattr(args, "only_failed", False) or getattr(args, "failed_class", None)
+    resume = getattr(args, "resume", False)
+    if not (only_failed or resume):
+        return pending
+
+    latest = latest_outcomes(scraper)
+    outcome = lambda entry: latest.get(str(entry["company_id"]), {}).get("outcome")
+    if only_failed:
+        classes = set(args.failed_class or FAILURE_CLASSES)
+        selected = [entry for entry in everything if outcome(entry) in classes]
+        log.info("🔁 [%s] %s companies last failed with %s", scraper, len(selected), ', '.join(sorted(classes)))
+        return selected
+
+    selected = [entry for entry in pending if outcome(entry) not in (SUCCESS, NO_DATA)]
+    log.info("⏯️ [%s] resuming: %s already settled, %s to go", scraper, len(pending) - len(selected), len(selected))
+    return selected
+
+# --job-store runs claim from the job table, not from select_for_rerun's list, so the flags are
+# carried over to the table: --only-failed / --failed-class enqueue and reopen just the selected
+# companies, and --resume seeds the ones the journal already settled as done.
+# Returns (entries to enqueue, ids to enqueue as done, entries to reopen).
+def rerun_for_job_store(args, everything: list, pending: list, selected: list, done_ids) -> tuple:
+    done_ids = set(done_ids)
+    if getattr(args, "only_failed", False) or getattr(args, "failed_class", None):
+        return selected, done_ids, selected
+    if getattr(args, "resume", False):
+        kept = {entry["company_id"] for entry in selected}
+        done_ids |= {entry["company_id"] for entry in pending if entry["company_id"] not in kept}
+    return everything, done_ids, []
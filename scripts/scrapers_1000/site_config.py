@@ -0,0 +1,34 @@
+import os
+from urllib.parse import urlparse, urlunparse
+
+# ─── CONFIG ───
+# Where the scrapers send bursamalaysia.com traffic. Defaults are the live site; point them at
+# mock_site.py (e.g. BURSA_BASE_URL=http://127.0.0.1:8765) to run with no network.
+LIVE_BASE_URL = "https://my.bursamalaysia.com"
+LIVE_WWW_BASE_URL = "https://www.bursamalaysia.com"
+BURSA_DOMAIN = "bursamalaysia.com"
+
+ENV_BASE_URL = "BURSA_BASE_URL"
+ENV_WWW_BASE_URL = "BURSA_WWW_BASE_URL"   # Listing directory pages; defaults to BURSA_BASE_URL when that is set
+
+BASE_URL = os.getenv(ENV_BASE_URL, LIVE_BASE_URL).rstrip("/")
+WWW_BASE_URL = os.getenv(ENV_WWW_BASE_URL, os.getenv(ENV_BASE_URL, LIVE_WWW_BASE_URL)).rstrip("/")
+
+
+def is_live() -> bool:
+    return BASE_URL == LIVE_BASE_URL and WWW_BASE_URL == LIVE_WWW_BASE_URL
+
+def is_bursa_host(host: str) -> bool:
+    return host == BURSA_DOMAIN or host.endswith("." + BURSA_DOMAIN)
+
+# Moves a live bursamalaysia.com URL (e.g. a new_url from company_urls.csv) onto the configured
+# base, keeping path and query. Anything else comes back unchanged.
+def rebase(url: str) -> str:
+    if is_live():
+        return url
+    parts = urlparse(url)
+    host = parts.hostname or ""
+    if not is_bursa_host(host):
+        return url
+    base = urlparse(WWW_BASE_URL if host.startswith("www.") else BASE_URL)
+    return urlunparse(parts._replace(scheme=base.scheme, netloc=base.netloc))
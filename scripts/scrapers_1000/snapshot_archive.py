@@ -0,0 +1,123 @@
+import asyncio
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from log_config import get_logger
+
+# ─── CONFIG ───
+log = get_logger("snapshot_archive")
+BASE_DIR = Path(__file__).resolve().parent
+ARCHIVE_DIR = Path(os.getenv("BURSA_SNAPSHOT_DIR", BASE_DIR / "outputs" / "snapshots"))
+BLOB_DIR = ARCHIVE_DIR / "blobs"
+INDEX_PATH = ARCHIVE_DIR / "index.jsonl"
+
+# Set BURSA_SNAPSHOTS=0 to scrape without archiving (e.g. quick single-company checks)
+ENABLED = os.getenv("BURSA_SNAPSHOTS", "1") != "0"
+
+
+# ─── ARCHIVE ───
+# Content-addressed store of what the scrapers saw: every rendered tab (HTML) or captured
+# XHR payload (JSON) is gzipped under blobs/<sha[:2]>/<sha>.gz and indexed in index.jsonl
+# by company_id, section and timestamp. Identical pages are stored once.
+#
+# reparse.py rebuilds the per-company CSVs from here without a browser.
+
+# One id per company page visit, so all tabs/parts of that visit can be found together
+def new_visit_id(company_id: str) -> str:
+    return f"{company_id}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+
+def save_snapshot(company_id: str, section: str, content, kind: str = "html",
+                  url: Optional[str] = None, part: int = 0, visit: Optional[str] = None) -> Optional[str]:
+    if not ENABLED:
+        return None
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    sha = hashlib.sha256(data).hexdigest()
+
+    blob_path = BLOB_DIR / sha[:2] / f"{sha}.gz"
+    if not blob_path.exists():
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(gzip.compress(data))
+        tmp_path.replace(blob_path)  # Atomic, so a reader never sees half a blob
+
+    captured_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    entry = {
+        "company_id": str(company_id),
+        "section": section,
+        "visit": visit or f"{company_id}-{captured_at}",
+        "part": part,              # Page index for paginated tables (management)
+        "kind": kind,
+        "sha256": sha,
+        "url": url,
+        "captured_at": captured_at,
+    }
+    _append_index(entry)
+    return sha
+
+def _append_index(entry: dict):
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    # Several scraper processes append at once; the lock keeps lines whole
+    with open(INDEX_PATH, "a", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(json.dumps(entry) + "\n")
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+# Grabs the rendered page off the event loop's critical path (hashing + gzip run in a thread)
+async def snapshot_page(page, company_id: str, section: str, url: Optional[str] = None,
+                        part: int = 0, visit: Optional[str] = None):
+    if not ENABLED:
+        return None
+    try:
+        html = await page.content()
+        return await asyncio.to_thread(save_snapshot, company_id, section, html, "html", url, part, visit)
+    except Exception as e:
+        log.warning("⚠️ Snapshot failed for %s (%s): %s", company_id, section, e)
+        return None
+
+def load_blob(sha: str) -> bytes:
+    return gzip.decompress((BLOB_DIR / sha[:2] / f"{sha}.gz").read_bytes())
+
+
+# ─── INDEX QUERIES ───
+def read_index() -> list:
+    if not INDEX_PATH.exists():
+        return []
+    entries = []
+    with open(INDEX_PATH, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # Truncated line from a killed process
+    return entries
+
+# Latest visit per (company_id, section) with every part captured during it, HTML and JSON.
+# Returns {section: {company_id: [entries sorted by part, JSON before HTML]}}.
+def latest_snapshots(sections=None, company_id: Optional[str] = None) -> dict:
+    latest = {}
+    for entry in read_index():  # Index is append-only, so later lines are newer visits
+        if sections and entry["section"] not in sections:
+            continue
+        if company_id and entry["company_id"] != company_id:
+            continue
+        key = (entry["section"], entry["company_id"])
+        current = latest.get(key)
+        if current is None or current["visit"] != entry["visit"]:
+            latest[key] = {"visit": entry["visit"], "entries": [entry]}
+        else:
+            current["entries"].append(entry)
+
+    grouped = {}
+    for (section, cid), value in latest.items():
+        by_part = {(e["part"], e["kind"]): e for e in value["entries"]}  # Last write per part wins
+        grouped.setdefault(section, {})[cid] = [by_part[k] for k in sorted(by_part, key=lambda k: (k[0], k[1] != "json"))]
+    return grouped
@@ -0,0 +1,160 @@
+from datetime import datetime
+from collections import defaultdict
+import pandas as pd
+from numeric_parsing import to_float_frame
+from tracing import span
+
+# ─── CONFIG ───
+ROW_SELECTOR = "div.d-flex.stock-table-flex.w-100"
+TABLE_BODY_SELECTOR = "div.stock-table-body"
+
+
+# ─── STATEMENT TABLE PARSER ───
+# Shared by income_statement.py, balance_sheet.py, cash_flow.py and statement_scraper.py.
+# Reads the currently displayed stock table (whichever statement tab is open) and
+# pivots it into one wide row per "<date> Value" / "<date> YoY %" label.
+@span("extract.table")
+async def extract_statement_table(page, company_id: str, url: str) -> pd.DataFrame:
+    rows = page.locator(ROW_SELECTOR)
+    row_count = await rows.count()
+
+    row_lines = []
+    for i in range(row_count):
+        row = rows.nth(i)
+        cells = await row.locator("div").all_inner_texts()
+        cells = [c.strip() for c in cells if c.strip()]
+        if cells:
+            row_lines.append(cells[0].splitlines())
+
+    return parse_statement_lines(row_lines, company_id, url)
+
+
+# Offline twin of extract_statement_table for archived HTML (see snapshot_archive.py /
+# reparse.py). get_text("\n") stands in for the browser's innerText, which splits the
+# same label / value / YoY cells onto separate lines.
+def parse_statement_html(html: str, company_id: str, url: str) -> pd.DataFrame:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    row_lines = []
+    for row in soup.select(ROW_SELECTOR):
+        cell = row.find("div")
+        if cell is None:
+            continue
+        lines = cell.get_text("\n", strip=True).splitlines()
+        if lines:
+            row_lines.append(lines)
+
+    return parse_statement_lines(row_lines, company_id, url)
+
+
+# Turns the text lines of each table row (metric label first, then value / YoY pairs)
+# into the wide frame. The "Amount Standardised" header row supplies the fiscal dates.
+def parse_statement_lines(row_lines: list, company_id: str, url: str) -> pd.DataFrame:
+    raw_data = {}
+    fiscal_years = []
+
+    for lines in row_lines:
+        if not lines:
+            continue
+
+        metric = lines[0]
+        rest = lines[1:]
+
+        if "Amount Standardised" in metric and not fiscal_years:
+            for text in rest:
+                text = text.strip()
+                if text.lower() == "5-year trend":
+                    continue
+                try:
+                    date_label = " ".join(text.strip().split()[-3:])
+                    datetime.strptime(date_label, "%d %b %Y")
+                    fiscal_years.append(date_label)
+                except Exception:
+                    fiscal_years.append(None)
+            continue
+
+        if len(rest) % 2 != 0:
+            rest.append('')  # prevent misalignment on stray '-'
+        """
+        •	Each row should have pairs: one value and one %.
+        •	If the total number is odd, we append an empty string to make it even.
+        •	This avoids zip() mismatches.
+        """
+        value_list = rest[::2]
+        yoy_list = rest[1::2]
+
+        # Normalize dash placeholders
+        value_list = [None if v in {'-', '—'} else v for v in value_list]
+        yoy_list = [None if p in {'-', '—'} else p for p in yoy_list]
+        # 	If you see a dash (- or —), treat it as missing and convert it to None.
+        for j, (val, pct) in enumerate(zip(value_list, yoy_list)):
+            """
+            	You’re looping through value_list and yoy_list together.
+                •	j is the index (0 for latest year, etc).
+                •	val = e.g. "1,200" (actual number).
+                •	pct = e.g. "+5%" (YoY percentage growth).
+
+            
+            """ 
+            if j >= len(fiscal_years) or fiscal_years[j] is None:
+                continue
+            year = fiscal_years[j]
+            """
+            •	Some rows might not align perfectly with years (e.g. missing data).
+	            •	Skip if the j index is beyond your year list, or if the year is None.
+            """
+            val = val.strip() if isinstance(val, str) else val
+            pct = pct.strip() if isinstance(pct, str) else pct
+
+            # Correct misplacement: if val looks like a percentage and pct is empty, swap
+            if isinstance(val, str) and val.endswith('%') and (not pct or not (isinstance(pct, str) and pct.endswith('%'))):
+                val, pct = None, val
+            """
+            •	Sometimes the table puts the YoY % in the wrong cell — into val.
+            •	If val ends in % (but pct is empty or wrong), you:
+            •	Move the % to pct
+            •	Set val = None
+            •	Example fix:
+            val = '+5%' → None
+            pct = ''    → '+5%'
+            
+            •	Only save val if it’s a proper number (not accidentally a %).
+            •	The key is a tuple: e.g. ("2023", "Value")
+            •	The metric might be something like "Revenue" or "Net Income"
+            """         
+
+            if isinstance(val, str) and not val.endswith('%'):
+                raw_data.setdefault((year, "Value"), {})[metric] = val
+            else:
+                raw_data.setdefault((year, "Value"), {})[metric] = None
+
+            if isinstance(pct, str) and pct.endswith('%'):
+                raw_data.setdefault((year, "YoY %"), {})[metric] = pct
+            else:
+                raw_data.setdefault((year, "YoY %"), {})[metric] = None
+
+    return build_wide_frame(raw_data, company_id, url)
+
+
+# Pivots {(date_label, "Value" | "YoY %"): {metric: value}} into the wide per-company frame
+# every statement CSV uses. Also used by the network-capture parser.
+def build_wide_frame(raw_data: dict, company_id: str, url: str) -> pd.DataFrame:
+    wide_data = defaultdict(dict)
+    for (year, typ), metrics in raw_data.items():
+        row_label = f"{year} {typ}"
+        for metric, val in metrics.items():
+            wide_data[row_label][metric] = val
+
+    df = pd.DataFrame.from_dict(wide_data, orient="index").reset_index()
+    df = df.rename(columns={"index": "Year/Type"})
+    df.insert(0, "company_id", str(company_id))
+    df["source_url"] = url
+
+    for col in df.columns:
+        if "Amount Standardised" in col:
+            df = df.drop(columns=[col])
+            break
+
+    # Figures leave here as float64 (NaN = no figure), so every writer and reader downstream gets numbers
+    return to_float_frame(df)
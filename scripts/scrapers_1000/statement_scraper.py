@@ -0,0 +1,332 @@
+import asyncio
+import os
+import random
+from pathlib import Path
+import pandas as pd
+from tqdm.asyncio import tqdm_asyncio
+from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from request_router import policy_for
+from concurrency import AdaptiveConcurrency
+from statement_parsing import extract_statement_table
+from long_format import merge_statement_csvs
+from network_capture import ResponseCapture, parse_statement_payloads
+from snapshot_archive import new_visit_id, snapshot_page
+from work_queue import default_workers, drain_queue, run_sharded
+from job_store import BACKENDS, JobStore, backend_from_env
+from refresh_schedule import RefreshSchedule, incremental_from_env, summarize
+from retry_policy import company_deadline
+from navigator import ANNUAL, INCOME, QUARTERLY, TabNavigator
+from tracing import span
+from run_journal import add_journal_args, classify, failed_sections, journal_attempt, journal_error, journal_phase, rerun_for_job_store, select_for_rerun
+import argparse
+from log_config import get_logger, log_preview
+
+# ─── CONFIG ───
+log = get_logger("statement_scraper")
+BASE_DIR = Path(__file__).resolve().parent
+CSV_PATH = BASE_DIR.parent / "csvs" / "cleaned" / "company_urls.csv"
+COMBINED_DIR = BASE_DIR.parent / "bursa_scrape_sql_inject" / "bursa_data"
+
+# Walked in this order on a single page visit; the keys are navigator.py states.
+STATEMENTS = {
+    "income": {
+        "outputs_dir": BASE_DIR / "outputs" / "income_statement_expanded",
+        "combined_path": COMBINED_DIR / "complete_income_statements.csv",
+    },
+    "balance": {
+        "outputs_dir": BASE_DIR / "outputs" / "balance_sheet_expanded",
+        "combined_path": COMBINED_DIR / "complete_balance_sheets.csv",
+    },
+    "cashflow": {
+        "outputs_dir": BASE_DIR / "outputs" / "cash_flow_expanded",
+        "combined_path": COMBINED_DIR / "complete_cash_flow_statements.csv",
+    },
+}
+
+# The table opens on Quarterly, so each statement's quarterly view is read on the same visit
+# just before it is switched to Annual. Same columns as the annual CSVs, with quarter-end dates.
+# Set STATEMENT_QUARTERLY=0 to skip it.
+QUARTERLY_STATEMENTS = {
+    "income_quarterly": {
+        "outputs_dir": BASE_DIR / "outputs" / "income_statement_quarterly",
+        "combined_path": COMBINED_DIR / "complete_income_statements_quarterly.csv",
+    },
+    "balance_quarterly": {
+        "outputs_dir": BASE_DIR / "outputs" / "balance_sheet_quarterly",
+        "combined_path": COMBINED_DIR / "complete_balance_sheets_quarterly.csv",
+    },
+    "cashflow_quarterly": {
+        "outputs_dir": BASE_DIR / "outputs" / "cash_flow_quarterly",
+        "combined_path": COMBINED_DIR / "complete_cash_flow_statements_quarterly.csv",
+    },
+}
+CAPTURE_QUARTERLY = os.getenv("STATEMENT_QUARTERLY", "1") != "0"
+
+# Every per-company CSV folder this scraper writes (also the snapshot section names)
+STATEMENT_SECTIONS = {**STATEMENTS, **QUARTERLY_STATEMENTS}
+
+for spec in STATEMENT_SECTIONS.values():
+    spec["outputs_dir"].mkdir(parents=True, exist_ok=True)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)...",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_0_0)...",
+    "Mozilla/5.0 (X11; Linux x86_64)..."
+]
+
+# ─── SCRAPE FUNCTION ───
+# Reads the table on screen as `section`. With a ResponseCapture it is parsed from the JSON
+# fetched since `mark` (the tab or period click) and the DOM rows are only read when that
+# JSON can't be parsed.
+async def read_statement(page, company_id: str, url: str, section: str, capture, mark: int, visit: str) -> pd.DataFrame:
+    await snapshot_page(page, company_id, section, url, visit=visit)
+    df = pd.DataFrame()
+    if capture:
+        try:
+            await page.wait_for_load_state("networkidle", timeout=5000)
+        except Exception:
+            pass  # Long-polling widgets can keep the network busy; use what arrived
+        payloads = capture.since(mark)
+        capture.save(company_id, section, payloads, visit=visit)
+        df = parse_statement_payloads(payloads, company_id, url)
+    if df.empty:
+        df = await extract_statement_table(page, company_id, url)
+    return df
+
+# One page load → every requested statement, quarterly then annual. Returns
+# {section: DataFrame}; a statement that fails comes back as an empty DataFrame so the
+# others are still saved.
+async def scrape_company_statements(page, company_id: str, url: str, wanted: list, capture=None) -> dict:
+    results = {key: pd.DataFrame() for key in wanted}
+    if CAPTURE_QUARTERLY:
+        results.update({f"{key}_quarterly": pd.DataFrame() for key in wanted})
+    mark = 0
+    visit = new_visit_id(company_id)
+    try:
+        journal_phase("navigate")
+        nav = TabNavigator(page, url)
+        await nav.open()
+
+        journal_phase("open_statements")
+        await nav.go(INCOME)
+
+        for key, spec in STATEMENTS.items():
+            if key not in wanted:
+                continue
+            journal_phase(key)
+            with span("section", section=key):
+                try:
+                    if nav.state != key:
+                        mark = capture.mark() if capture else 0
+                    await nav.go(key)
+                    if CAPTURE_QUARTERLY:
+                        quarterly = f"{key}_quarterly"
+                        try:
+                            if await nav.ensure_period(QUARTERLY):
+                                results[quarterly] = await read_statement(page, company_id, url, quarterly, capture, mark, visit)
+                            else:
+                                log.warning("⚠️ No Quarterly view of %s for company_id %s", key, company_id)
+                        except Exception as e:
+                            journal_error(e, quarterly)
+                            log.warning("⚠️ Failed %s statement for company_id %s: %s", quarterly, company_id, e)
+                        mark = capture.mark() if capture else 0
+                    await nav.ensure_period(ANNUAL)
+                    results[key] = await read_statement(page, company_id, url, key, capture, mark, visit)
+                except Exception as e:
+                    journal_error(e, key)
+                    log.warning("⚠️ Failed %s statement for company_id %s: %s", key, company_id, e)
+
+    except Exception as e:
+        journal_error(e)
+        log.warning("⚠️ Failed to scrape company_id %s — %s: %s", company_id, url, e)
+
+    return results
+
+# ─── TASK WRAPPER ───
+async def scrape_wrapper(pool, sem, entry, capture_json=False):
+    cid, url, wanted = entry["company_id"], entry["new_url"], entry["wanted"]
+    random_user_agent = random.choice(USER_AGENTS)
+
+    async with sem.slot() as slot:
+        with journal_attempt("statement_scraper", cid) as attempt, company_deadline():
+            async def visit(context):
+                page = await context.new_page()
+                capture = ResponseCapture(page) if capture_json else None
+                return await scrape_company_statements(page, cid, url, wanted, capture)
+
+            try:
+                results = await pool.run(visit, user_agent=random_user_agent)
+                journal_phase("serialize")
+                for key, df_result in results.items():
+                    if not df_result.empty:
+                        log_preview(log, df_result, "Preview for company_id %s (%s) — %s:", cid, key, url)
+                        with span("serialize.csv", section=key):
+                            df_result.to_csv(STATEMENT_SECTIONS[key]["outputs_dir"] / f"{cid}.csv", index=False)
+                attempt.rows = sum(len(df_result) for df_result in results.values())
+                if not attempt.rows:
+                    if attempt.error is not None:
+                        slot.fail(classify(attempt.error))  # A timeout/selector failure the scrape swallowed
+                    else:
+                        slot.no_data()
+            except Exception as e:
+                slot.fail("timeout" if "Timeout" in type(e).__name__ else "error")
+                journal_error(e)
+                log.error("❌ Error scraping %s: %s", cid, e)
+    return slot.outcome
+
+# ─── QUEUE WORKER ───
+# Body of one --workers process: its own Playwright, browser pool and event loop, pulling
+# companies from the shared queue until it is empty.
+async def queue_worker(queue, worker_id: int, capture_json=False):
+    sem = AdaptiveConcurrency.from_env(f"statement_scraper-{worker_id}")
+    async with async_playwright() as pw:
+        routing = policy_for("statement_scraper")
+        async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}, routing=routing) as pool:
+            await drain_queue(queue, worker_id, lambda entry: scrape_wrapper(pool, sem, entry, capture_json), lambda: sem.limit)
+        log.info("%s", routing.summary())
+
+# ─── MERGE ───
+# STATEMENT_FORMAT=long|both also (or only) writes complete_*_long.csv; see long_format.py
+def merge_statement_outputs():
+    merge_statement_csvs((spec["outputs_dir"], spec["combined_path"], key.removesuffix("_quarterly"))
+                         for key, spec in STATEMENT_SECTIONS.items())
+
+# ─── MAIN FUNCTION ───
+async def main():
+    parser = argparse.ArgumentParser(description="Scrape Bursa income, balance sheet and cash flow statements in one page visit.")
+    parser.add_argument(
+        "--company-id", type=str,
+        help="If set, scrape only this company ID, even if its CSVs already exist."
+    )
+    parser.add_argument(
+        "--capture-json", action="store_true",
+        help="Parse statements from the page's XHR/fetch JSON (archived under outputs/snapshots) instead of the table DOM."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=default_workers(),
+        help="Worker processes sharing one queue, each with its own browsers (default: $SCRAPER_WORKERS or 1)."
+    )
+    parser.add_argument(
+        "--job-store", choices=BACKENDS, default=backend_from_env(),
+        help="Claim companies from the durable job table (sqlite locally, postgres across machines) instead of checking local CSVs (default: $JOB_STORE)."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", default=incremental_from_env(),
+        help="Only visit companies whose next fiscal period is due (see refresh_schedule.py), rescraping all three statements, plus companies still missing one (default: $STATEMENT_REFRESH=incremental)."
+    )
+    add_journal_args(parser)
+    args = parser.parse_args()
+    if args.incremental and args.resume and not args.company_id:
+        # Visits since a company fell due already push it into backoff, so there is nothing to resume
+        parser.error("--incremental and --resume can't be combined (either may come from $STATEMENT_REFRESH / $RUN_JOURNAL_RESUME)")
+
+    df_urls = pd.read_csv(CSV_PATH, dtype=str)
+    df_urls = df_urls.dropna(subset=["company_id", "new_url"])
+
+    # Work out which statements each company still needs, so a visit only walks missing tabs
+    seen = {key: {f.stem for f in spec["outputs_dir"].glob("*.csv")} for key, spec in STATEMENT_SECTIONS.items()}
+    # ...plus the ones whose section failed on the last visit, even if an older CSV exists
+    failed = {cid: {section.removesuffix("_quarterly") for section in sections}
+              for cid, sections in failed_sections("statement_scraper").items()}
+    schedule, due_ids = None, None
+    if args.incremental and not args.company_id:
+        schedule = RefreshSchedule.from_env()
+        plans = schedule.plan(df_urls["company_id"])
+        log.info("%s", summarize(plans))
+        due_ids = {p["company_id"] for p in plans if p["due"]}
+
+    companies, job_entries, refresh_entries, done_ids = [], [], [], set()
+    for entry in df_urls.to_dict("records"):
+        if args.company_id:
+            if entry["company_id"] != args.company_id:
+                continue
+            wanted = list(STATEMENTS)
+        else:
+            wanted = [key for key in STATEMENTS if entry["company_id"] not in seen[key]
+                      or (CAPTURE_QUARTERLY and entry["company_id"] not in seen[f"{key}_quarterly"])
+                      or key in failed.get(entry["company_id"], ())]
+            if due_ids is not None:
+                # The schedule decides refreshes, not backfills: a company between fiscal years
+                # still gets any statement it is missing. Only one that has never yielded a Fiscal
+                # Date waits out the schedule's backoff.
+                if entry["company_id"] not in due_ids:
+                    if entry["company_id"] not in schedule.fiscal_dates:
+                        wanted = []
+                elif entry["company_id"] in schedule.fiscal_dates:
+                    # A new fiscal year adds a column to all three statements
+                    wanted = list(STATEMENTS)
+                    refresh_entries.append({**entry, "wanted": wanted})
+        if wanted:
+            companies.append({**entry, "wanted": wanted})
+        else:
+            done_ids.add(entry["company_id"])
+        job_entries.append({**entry, "wanted": wanted or list(STATEMENTS)})
+
+    pending = companies
+    if args.company_id:
+        log.info("🔍 Running in single-company mode: %s", args.company_id)
+    else:
+        companies = select_for_rerun("statement_scraper", args, companies, job_entries)
+
+    if args.job_store and not args.company_id:
+        # The job table decides what's left; local CSVs only seed it the first time
+        store = JobStore.from_env(args.job_store)
+        job_entries, done_ids, rerun_entries = rerun_for_job_store(args, job_entries, pending, companies, done_ids)
+        log.info("📋 Enqueued %s new statement jobs", store.enqueue('statements', job_entries, done_ids))
+        if refresh_entries:
+            log.info("📅 Reopened %s statement jobs due for a new fiscal period", store.reopen('statements', refresh_entries))
+        if rerun_entries:
+            log.info("🔁 Reopened %s failed statement jobs", store.reopen('statements', rerun_entries))
+        run_sharded("statement_scraper", None, queue_worker, args.workers, desc="Scraping statements",
+                    queue=store.queue("statements"), capture_json=args.capture_json)
+        merge_statement_outputs()
+        return
+
+    if not companies:
+        log.warning("⚠️ No companies to scrape.")
+        return
+
+    if args.workers > 1:
+        run_sharded("statement_scraper", companies, queue_worker, args.workers,
+                    desc="Scraping statements", capture_json=args.capture_json)
+        merge_statement_outputs()
+        return
+
+    sem = AdaptiveConcurrency.from_env("statement_scraper")  # Controls how many concurrent scrapes happen at once (AIMD)
+
+    async with async_playwright() as pw:
+        routing = policy_for("statement_scraper")
+        async with BrowserPool(pw, size=3, launch_kwargs={"headless": True}, routing=routing) as pool:
+            tasks = [scrape_wrapper(pool, sem, entry, args.capture_json) for entry in companies]
+            for task in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Scraping statements"):
+                await task
+        log.info("%s", routing.summary())
+
+    merge_statement_outputs()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Usage:
+    python3 scrapers_1000/statement_scraper.py --company-id 0051   # Single company mode
+    python3 scrapers_1000/statement_scraper.py                    # Scrape all remaining
+    python3 scrapers_1000/statement_scraper.py --capture-json     # Parse the JSON behind the tables
+    python3 scrapers_1000/statement_scraper.py --workers 4        # 4 processes sharing one queue
+    python3 scrapers_1000/statement_scraper.py --job-store postgres --workers 4   # Run on each node of a cluster
+    python3 scrapers_1000/statement_scraper.py --incremental      # Only companies due for a new fiscal period
+    python3 scrapers_1000/statement_scraper.py --resume           # Skip what the run journal already settled
+    python3 scrapers_1000/statement_scraper.py --only-failed --failed-class timeout
+    STATEMENT_QUARTERLY=0 python3 scrapers_1000/statement_scraper.py   # Annual tables only
+
+Writes to the same folders as income_statement.py, balance_sheet.py and cash_flow.py
+(outputs/income_statement_expanded, outputs/balance_sheet_expanded, outputs/cash_flow_expanded)
+and the same combined files, which the income/balance/cashflow injection scripts load as before.
+Figures are now written as float64; income_injection.py and balance_injection.py read them (and
+older comma-text CSVs) through numeric_parsing.to_float. The quarterly tables go to
+outputs/*_quarterly and bursa_data/complete_*_quarterly.csv and are loaded by running the same
+injection scripts with --quarterly. STATEMENT_FORMAT=long|both adds complete_*_long.csv for
+statement_long_injection.py.
+"""
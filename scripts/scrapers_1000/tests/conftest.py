@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# The scraper modules import each other as siblings (python3 scrapers_1000/<script>.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BURSA_TRACE", "0")
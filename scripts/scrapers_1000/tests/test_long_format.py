@@ -0,0 +1,48 @@
+import math
+import pytest
+
+pd = pytest.importorskip("pandas")
+from long_format import LONG_COLUMNS, MetricDictionary, metric_code, to_long_frame
+
+
+def test_metric_code_matches_the_sql_column_names():
+    assert metric_code("Net Income - Starting Line") == "net_income_starting_line"
+    assert metric_code("Cash & Equivalents / Other") == "cash_equivalents_other"
+
+def test_colliding_labels_get_numbered_codes(tmp_path):
+    d = MetricDictionary(tmp_path / "dict.csv")
+    assert d.code("income", "Net Income") == "net_income"
+    assert d.code("income", "Net Income.") == "net_income_2"
+    assert d.code("income", "Net-Income") == "net_income_3"
+    assert d.code("income", "Net Income") == "net_income"
+    assert d.code("balance", "Net Income.") == "net_income"   # Each statement has its own codes
+
+def test_codes_survive_a_reload(tmp_path):
+    d = MetricDictionary(tmp_path / "dict.csv")
+    d.code("income", "Net Income")
+    d.code("income", "Net Income.")
+    d.save()
+    reloaded = MetricDictionary(tmp_path / "dict.csv")
+    assert reloaded.code("income", "Net Income.") == "net_income_2"
+    assert reloaded.code("income", "Net Income?") == "net_income_3"
+    assert reloaded.added == 1
+
+def test_long_frame_pairs_value_and_yoy(tmp_path):
+    df = pd.DataFrame({
+        "company_id": ["0001"] * 4,
+        "Year/Type": ["31 Dec 2024 Value", "31 Dec 2024 YoY %", "31 Dec 2023 Value", "31 Dec 2023 YoY %"],
+        "Revenue": ["1,000", "5%", "-", ""],
+        "Revenue.": ["(20)", "-", "10", "n.m."],
+        "source_url": ["u"] * 4,
+    })
+    out = to_long_frame(df, "income", MetricDictionary(tmp_path / "dict.csv"))
+    assert list(out.columns) == LONG_COLUMNS
+    rows = {(r.fiscal_date, r.metric_code): (r.value, r.yoy_pct) for r in out.itertuples()}
+    assert set(rows) == {("31 Dec 2024", "revenue"), ("31 Dec 2024", "revenue_2"), ("31 Dec 2023", "revenue_2")}
+    assert rows[("31 Dec 2024", "revenue")] == (1000.0, 5.0)
+    assert rows[("31 Dec 2024", "revenue_2")][0] == -20.0 and math.isnan(rows[("31 Dec 2024", "revenue_2")][1])
+    assert rows[("31 Dec 2023", "revenue_2")][0] == 10.0
+
+def test_long_frame_of_an_empty_statement(tmp_path):
+    df = pd.DataFrame(columns=["company_id", "Year/Type", "source_url"])
+    assert list(to_long_frame(df, "income", MetricDictionary(tmp_path / "dict.csv")).columns) == LONG_COLUMNS
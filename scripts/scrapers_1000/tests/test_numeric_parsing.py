@@ -0,0 +1,37 @@
+import math
+import pytest
+
+pd = pytest.importorskip("pandas")
+from numeric_parsing import to_float, to_float_frame
+
+
+def parse(*values):
+    return list(to_float(pd.Series(list(values), dtype=object)))
+
+def same(got, expected):
+    return all((math.isnan(g) and math.isnan(e)) or g == e for g, e in zip(got, expected)) and len(got) == len(expected)
+
+
+def test_separators_and_signs():
+    assert parse("1,234.5", "(1,234.5)", "−12", "+7", " 3 ") == [1234.5, -1234.5, -12.0, 7.0, 3.0]
+
+def test_brackets_do_not_flip_a_signed_figure():
+    assert parse("(-5)", "(−5)", "(+5)", "(5)") == [-5.0, -5.0, 5.0, -5.0]
+
+def test_percentages_stay_in_points():
+    assert parse("+5.2%", "-4.1 %", "(5%)") == [5.2, -4.1, -5.0]
+
+def test_missing_and_unparseable_are_nan():
+    nan = float("nan")
+    assert same(parse("-", "—", "", None, "N/A", "n.m.", "12x"), [nan] * 7)
+
+def test_numbers_pass_through():
+    out = to_float(pd.Series([1, 2, None]))
+    assert out.dtype == "float64" and same(list(out), [1.0, 2.0, float("nan")])
+
+def test_frame_types_only_metric_columns():
+    df = pd.DataFrame({"company_id": ["0001"], "Year/Type": ["31 Dec 2024 Value"],
+                       "Revenue": ["1,000"], "source_url": ["u"]})
+    out = to_float_frame(df)
+    assert out["Revenue"].dtype == "float64" and out.loc[0, "Revenue"] == 1000.0
+    assert out.loc[0, "company_id"] == "0001"
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("pandas")
+from refresh_schedule import RefreshSchedule
+
+FY_END = datetime(2024, 12, 31)
+DUE = datetime(2025, 12, 31) + timedelta(days=60)   # Next year end + publication lag
+
+
+def schedule(visits=None):
+    return RefreshSchedule(publish_lag_days=60, backoff_days=7, backoff_cap_days=56,
+                           fiscal_dates={"0001": FY_END}, visits={"0001": visits or []})
+
+
+def test_not_due_before_the_next_period_is_published():
+    plan = schedule().plan_one("0001", DUE - timedelta(days=1))
+    assert not plan["due"] and plan["reason"] == "period_not_due" and plan["next_try"] == DUE
+
+def test_due_once_the_period_is_published():
+    plan = schedule().plan_one("0001", DUE)
+    assert plan["due"] and plan["reason"] == "period_due"
+
+def test_each_miss_doubles_the_wait():
+    visits = [DUE + timedelta(days=d) for d in (0, 7, 21)]   # Three visits that found nothing new
+    plan = schedule(visits).plan_one("0001", visits[-1] + timedelta(days=27))
+    assert plan["misses"] == 3 and plan["next_try"] == visits[-1] + timedelta(days=28)
+    assert not plan["due"]
+    assert schedule(visits).plan_one("0001", visits[-1] + timedelta(days=28))["due"]
+
+def test_wait_stops_at_the_cap():
+    visits = [DUE + timedelta(days=d) for d in range(10)]
+    plan = schedule(visits).plan_one("0001", visits[-1])
+    assert plan["next_try"] == visits[-1] + timedelta(days=56)
+
+def test_visits_before_the_period_was_due_are_not_misses():
+    plan = schedule([DUE - timedelta(days=30)]).plan_one("0001", DUE)
+    assert plan["due"] and plan["reason"] == "period_due"
+
+def test_unknown_company_is_due_and_backs_off():
+    s = RefreshSchedule(fiscal_dates={}, visits={"0002": [DUE]}, backoff_days=7)
+    assert s.plan_one("0003", DUE)["reason"] == "never_scraped"
+    assert s.plan_one("0002", DUE)["next_try"] == DUE + timedelta(days=7)
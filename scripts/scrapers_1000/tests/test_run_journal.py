@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+import pytest
+
+import run_journal
+from run_journal import (NO_DATA, PARTIAL, SELECTOR_MISSING, SUCCESS, TIMEOUT, SelectorMissing,
+                         failed_sections, journal_attempt, journal_error, select_for_rerun)
+
+
+@pytest.fixture(autouse=True)
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_journal, "JOURNAL_PATH", tmp_path / "run_journal.jsonl")
+
+
+def visit(cid, rows=0, errors=()):
+    with journal_attempt("statement_scraper", cid) as attempt:
+        for section, exc in errors:
+            journal_error(exc, section)
+        attempt.rows = rows
+
+
+def test_outcomes():
+    visit("0001", rows=10)
+    visit("0002")
+    visit("0003", errors=[(None, TimeoutError("navigating to ..."))])
+    visit("0004", rows=10, errors=[("balance", SelectorMissing("no table"))])
+    outcomes = {cid: e["outcome"] for cid, e in run_journal.latest_outcomes("statement_scraper").items()}
+    assert outcomes == {"0001": SUCCESS, "0002": NO_DATA, "0003": TIMEOUT, "0004": PARTIAL}
+    assert failed_sections("statement_scraper")["0004"] == {"balance"}
+    assert run_journal.latest_outcomes("statement_scraper")["0004"]["failed_sections"] == {"balance": SELECTOR_MISSING}
+
+def test_partial_visits_are_rerun():
+    visit("0001", rows=10)
+    visit("0002", rows=10, errors=[("cashflow_quarterly", TimeoutError("navigating to ..."))])
+    entries = [{"company_id": cid} for cid in ("0001", "0002")]
+    resume = SimpleNamespace(resume=True, only_failed=False, failed_class=None)
+    assert select_for_rerun("statement_scraper", resume, entries, entries) == [{"company_id": "0002"}]
+    only_partial = SimpleNamespace(resume=False, only_failed=True, failed_class=[PARTIAL])
+    assert select_for_rerun("statement_scraper", only_partial, [], entries) == [{"company_id": "0002"}]
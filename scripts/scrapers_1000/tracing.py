@@ -0,0 +1,325 @@
+import argparse
+import atexit
+import fcntl
+import functools
+import inspect
+import json
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+# ─── CONFIG ───
+BASE_DIR = Path(__file__).resolve().parent
+TRACE_PATH = Path(os.getenv("BURSA_TRACE_FILE", BASE_DIR / "outputs" / "traces.jsonl"))
+# Set BURSA_TRACE=0 to skip writing spans
+ENABLED = os.getenv("BURSA_TRACE", "1") != "0"
+# Past this size the file is moved to traces.jsonl.1 (replacing the previous one) and restarted
+MAX_TRACE_BYTES = int(float(os.getenv("BURSA_TRACE_MAX_MB", "100")) * 2**20)
+ENV_TRACEPARENT = "TRACEPARENT"     # W3C trace context; orchestrator steps hand theirs to child scripts
+SERVICE_NAME = Path(sys.argv[0]).stem or "python"
+
+# Copied from a span to every span opened inside it, so a click three calls down still
+# carries the company it was for
+INHERITED = ("scraper", "company_id", "section", "attempt")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_inherited: ContextVar[dict] = ContextVar("trace_attributes", default={})
+
+
+# ─── TRACE CONTEXT ───
+def _parse_traceparent(value: Optional[str]):
+    parts = (value or "").split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None, None
+
+# Every span in this process belongs to the orchestrator's trace when started from it,
+# otherwise to a fresh trace for this run
+_PARENT_TRACE_ID, _PARENT_SPAN_ID = _parse_traceparent(os.getenv(ENV_TRACEPARENT))
+TRACE_ID = _PARENT_TRACE_ID or secrets.token_hex(16)
+
+
+# ─── SPANS ───
+# One timed operation, written as an OpenTelemetry-shaped JSON line when it ends.
+class Span:
+    def __init__(self, name: str, attributes: dict, parent: Optional["Span"]):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else _PARENT_SPAN_ID
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error: Optional[BaseException] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return f"00-{TRACE_ID}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        status = {"code": "OK"}
+        if self.error is not None:
+            status = {"code": "ERROR", "message": f"{type(self.error).__name__}: {self.error}"[:300]}
+        return {
+            "trace_id": TRACE_ID,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "status": status,
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        }
+
+
+# Times a block, or every call of a function:
+#
+#   with span("serialize.csv", section="income"):
+#       df.to_csv(path, index=False)
+#
+#   @span("extract.table")
+#   async def extract_statement_table(page, company_id, url): ...
+#
+# company_id / section / attempt come from the enclosing span or trace_attributes() unless
+# given here.
+class span:
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+        self._tokens = None
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        inherited = _inherited.get()
+        attributes = {**inherited, **{k: v for k, v in self.attributes.items() if v is not None}}
+        self._span = Span(self.name, attributes, parent)
+        passed_on = {k: attributes[k] for k in INHERITED if k in attributes}
+        self._tokens = (_current_span.set(self._span), _inherited.set(passed_on))
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        current, inherited = self._tokens
+        _inherited.reset(inherited)
+        _current_span.reset(current)
+        self._span.end_ns = time.time_ns()
+        if exc is not None:
+            self._span.error = exc
+        write_span(self._span)
+        return False
+
+    def __call__(self, fn):
+        name, attributes = self.name, self.attributes
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return fn(*args, **kwargs)
+        return wrapper
+
+# Attributes for every span opened inside the block, without a span of its own (retry loops
+# use it to stamp the attempt number on whatever the attempt does)
+@contextmanager
+def trace_attributes(**attributes):
+    token = _inherited.set({**_inherited.get(), **attributes})
+    try:
+        yield
+    finally:
+        _inherited.reset(token)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+# Environment for a child process whose spans should nest under the current span
+def child_env(env: Optional[dict] = None) -> dict:
+    env = dict(os.environ if env is None else env)
+    parent = _current_span.get()
+    if parent is not None:
+        env[ENV_TRACEPARENT] = parent.traceparent()
+    return env
+
+
+# ─── TRACE FILE ───
+# Finished spans go on a queue; a writer thread appends whatever has piled up in one locked
+# write, so ending a span never blocks the event loop on the file or on another process's lock
+# (same arrangement as log_config.py).
+_writer = {"queue": None, "thread": None}
+_writer_lock = threading.Lock()
+_STOP = object()
+
+def _is_trace_file(f) -> bool:
+    try:
+        return os.stat(TRACE_PATH).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+# The lock lives on the file itself, so after a rotation (here or in another process that held
+# the lock while we waited) the handle points at traces.jsonl.1; reopen and lock the new file.
+def _write_batch(lines: list):
+    TRACE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)  # Worker processes and parallel scrapers share the file
+            try:
+                if not _is_trace_file(f):
+                    continue
+                if os.fstat(f.fileno()).st_size > MAX_TRACE_BYTES:
+                    os.replace(TRACE_PATH, TRACE_PATH.with_name(TRACE_PATH.name + ".1"))
+                    continue
+                f.write("".join(lines))
+                return
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _drain(spans: queue.SimpleQueue):
+    while True:
+        batch = [spans.get()]
+        while not spans.empty():
+            batch.append(spans.get())
+        stop = any(item is _STOP for item in batch)
+        lines = [json.dumps(item.to_dict(), default=str) + "\n" for item in batch if item is not _STOP]
+        if lines:
+            try:
+                _write_batch(lines)
+            except OSError as e:
+                print(f"⚠️ Could not write {len(lines)} spans to {TRACE_PATH}: {e}", file=sys.stderr)
+        if stop:
+            return
+
+def _start_writer():
+    _writer["queue"] = queue.SimpleQueue()
+    _writer["thread"] = threading.Thread(target=_drain, args=(_writer["queue"],), name="trace-writer", daemon=True)
+    _writer["thread"].start()
+
+# Writes out the spans still queued. Runs at exit; forked workers, which skip atexit, call it
+# themselves (work_queue._worker_entry).
+def flush_spans():
+    with _writer_lock:
+        if _writer["thread"] is not None:
+            _writer["queue"].put(_STOP)
+            _writer["thread"].join()
+            _writer["queue"] = _writer["thread"] = None
+
+def _restart_in_child():
+    global _writer_lock
+    _writer_lock = threading.Lock()  # May have been held by a parent thread at the fork
+    if _writer["thread"] is not None:
+        _start_writer()  # The parent's thread didn't survive the fork; its queued spans stay with the parent
+
+def write_span(finished: Span):
+    if not ENABLED:
+        return
+    if _writer["thread"] is None:
+        with _writer_lock:
+            if _writer["thread"] is None:
+                _start_writer()
+    _writer["queue"].put(finished)
+
+if ENABLED:
+    atexit.register(flush_spans)
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+def read_spans(path: Path = TRACE_PATH, trace_id: Optional[str] = None):
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if trace_id is None or record.get("trace_id") == trace_id:
+                yield record
+
+
+# ─── SUMMARY ───
+def _seconds(record: dict) -> float:
+    return (record["end_time_unix_nano"] - record["start_time_unix_nano"]) / 1e9
+
+def _percentile(ordered: list, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+# Per span name: calls, errors, total and self time (minus time spent in child spans), p50/p95.
+# Spans of concurrent companies overlap, so totals add up to more than the run's wall clock;
+# self time is what shows where that time actually went.
+def summarize_spans(records: list, group_by: str = "name") -> list:
+    child_time = {}
+    for r in records:
+        if r.get("parent_span_id"):
+            child_time[r["parent_span_id"]] = child_time.get(r["parent_span_id"], 0.0) + _seconds(r)
+
+    groups = {}
+    for r in records:
+        key = r["name"] if group_by == "name" else str(r.get("attributes", {}).get(group_by, "-"))
+        g = groups.setdefault(key, {"key": key, "calls": 0, "errors": 0, "total": 0.0, "self": 0.0, "durations": []})
+        duration = _seconds(r)
+        g["calls"] += 1
+        g["errors"] += r.get("status", {}).get("code") == "ERROR"
+        g["total"] += duration
+        g["self"] += max(0.0, duration - child_time.get(r["span_id"], 0.0))
+        g["durations"].append(duration)
+
+    for g in groups.values():
+        ordered = sorted(g.pop("durations"))
+        g["p50"], g["p95"] = _percentile(ordered, 50), _percentile(ordered, 95)
+    return sorted(groups.values(), key=lambda g: g["self"], reverse=True)
+
+def latest_trace_id(path: Path = TRACE_PATH) -> Optional[str]:
+    latest, latest_end = None, -1
+    for r in read_spans(path):
+        if r["end_time_unix_nano"] > latest_end:
+            latest, latest_end = r["trace_id"], r["end_time_unix_nano"]
+    return latest
+
+
+# ─── CLI ───
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize where wall-clock time went in a traced scrape run.")
+    parser.add_argument("--file", default=str(TRACE_PATH), help="Span JSONL file")
+    parser.add_argument("--trace-id", help="Trace to summarize (default: the most recent one)")
+    parser.add_argument("--by", default="name", help="Group by span name (default) or an attribute, e.g. section or company_id")
+    parser.add_argument("--top", type=int, default=25, help="Rows to show")
+    args = parser.parse_args()
+
+    path = Path(args.file)
+    trace_id = args.trace_id or latest_trace_id(path)
+    records = list(read_spans(path, trace_id))
+    if not records:
+        sys.exit(f"❌ No spans in {path}")
+
+    start = min(r["start_time_unix_nano"] for r in records)
+    end = max(r["end_time_unix_nano"] for r in records)
+    wall = (end - start) / 1e9
+    companies = {r["attributes"].get("company_id") for r in records if r["attributes"].get("company_id")}
+    rows = summarize_spans(records, args.by)
+    total_self = sum(g["self"] for g in rows) or 1.0
+
+    print(f"🔍 Trace {trace_id}: {len(records)} spans, {len(companies)} companies, {wall:.1f}s wall clock")
+    print(f"{args.by:<32} {'calls':>7} {'errors':>6} {'self s':>9} {'share':>6} {'total s':>9} {'p50 s':>7} {'p95 s':>7}")
+    for g in rows[:args.top]:
+        print(f"{g['key'][:32]:<32} {g['calls']:>7} {g['errors']:>6} {g['self']:>9.1f} "
+              f"{g['self'] / total_self:>6.1%} {g['total']:>9.1f} {g['p50']:>7.2f} {g['p95']:>7.2f}")
+
+"""
+Usage:
+    python3 scrapers_1000/tracing.py                          # Latest run, by span name
+    python3 scrapers_1000/tracing.py --by section
+    python3 scrapers_1000/tracing.py --by company_id --top 10 # Slowest companies
+    python3 scrapers_1000/tracing.py --trace-id <id> --file /tmp/traces.jsonl
+    BURSA_TRACE=0 python3 scrapers_1000/statement_scraper.py  # No spans (BURSA_TRACE_MAX_MB caps the file, default 100)
+"""
@@ -0,0 +1,95 @@
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+# ─── CONFIG ───
+DEFAULT_TIMEOUT = 10000    # ms; every helper gives up after this and lets the caller carry on
+
+# First row + last row + count is enough to tell one table page from the next without
+# shipping the whole table across the Playwright bridge.
+ROW_SIGNATURE_JS = """
+(selector) => {
+    const rows = document.querySelectorAll(selector);
+    if (!rows.length) return "0";
+    return rows.length + "|" + rows[0].innerText + "|" + rows[rows.length - 1].innerText;
+}
+"""
+ROWS_CHANGED_JS = f"([selector, before]) => ({ROW_SIGNATURE_JS})(selector) !== before"
+TEXT_CHANGED_JS = "([selector, before]) => { const el = document.querySelector(selector); return el && el.innerText !== before; }"
+
+
+# ─── WAIT STATS ───
+# Replaces the fixed wait_for_timeout() sleeps. Each helper waits for a real condition and
+# records how long it actually waited, so a run can report where its idle time went.
+class WaitStats:
+    def __init__(self):
+        self.count = defaultdict(int)
+        self.timeouts = defaultdict(int)
+        self.total = defaultdict(float)
+        self.longest = defaultdict(float)
+
+    def record(self, name: str, elapsed: float, timed_out: bool):
+        self.count[name] += 1
+        self.total[name] += elapsed
+        self.longest[name] = max(self.longest[name], elapsed)
+        if timed_out:
+            self.timeouts[name] += 1
+
+    def summary(self) -> str:
+        if not self.count:
+            return "⏳ Waits: none recorded"
+        lines = ["⏳ Waits:"]
+        for name in sorted(self.count, key=lambda n: -self.total[n]):
+            n = self.count[name]
+            lines.append(
+                f"   {name}: {n}× avg {self.total[name] / n:.2f}s, max {self.longest[name]:.2f}s, "
+                f"total {self.total[name]:.1f}s, {self.timeouts[name]} timed out"
+            )
+        return "\n".join(lines)
+
+
+WAIT_STATS = WaitStats()
+
+@asynccontextmanager
+async def _timed(name: str):
+    state = {"timed_out": False}
+    started = time.monotonic()
+    try:
+        yield state
+    except Exception:
+        state["timed_out"] = True  # Timeouts (or a closed page) end the wait; the caller decides what's next
+    finally:
+        WAIT_STATS.record(name, time.monotonic() - started, state["timed_out"])
+
+
+# ─── HELPERS ───
+# All helpers take a Page or a Frame and return True when the condition was met,
+# False when they timed out. None of them raise.
+async def row_signature(target, row_selector: str) -> str:
+    return await target.evaluate(ROW_SIGNATURE_JS, row_selector)
+
+# Call row_signature() before clicking Next / changing the page size, then this afterwards.
+async def wait_for_rows_change(target, row_selector: str, before: str,
+                               timeout: int = DEFAULT_TIMEOUT, name: str = "rows_change") -> bool:
+    async with _timed(name) as state:
+        await target.wait_for_function(ROWS_CHANGED_JS, arg=[row_selector, before], timeout=timeout)
+    return not state["timed_out"]
+
+# For containers that re-render in place (statement sub-tabs, period switch): pass the
+# innerText from before the click.
+async def wait_for_text_change(target, selector: str, before: str,
+                               timeout: int = DEFAULT_TIMEOUT, name: str = "text_change") -> bool:
+    async with _timed(name) as state:
+        await target.wait_for_function(TEXT_CHANGED_JS, arg=[selector, before], timeout=timeout)
+    return not state["timed_out"]
+
+async def wait_for_visible(target, selector: str, timeout: int = DEFAULT_TIMEOUT,
+                           name: str = "visible") -> bool:
+    async with _timed(name) as state:
+        await target.locator(selector).first.wait_for(state="visible", timeout=timeout)
+    return not state["timed_out"]
+
+async def wait_for_network_idle(page, timeout: int = DEFAULT_TIMEOUT, name: str = "network_idle") -> bool:
+    async with _timed(name) as state:
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+    return not state["timed_out"]
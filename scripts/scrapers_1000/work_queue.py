@@ -0,0 +1,187 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+from tqdm import tqdm
+from concurrency import HEALTHY_OUTCOMES
+from log_config import flush_logs, get_logger
+from tracing import flush_spans
+
+# ─── CONFIG ───
+log = get_logger("work_queue")
+ENV_WORKERS = "SCRAPER_WORKERS"    # Default for --workers; the orchestrator sets it for child scrapers
+POLL_SECONDS = 0.5                 # How often the parent refreshes the merged progress bar
+
+
+def default_workers() -> int:
+    return int(os.getenv(ENV_WORKERS, "1"))
+
+
+# ─── SHARED QUEUE ───
+# A tiny SQLite-backed queue shared by the worker processes of one scraper run.
+# Workers claim one company at a time, so a slow shard never leaves the others idle.
+class WorkQueue:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened lazily per process; a connection inherited through fork is never reused
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    def __getstate__(self):
+        return {"path": self.path, "_conn": None, "_pid": None}
+
+    def seed(self, entries: list):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue (
+                seq INTEGER PRIMARY KEY,
+                company_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker INTEGER,
+                updated_at REAL
+            )
+        """)
+        self.conn.executemany(
+            "INSERT INTO queue (company_id, payload) VALUES (?, ?)",
+            [(entry["company_id"], json.dumps(entry)) for entry in entries],
+        )
+
+    def claim(self, worker_id: int) -> Optional[dict]:
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")  # Serialises claims across processes
+        try:
+            row = conn.execute("SELECT seq, payload FROM queue WHERE status = 'pending' ORDER BY seq LIMIT 1").fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE queue SET status = 'running', worker = ?, updated_at = ? WHERE seq = ?",
+                (worker_id, time.time(), row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        entry = json.loads(row[1])
+        entry["_seq"] = row[0]
+        return entry
+
+    def complete(self, entry: dict, status: str = "done", error: Optional[str] = None):
+        self.conn.execute(
+            "UPDATE queue SET status = ?, updated_at = ? WHERE seq = ?",
+            (status, time.time(), entry["_seq"]),
+        )
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM queue GROUP BY status").fetchall())
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+# ─── WORKER SIDE ───
+# Claims entries while the scraper's concurrency limit has room, so each worker keeps its
+# own Playwright instance as busy as its AdaptiveConcurrency allows. `handle` may return an
+# outcome: None or a healthy slot outcome ("ok", or "empty" for a page with no data) is done,
+# anything else is recorded as the failure reason.
+# `queue` is a WorkQueue or a job_store.JobQueue; both expose claim/complete/counts.
+#
+#   await drain_queue(queue, worker_id, lambda entry: scrape_wrapper(pool, sem, entry), lambda: sem.limit)
+async def drain_queue(queue, worker_id: int, handle, limit):
+    async def run(entry):
+        try:
+            outcome = await handle(entry)
+        except Exception as e:
+            queue.complete(entry, "failed", error=str(e))
+            log.error("❌ [worker %s] %s: %s", worker_id, entry['company_id'], e)
+            return
+        if outcome is None or outcome in HEALTHY_OUTCOMES:
+            queue.complete(entry, "done")
+        else:
+            queue.complete(entry, "failed", error=outcome)
+
+    pending = set()
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < limit():
+            entry = queue.claim(worker_id)  # A few ms under the SQLite write lock
+            if entry is None:
+                exhausted = True
+                break
+            pending.add(asyncio.create_task(run(entry)))
+        if not pending:
+            break
+        _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+
+def _worker_entry(worker_fn, queue, worker_id: int, kwargs: dict):
+    try:
+        asyncio.run(worker_fn(queue, worker_id, **kwargs))
+    finally:
+        queue.close()
+        flush_spans()
+        flush_logs()  # Forked processes exit without running atexit
+
+
+# ─── PARENT SIDE ───
+# Splits `entries` across `workers` processes that all pull from one SQLite queue and shows a
+# single merged progress bar. `worker_fn(queue, worker_id, **kwargs)` is an async, module-level
+# function in the scraper that starts Playwright and calls drain_queue().
+# Pass `queue` (a job_store.JobQueue) instead of `entries` to drain a durable, shared job table.
+def run_sharded(name: str, entries: Optional[list], worker_fn, workers: int, desc: str = "Scraping",
+                queue=None, **kwargs) -> dict:
+    temporary = queue is None
+    if temporary:
+        queue_path = Path(tempfile.gettempdir()) / f"bursa_queue_{name}_{os.getpid()}.sqlite"
+        queue = WorkQueue(queue_path)
+        queue.seed(entries)
+
+    counts = queue.counts()
+    finished = counts.get("done", 0) + counts.get("failed", 0)
+    total = counts.get("pending", 0) + counts.get("running", 0)
+    workers = max(1, workers)
+    log.info("🧵 [%s] %s companies across %s worker process(es)", name, total, workers)
+
+    processes = [
+        multiprocessing.Process(target=_worker_entry, args=(worker_fn, queue, i, kwargs), name=f"{name}-{i}")
+        for i in range(workers)
+    ]
+    for p in processes:
+        p.start()
+
+    with tqdm(total=total, desc=desc) as bar:
+        while any(p.is_alive() for p in processes):
+            counts = queue.counts()
+            now = counts.get("done", 0) + counts.get("failed", 0)
+            bar.update(now - finished)
+            bar.set_postfix(running=counts.get("running", 0), failed=counts.get("failed", 0))
+            finished = now
+            time.sleep(POLL_SECONDS)
+        counts = queue.counts()
+        bar.update(counts.get("done", 0) + counts.get("failed", 0) - finished)
+
+    for p in processes:
+        p.join()
+        if p.exitcode != 0:
+            log.warning("⚠️ [%s] worker %s exited with code %s", name, p.name, p.exitcode)
+
+    queue.close()
+    if temporary:
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{queue_path}{suffix}").unlink(missing_ok=True)
+    return counts